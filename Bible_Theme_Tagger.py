@@ -1,157 +1,247 @@
 #!/usr/bin/env python3
 """
-Bible Theme Tagger for Galatians, Ephesians, Philippians, Colossians
+Bible Theme Tagger
 Assigns 1-3 relevant biblical themes to verses based on content analysis.
+Themes are written to the verse_themes junction (and the derived JSON column).
+
+The keyword rules live in theme_rules.json: a list of regex patterns per
+theme, plus book-specific refinements (e.g. Galatians verses about the law
+also get "freedom"). All theme patterns are compiled once into a single
+alternation with one named group per pattern, so each verse is scanned
+once; a theme's score is the number of its patterns that match. The
+common \\bword patterns are grouped by first letter, which keeps the
+combined scan fast. The refinements are compiled once too and only run
+for their books.
+
+--scoring bm25 (or tfidf) ranks themes by BM25 over the whole corpus
+instead of pattern counts (scripts/theme_scoring.py): the theme patterns
+become keywords, every verse is scored against every theme in one sparse
+matrix product, and the book refinements are applied on top as before.
+numpy and scipy are optional dependencies, only needed for --scoring
+bm25/tfidf (pip install numpy scipy).
+
+Usage:
+    python3 Bible_Theme_Tagger.py                                   # untagged verses, whole Bible
+    python3 Bible_Theme_Tagger.py --db assets/bible.db --book Galatians --book Ephesians
+    python3 Bible_Theme_Tagger.py --retag                           # re-tag every verse
+    python3 Bible_Theme_Tagger.py --retag --scoring bm25
 """
 
-import sqlite3
+import argparse
 import json
+import os
 import re
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from bible_db import ensure_theme_tables, set_verse_themes
+from theme_scoring import ThemeScorer, pattern_keyword, scoring_available
 
 # Database path
 DB_PATH = '/Users/kcdacre8tor/thereal-everyday-christian/assets/bible.db'
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'theme_rules.json')
+
+# Verses per executemany batch and commit
+BATCH_SIZE = 5000
+
+
+# Patterns of the common form \bword...: a word boundary, then a letter, no alternation
+WORD_PATTERN_RE = re.compile(r'\\b[a-z][^|]*')
+
+
+def combined_pattern(groups):
+    """
+    Join {pattern: group name} into one alternation.
+
+    Word patterns are grouped by their first letter behind a single \\b,
+    so at each word boundary the engine tries only the patterns starting
+    with that letter instead of every alternative in turn.
+    """
+    by_letter = {}
+    other = []
+    for pattern, name in groups.items():
+        if WORD_PATTERN_RE.fullmatch(pattern):
+            by_letter.setdefault(pattern[2], []).append(f'(?P<{name}>{pattern[3:]})')
+        else:
+            other.append(f'(?P<{name}>{pattern})')
+    alternatives = [f"{letter}(?:{'|'.join(branches)})" for letter, branches in by_letter.items()]
+    parts = [rf"\b(?:{'|'.join(alternatives)})"] if alternatives else []
+    return '|'.join(parts + other)
+
+
+class ThemeRuleEngine:
+    """Theme rules from a rule file, compiled once"""
+
+    def __init__(self, rules):
+        self.max_themes = rules.get('max_themes', 3)
+        self.themes = list(rules['themes'])
+
+        # One named group per distinct pattern; a pattern shared by several
+        # themes (e.g. \bholy\b) scores for each of them
+        self.pattern_themes = {}
+        groups = {}
+        for theme, patterns in rules['themes'].items():
+            for pattern in patterns:
+                name = groups.setdefault(pattern, f'p{len(groups)}')
+                self.pattern_themes.setdefault(name, []).append(theme)
+        self.matcher = re.compile(combined_pattern(groups))
+
+        self.theme_patterns = rules['themes']
+        self.refinements = {}
+        for rule in rules.get('refinements', []):
+            compiled = (re.compile('|'.join(rule['patterns'])), rule['theme'], rule.get('when_full'))
+            for book in rule['books']:
+                self.refinements.setdefault(book, []).append(compiled)
+
+    def analyze(self, book, text):
+        """Return up to max_themes themes for one verse, best first"""
+        text_lower = text.lower()
+        matched = {match.lastgroup for match in self.matcher.finditer(text_lower)}
+
+        scores = Counter()
+        for name in matched:
+            for theme in self.pattern_themes[name]:
+                scores[theme] += 1
+
+        # Highest score first; ties keep the rule file's theme order
+        assigned_themes = sorted((theme for theme in self.themes if scores[theme]), key=scores.__getitem__,
+                                 reverse=True)[:self.max_themes]
+        return self.refine(book, text_lower, assigned_themes)
+
+    def refine(self, book, text_lower, assigned_themes):
+        """Context-based refinements for specific books"""
+        for pattern, theme, when_full in self.refinements.get(book, ()):
+            if theme in assigned_themes or not pattern.search(text_lower):
+                continue
+            if len(assigned_themes) < self.max_themes:
+                assigned_themes.append(theme)
+            elif when_full == 'replace_first':
+                assigned_themes[0] = theme
+
+        return assigned_themes
+
+    def keywords(self):
+        """{theme: [keyword]} for the theme patterns theme_scoring can express, plus the skipped patterns"""
+        keywords, skipped = {}, []
+        for theme, patterns in self.theme_patterns.items():
+            keywords[theme] = []
+            for pattern in patterns:
+                keyword = pattern_keyword(pattern)
+                if keyword:
+                    keywords[theme].append(keyword)
+                else:
+                    skipped.append(pattern)
+        return keywords, skipped
+
+
+def score_verses(engine, verses, method):
+    """Theme assignments for [(id, book, text)] ranked by BM25/TF-IDF over the whole batch"""
+    keywords, skipped = engine.keywords()
+    if skipped:
+        print(f"⚠️  Patterns with no keyword form, not scored: {', '.join(skipped)}")
+    scorer = ThemeScorer([text for _, _, text in verses], keywords, method=method)
+    return [
+        (verse_id, engine.refine(book, text.lower(), [theme for theme, _ in ranked]))
+        for (verse_id, book, text), ranked in zip(verses, scorer.top_themes(engine.max_themes))
+    ]
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, encoding='utf-8') as f:
+        return ThemeRuleEngine(json.load(f))
+
+
+_default_engine = None
 
-# Available themes
-THEMES = [
-    "hope", "faith", "love", "grace", "mercy", "freedom", "joy", "peace",
-    "unity", "humility", "perseverance", "spiritual warfare", "righteousness",
-    "holiness", "wisdom", "guidance", "strength", "thanksgiving", "prayer"
-]
 
 def analyze_verse(reference, text):
     """
     Analyze verse text and assign 1-3 relevant themes.
-    Returns a JSON array of theme strings.
+    Returns a list of theme strings.
     """
-    text_lower = text.lower()
-    assigned_themes = []
-
-    # Theme detection patterns (prioritized by specificity)
-    theme_patterns = {
-        "faith": [r'\bfaith\b', r'\bbeliev', r'\btrust\b'],
-        "love": [r'\blove\b', r'\bloved\b', r'\bloving\b', r'\bcharity\b'],
-        "grace": [r'\bgrace\b', r'\bgracious\b'],
-        "hope": [r'\bhope\b', r'\bhopeful\b'],
-        "peace": [r'\bpeace\b', r'\bpeaceful\b', r'\breconcil'],
-        "joy": [r'\bjoy\b', r'\bjoying\b', r'\brejoic'],
-        "freedom": [r'\bfree\b', r'\bfreedom\b', r'\bliberty\b', r'\bdeliver'],
-        "mercy": [r'\bmercy\b', r'\bmerciful\b', r'\bcompassion'],
-        "unity": [r'\bunity\b', r'\bunited\b', r'\bone body\b', r'\btogether\b', r'\bknit'],
-        "humility": [r'\bhumbl', r'\blowly\b', r'\bmeek\b', r'\bservant\b'],
-        "perseverance": [r'\bendur', r'\bpersever', r'\bsteadfast\b', r'\bpatien'],
-        "spiritual warfare": [r'\barmor\b', r'\bwarfare\b', r'\bbattle\b', r'\bstruggle\b', r'\bprincipalities\b', r'\bpowers\b', r'\bdarkness\b'],
-        "righteousness": [r'\bright', r'\bjust\b', r'\bjustice\b', r'\bholy\b'],
-        "holiness": [r'\bholy\b', r'\bholiness\b', r'\bsaint\b', r'\bsanctif'],
-        "wisdom": [r'\bwisdom\b', r'\bwise\b', r'\bunderstand'],
-        "guidance": [r'\bguide\b', r'\blead\b', r'\bdirect', r'\bwalk\b', r'\bpath\b'],
-        "strength": [r'\bstrength\b', r'\bstrong\b', r'\bpower\b', r'\bmight\b'],
-        "thanksgiving": [r'\bthank', r'\bgrateful\b', r'\bgratitude\b'],
-        "prayer": [r'\bpray\b', r'\bpraying\b', r'\bprayer\b', r'\bintercession\b']
-    }
-
-    # Score each theme based on pattern matches
-    theme_scores = {}
-    for theme, patterns in theme_patterns.items():
-        score = sum(1 for pattern in patterns if re.search(pattern, text_lower))
-        if score > 0:
-            theme_scores[theme] = score
-
-    # Sort by score and take top 3
-    sorted_themes = sorted(theme_scores.items(), key=lambda x: x[1], reverse=True)
-    assigned_themes = [theme for theme, score in sorted_themes[:3]]
-
-    # Context-based refinements for specific books/chapters
-    if "Galatians" in reference:
-        if any(re.search(pattern, text_lower) for pattern in [r'\blaw\b', r'\bcircumcis']):
-            if "freedom" not in assigned_themes and len(assigned_themes) < 3:
-                assigned_themes.append("freedom")
-        if re.search(r'\bspirit\b', text_lower) and "holiness" not in assigned_themes and len(assigned_themes) < 3:
-            assigned_themes.append("holiness")
-
-    if "Ephesians" in reference:
-        if re.search(r'\bchurch\b|\bbody\b', text_lower) and "unity" not in assigned_themes and len(assigned_themes) < 3:
-            assigned_themes.append("unity")
-
-    if "Philippians" in reference:
-        if any(re.search(pattern, text_lower) for pattern in [r'\bjoy\b', r'\brejoic']) and "joy" not in assigned_themes:
-            if len(assigned_themes) < 3:
-                assigned_themes.append("joy")
-            elif "joy" not in assigned_themes:
-                assigned_themes[0] = "joy"
-
-    if "Colossians" in reference:
-        if re.search(r'\bchrist\b.*\ball\b|\bfullness\b', text_lower) and len(assigned_themes) < 3:
-            if "holiness" not in assigned_themes:
-                assigned_themes.append("holiness")
-
-    # Return top 3 themes (or fewer if less were found)
-    return assigned_themes[:3]
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = load_rules()
+    book = reference.rsplit(' ', 1)[0]
+    return _default_engine.analyze(book, text)
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Assign rule-based themes to Bible verses")
+    parser.add_argument('--db', default=DB_PATH, help="Bible database with a verses table")
+    parser.add_argument('--rules', default=RULES_PATH, help="Theme rule file")
+    parser.add_argument('--book', action='append', dest='books', help="Only tag this book (repeatable)")
+    parser.add_argument('--retag', action='store_true', help="Re-tag verses that already have themes")
+    parser.add_argument('--scoring', choices=('rules', 'bm25', 'tfidf'), default='rules',
+                        help="Rank themes by pattern counts or by BM25/TF-IDF over the corpus")
+    args = parser.parse_args()
+    if args.scoring != 'rules' and not scoring_available():
+        print("❌ --scoring bm25/tfidf needs numpy and scipy (pip install numpy scipy)")
+        sys.exit(1)
+
     print("Starting Bible Theme Tagger...")
-    print(f"Database: {DB_PATH}")
+    print(f"Database: {args.db}")
+    engine = load_rules(args.rules)
 
     # Connect to database
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(args.db)
     cursor = conn.cursor()
+    ensure_theme_tables(cursor)
+    has_clean_text = any(row[1] == 'clean_text' for row in cursor.execute("PRAGMA table_info(verses)"))
 
-    # Get verses to tag
-    query = """
-        SELECT id, reference, text
-        FROM verses
-        WHERE book IN ('Galatians','Ephesians','Philippians','Colossians')
-        AND (themes IS NULL OR LENGTH(themes) <= 2)
+    # Get verses to tag (anti-join against the junction unless re-tagging)
+    conditions, params = [], []
+    if args.books:
+        conditions.append(f"book IN ({', '.join('?' * len(args.books))})")
+        params.extend(args.books)
+    if not args.retag:
+        conditions.append("NOT EXISTS (SELECT 1 FROM verse_themes vt WHERE vt.verse_id = v.id)")
+    query = f"""
+        SELECT id, book, {'COALESCE(clean_text, text)' if has_clean_text else 'text'}
+        FROM verses v
+        {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+        ORDER BY id
     """
 
-    cursor.execute(query)
+    cursor.execute(query, params)
     verses = cursor.fetchall()
 
     print(f"Found {len(verses)} verses to tag")
 
-    # Process in batches of 50
-    batch_size = 50
-    total_updated = 0
-
-    for i in range(0, len(verses), batch_size):
-        batch = verses[i:i+batch_size]
-        print(f"\nProcessing batch {i//batch_size + 1} ({len(batch)} verses)...")
+    start = time.perf_counter()
+    if args.scoring != 'rules':
+        # Corpus statistics need every verse at once; the writes are still batched
+        scored = score_verses(engine, verses, args.scoring)
+        print(f"  Scored {len(scored)} verses ({args.scoring}) in {time.perf_counter() - start:.2f}s")
 
-        for verse_id, reference, text in batch:
-            # Analyze and assign themes
-            themes = analyze_verse(reference, text)
-            themes_json = json.dumps(themes)
-
-            # Update database
-            cursor.execute(
-                "UPDATE verses SET themes = ? WHERE id = ?",
-                (themes_json, verse_id)
-            )
-            total_updated += 1
+    total_updated = 0
+    for i in range(0, len(verses), BATCH_SIZE):
+        batch = verses[i:i + BATCH_SIZE]
 
-            if total_updated % 50 == 0:
-                print(f"  Updated {total_updated} verses...")
+        # Analyze and assign themes, then update the database in one pass
+        if args.scoring != 'rules':
+            assignments = scored[i:i + BATCH_SIZE]
+        else:
+            assignments = [(verse_id, engine.analyze(book, text)) for verse_id, book, text in batch]
+        set_verse_themes(cursor, assignments)
+        total_updated += len(assignments)
 
         # Commit after each batch
         conn.commit()
         print(f"  Batch committed ({total_updated} total)")
 
-    # Final commit
-    conn.commit()
+    elapsed = time.perf_counter() - start
 
     # Verify results
-    cursor.execute("""
-        SELECT COUNT(*)
-        FROM verses
-        WHERE book IN ('Galatians','Ephesians','Philippians','Colossians')
-        AND themes IS NOT NULL
-        AND LENGTH(themes) > 2
-    """
-    )
+    cursor.execute("SELECT COUNT(DISTINCT verse_id) FROM verse_themes")
     tagged_count = cursor.fetchone()[0]
 
     print(f"\n{'='*50}")
     print(f"COMPLETE!")
-    print(f"Total verses updated: {total_updated}")
+    print(f"Total verses updated: {total_updated} in {elapsed:.2f}s")
     print(f"Total verses with themes: {tagged_count}")
     print(f"{'='*50}")
 
@@ -160,8 +250,7 @@ def main():
     cursor.execute("""
         SELECT reference, themes
         FROM verses
-        WHERE book IN ('Galatians','Ephesians','Philippians','Colossians')
-        AND themes IS NOT NULL
+        WHERE themes IS NOT NULL AND themes != '[]'
         ORDER BY RANDOM()
         LIMIT 5
     """)
@@ -1,6 +1,10 @@
 -- Bible Database Transformation Script
 -- Transforms asset database schema to main database schema
 --
+-- NOTE: scripts/build_bible_verses_db.py now loads any number of translations
+-- straight into bible_verses (with composite version/language indexes), so
+-- this transform pass is only needed for the legacy per-translation dumps.
+--
 -- ASSET SCHEMA:
 --   translation, book, chapter, verse_number, clean_text, reference, themes
 --
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark transport compression for the shipped assets
+
+Measures every shipped asset group -- the Bible SQL dumps, the devotional
+batches and the reading plans -- under each codec:
+
+    gzip     levels 1, 6, 9                      (always available)
+    brotli   quality 5, 11                        (pip install brotli)
+    zstd     levels 3, 19                         (pip install zstandard)
+    zstd-dict levels 3, 19 with a dictionary trained per asset group
+
+and reports compressed size, compression time and decompression time
+(best of --repeat runs, every result round-trip checked). Codecs whose
+package is not installed are skipped with a note. The SQL dumps are
+measured uncompressed (the .sql.gz files are inflated first), since that
+is what a transport encoding would carry.
+
+zstd-dict is measured without train/test leakage: the group's files are
+split into --dict-folds folds and every file is compressed with a
+dictionary trained on the other folds only. The dictionary the app would
+ship (trained on the whole group) has to be downloaded once, so its
+size is added to the zstd-dict totals.
+
+The results file is JSON: one record per (asset, codec, level) plus
+per-group totals and the shipped dictionary sizes.
+
+Usage:
+    python3 benchmark_asset_compression.py
+    python3 benchmark_asset_compression.py --group devotionals --group reading_plans
+    python3 benchmark_asset_compression.py --codec gzip:9 --codec brotli:11 --out results.json
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import platform
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assets')
+ASSET_GROUPS = {
+    'sql': ['*_optimized.sql.gz'],
+    'devotionals': ['devotionals/*.json', 'devotionals/*/*.json'],
+    'reading_plans': ['reading_plans/*/*.json'],
+}
+DEFAULT_CODECS = ['gzip:1', 'gzip:6', 'gzip:9', 'brotli:5', 'brotli:11',
+                  'zstd:3', 'zstd:19', 'zstd-dict:3', 'zstd-dict:19']
+DEFAULT_DICT_SIZE = 32 * 1024
+# Cross-validation folds for zstd-dict: each file is measured with a dictionary that never saw it
+DEFAULT_DICT_FOLDS = 5
+DEFAULT_OUT_PATH = "compression_benchmark.json"
+
+
+def load_group(group):
+    """Return [(relative path, raw bytes)] for one asset group"""
+    assets = []
+    for pattern in ASSET_GROUPS[group]:
+        for path in sorted(glob.glob(os.path.join(ASSETS_DIR, pattern))):
+            with open(path, 'rb') as f:
+                data = f.read()
+            if path.endswith('.gz'):
+                data = gzip.decompress(data)
+            assets.append((os.path.relpath(path, ASSETS_DIR), data))
+    return assets
+
+
+def parse_codec(spec):
+    """argparse: NAME:LEVEL"""
+    name, _, level = spec.partition(':')
+    if name not in ('gzip', 'brotli', 'zstd', 'zstd-dict') or not level.isdigit():
+        raise argparse.ArgumentTypeError(f"Codec must be gzip|brotli|zstd|zstd-dict:LEVEL, got {spec!r}")
+    return name, int(level)
+
+
+def codec_available(name):
+    if name == 'brotli':
+        return brotli is not None
+    if name in ('zstd', 'zstd-dict'):
+        return zstandard is not None
+    return True
+
+
+def codec_functions(name, level, dictionary=None):
+    """Return (compress, decompress) callables for one codec setting"""
+    if name == 'gzip':
+        return (lambda data: gzip.compress(data, compresslevel=level, mtime=0)), gzip.decompress
+    if name == 'brotli':
+        return (lambda data: brotli.compress(data, quality=level)), brotli.decompress
+    compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+    decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+    return compressor.compress, decompressor.decompress
+
+
+def train_dictionary(samples, size):
+    """Train a zstd dictionary on raw samples, or None if it cannot be trained"""
+    try:
+        return zstandard.train_dictionary(size, samples)
+    except zstandard.ZstdError as e:
+        print(f"  ⚠️  Could not train a dictionary ({e}); skipping zstd-dict")
+        return None
+
+
+def held_out_dictionaries(assets, size, folds=DEFAULT_DICT_FOLDS):
+    """
+    One dictionary per asset, trained without it: asset i is in fold
+    i % folds and uses the dictionary trained on every other fold.
+    Returns None when the group is too small or a fold cannot be trained.
+    """
+    folds = min(folds, len(assets))
+    if folds < 2:
+        print("  ⚠️  A held-out dictionary needs at least 2 files; skipping zstd-dict")
+        return None
+    fold_dictionaries = []
+    for fold in range(folds):
+        dictionary = train_dictionary([data for index, (_, data) in enumerate(assets) if index % folds != fold],
+                                      size)
+        if dictionary is None:
+            return None
+        fold_dictionaries.append(dictionary)
+    return [fold_dictionaries[index % folds] for index in range(len(assets))]
+
+
+def best_time(function, data, repeat):
+    """Return (result, fastest wall time) over repeat runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def measure_asset(name, data, codec, level, dictionary, repeat):
+    compress, decompress = codec_functions(codec, level, dictionary)
+    packed, compress_seconds = best_time(compress, data, repeat)
+    unpacked, decompress_seconds = best_time(decompress, packed, repeat)
+    if unpacked != data:
+        raise RuntimeError(f"{codec}:{level} did not round-trip {name}")
+    return {
+        'asset': name,
+        'codec': codec,
+        'level': level,
+        'raw_bytes': len(data),
+        'bytes': len(packed),
+        'ratio': round(len(packed) / len(data), 4) if data else 0,
+        'compress_seconds': round(compress_seconds, 6),
+        'decompress_seconds': round(decompress_seconds, 6),
+    }
+
+
+def benchmark(groups, codecs, repeat=3, dict_size=DEFAULT_DICT_SIZE, dict_folds=DEFAULT_DICT_FOLDS):
+    """Run every codec over every group. Returns the results document."""
+    results = {
+        'generated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'dict_folds': dict_folds,
+        'codecs': {
+            'gzip': 'zlib ' + zlib.ZLIB_RUNTIME_VERSION,
+            'brotli': getattr(brotli, '__version__', 'installed') if brotli else None,
+            'zstd': zstandard.__version__ if zstandard else None,
+        },
+        'dictionaries': {},
+        'assets': [],
+        'totals': [],
+    }
+
+    for group in groups:
+        assets = load_group(group)
+        if not assets:
+            print(f"⚠️  No {group} assets found, skipping")
+            continue
+        raw_total = sum(len(data) for _, data in assets)
+        print(f"\n📦 {group}: {len(assets)} files, {raw_total / 1024:,.0f} KB raw")
+
+        dictionaries = None
+        if any(codec == 'zstd-dict' for codec, _ in codecs) and zstandard:
+            dictionaries = held_out_dictionaries(assets, dict_size, dict_folds)
+            shipped = dictionaries and train_dictionary([data for _, data in assets], dict_size)
+            if shipped:
+                results['dictionaries'][group] = len(shipped.as_bytes())
+            else:
+                dictionaries = None
+
+        print(f"  {'codec':<14} {'KB':>10} {'ratio':>7} {'compress s':>11} {'decompress s':>13}")
+        for codec, level in codecs:
+            if codec == 'zstd-dict' and dictionaries is None:
+                continue
+            records = [
+                measure_asset(name, data, codec, level, dictionaries[index] if codec == 'zstd-dict' else None,
+                              repeat)
+                for index, (name, data) in enumerate(assets)
+            ]
+            for record in records:
+                record['group'] = group
+            results['assets'].extend(records)
+
+            # The app downloads the dictionary once on top of the compressed files
+            dictionary_bytes = results['dictionaries'][group] if codec == 'zstd-dict' else 0
+            total = {
+                'group': group,
+                'codec': codec,
+                'level': level,
+                'files': len(records),
+                'raw_bytes': raw_total,
+                'dictionary_bytes': dictionary_bytes,
+                'bytes': sum(r['bytes'] for r in records) + dictionary_bytes,
+                'compress_seconds': round(sum(r['compress_seconds'] for r in records), 6),
+                'decompress_seconds': round(sum(r['decompress_seconds'] for r in records), 6),
+            }
+            total['ratio'] = round(total['bytes'] / raw_total, 4)
+            results['totals'].append(total)
+            print(f"  {f'{codec}:{level}':<14} {total['bytes'] / 1024:>10,.1f} {total['ratio']:>7.3f} "
+                  f"{total['compress_seconds']:>11.3f} {total['decompress_seconds']:>13.3f}")
+        if group in results['dictionaries']:
+            print(f"  (zstd-dict: {dict_folds}-fold held-out dictionaries; totals include the "
+                  f"{results['dictionaries'][group] / 1024:.0f} KB shipped dictionary)")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gzip, brotli and zstd on the shipped assets")
+    parser.add_argument('--group', action='append', choices=sorted(ASSET_GROUPS), dest='groups',
+                        help="Asset group to measure (repeatable, default: all)")
+    parser.add_argument('--codec', action='append', type=parse_codec, dest='codecs', metavar='NAME:LEVEL',
+                        help="Codec setting, e.g. gzip:9, brotli:11, zstd:19, zstd-dict:3 "
+                             "(repeatable, default: a standard set)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement; the fastest is kept")
+    parser.add_argument('--dict-size', type=int, default=DEFAULT_DICT_SIZE, help="zstd dictionary size in bytes")
+    parser.add_argument('--dict-folds', type=int, default=DEFAULT_DICT_FOLDS,
+                        help="Folds for the held-out zstd-dict measurement")
+    parser.add_argument('--out', default=DEFAULT_OUT_PATH, help="JSON results file")
+    args = parser.parse_args()
+
+    codecs = args.codecs or [parse_codec(spec) for spec in DEFAULT_CODECS]
+    for name in sorted({name for name, _ in codecs}):
+        if not codec_available(name):
+            package = 'brotli' if name == 'brotli' else 'zstandard'
+            print(f"⚠️  {name} skipped: {package} is not installed (pip install {package})")
+    codecs = [(name, level) for name, level in codecs if codec_available(name)]
+    if not codecs:
+        print("❌ No codecs available")
+        sys.exit(1)
+
+    print("⏱️  Asset Compression Benchmark")
+    print("=" * 60)
+    results = benchmark(args.groups or list(ASSET_GROUPS), codecs, args.repeat, args.dict_size,
+                        args.dict_folds)
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+    print("=" * 60)
+    print(f"📍 Results: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
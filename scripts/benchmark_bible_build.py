@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark the WEB Bible database builder
+Reports peak memory and verses/sec for create_web_bible_db.py against a
+local fixture zip, so builds can be checked on small CI boxes offline.
+
+Each measurement runs in a fresh child process so peak RSS is per run.
+
+Usage:
+    python3 benchmark_bible_build.py                      # synthetic fixtures, scales 1 2 4
+    python3 benchmark_bible_build.py --scale 1 8
+    python3 benchmark_bible_build.py --fixture engwebp_usfm.zip
+    python3 benchmark_bible_build.py --fast               # bulk-load profile
+    python3 benchmark_bible_build.py --fast --workers 4   # process-pool parsing
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BOOKS_JSON = os.path.join(SCRIPT_DIR, '..', 'assets', 'data', 'bible_books.json')
+
+CHAPTERS_PER_SCALE = 20
+VERSES_PER_CHAPTER = 24
+WORDS = ["In", "the", "beginning", "God", "created", "heavens", "and", "earth",
+         "was", "formless", "empty", "darkness", "on", "surface", "of", "deep"]
+
+
+def fixture_verse(book_id, chapter, verse):
+    """Return the USFM lines for one synthetic verse with WEB-style markup"""
+    words = [
+        f'\\w {WORDS[(book_id + chapter + verse + i) % len(WORDS)]}|strong="H{1000 + i * 7 + verse}"\\w*'
+        for i in range(18)
+    ]
+    lines = [f"\\v {verse} " + ' '.join(words[:12])]
+    if verse % 10 == 0:
+        lines[0] += f'\\f + \\fr {chapter}:{verse} \\ft A translator note for this verse.\\f*'
+    if verse % 7 == 0:
+        # Poetry continuation line, as found throughout Psalms and the prophets
+        lines.append("\\q2 " + ' '.join(words[12:]))
+    else:
+        lines[0] += ' ' + ' '.join(words[12:])
+    return lines
+
+
+def write_fixture_zip(path, scale=1):
+    """Write a synthetic 66-book USFM bundle. Returns the number of verses written."""
+    with open(BOOKS_JSON, encoding='utf-8') as f:
+        books = json.load(f)['books']
+
+    verse_count = 0
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        for book in books:
+            code = book['englishName'][:3].upper().replace(' ', '')
+            lines = [f"\\id {code} Synthetic benchmark fixture", f"\\h {book['englishName']}"]
+            for chapter in range(1, CHAPTERS_PER_SCALE * scale + 1):
+                lines.extend([f"\\c {chapter}", "\\p"])
+                for verse in range(1, VERSES_PER_CHAPTER + 1):
+                    lines.extend(fixture_verse(book['id'], chapter, verse))
+                    verse_count += 1
+            z.writestr(f"{book['id']:02d}-{code}fixture.usfm", '\n'.join(lines) + '\n')
+    return verse_count
+
+
+def run_child(fixture, db_path, fast=False, workers=1):
+    """Build the database once and print a JSON measurement line"""
+    sys.path.insert(0, SCRIPT_DIR)
+    import create_web_bible_db
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            verses = create_web_bible_db.build_database(fixture, db_path, fast=fast, workers=workers)
+        finally:
+            sys.stdout = stdout
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+
+    print(json.dumps({
+        'verses': verses,
+        'seconds': elapsed,
+        'traced_peak_bytes': traced_peak,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                         * (1 if sys.platform == 'darwin' else 1024),
+    }))
+
+
+def measure(fixture, workdir, fast=False, workers=1):
+    """Run one build in a child process and return its measurements"""
+    db_path = os.path.join(workdir, 'bench.db')
+    if os.path.exists(db_path):
+        os.unlink(db_path)
+
+    command = [sys.executable, os.path.abspath(__file__), '--child', '--fixture', fixture, '--db', db_path]
+    if fast:
+        command.append('--fast')
+    command.extend(['--workers', str(workers)])
+    result = subprocess.run(command, check=True, capture_output=True, text=True)
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats['fixture_bytes'] = os.path.getsize(fixture)
+    return stats
+
+
+def print_row(label, stats):
+    mb = 1024 * 1024
+    rate = stats['verses'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"{label:<12} {stats['fixture_bytes'] / mb:>9.1f} {stats['verses']:>9,} "
+          f"{stats['seconds']:>8.2f} {rate:>11,.0f} "
+          f"{stats['traced_peak_bytes'] / mb:>10.1f} {stats['max_rss_bytes'] / mb:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark create_web_bible_db.py")
+    parser.add_argument('--fixture', help="USFM zip to build from (default: synthetic fixtures)")
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 2, 4],
+                        help="Synthetic fixture sizes, in multiples of ~31k verses")
+    parser.add_argument('--fast', action='store_true', help="Use the bulk-load build profile")
+    parser.add_argument('--workers', type=int, default=1, help="Parse books in N processes")
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.fixture, args.db, args.fast, args.workers)
+        return
+
+    print("⏱️  WEB Bible Builder Benchmark")
+    print("=" * 76)
+    print(f"{'fixture':<12} {'zip MB':>9} {'verses':>9} {'seconds':>8} {'verses/sec':>11} "
+          f"{'py peak MB':>10} {'RSS MB':>9}")
+    print("-" * 76)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.fixture:
+            print_row(os.path.basename(args.fixture)[:12], measure(args.fixture, workdir, args.fast, args.workers))
+        else:
+            for scale in args.scale:
+                fixture = os.path.join(workdir, f'fixture_x{scale}.zip')
+                write_fixture_zip(fixture, scale)
+                print_row(f"synthetic x{scale}", measure(fixture, workdir, args.fast, args.workers))
+                os.unlink(fixture)
+
+    print("=" * 76)
+
+
+if __name__ == "__main__":
+    main()
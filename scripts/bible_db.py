@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite helpers for the Bible database builders
+
+Bulk-load "fast build" profile used by create_web_bible_db.py and
+download_web_bible.py:
+    1. journal_mode=OFF / synchronous=OFF while loading
+    2. executemany in fixed-size batches
+    3. indexes (and FTS) created only after the data is in
+    4. ANALYZE, PRAGMA optimize and VACUUM at the end
+plus a per-phase timer so each build prints where its time went.
+
+build_bible_verses_db.py writes the app's bible_verses schema directly with
+the shared create_bible_verses_schema/create_bible_verses_indexes.
+
+Incremental builds record a build_manifest row per source book (content
+hash + parser version); only books whose row no longer matches are rebuilt.
+
+Themes live in a `themes` dictionary and an indexed
+verse_themes(verse_id, theme_id, rank) junction maintained by the builders
+and taggers; the JSON `themes` column is rewritten from it as a derived
+export for older readers.
+
+clean_bible_verses.py --tables fills verse_words (word, Strong's number,
+offset) and verse_footnotes from the shared verse markup parser;
+build_strongs_index.py inverts the Strong's numbers into
+strongs_occurrences(strong_id, verse_id, position) plus per-lemma counts.
+"""
+
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+# Rows handed to a single executemany call
+BATCH_SIZE = 5000
+
+
+class PhaseTimer:
+    """Collect wall-clock time per named build phase"""
+
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        total = sum(seconds for _, seconds in self.phases)
+        print("\n⏱️  Timing breakdown:")
+        for name, seconds in self.phases:
+            share = 100 * seconds / total if total else 0
+            print(f"   - {name:<24} {seconds:8.2f}s  {share:5.1f}%")
+        print(f"   - {'total':<24} {total:8.2f}s")
+
+
+def begin_bulk_load(conn):
+    """Trade durability for speed while the database is being (re)built"""
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-65536')  # 64 MB
+
+
+def end_bulk_load(conn):
+    """Restore default journaling once loading is done"""
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.execute('PRAGMA synchronous=FULL')
+
+
+def insert_batches(cursor, sql, rows, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Insert an iterable of rows with one executemany per batch.
+
+    Only one batch is materialized at a time, so `rows` can be a generator
+    over any number of verses. Returns the number of rows inserted.
+    """
+    rows = iter(rows)
+    inserted = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return inserted
+        cursor.executemany(sql, batch)
+        inserted += len(batch)
+        if on_batch:
+            on_batch(inserted)
+
+
+def drop_indexes(cursor, table):
+    """Drop every explicit index on `table` so it can be bulk-loaded. Returns their SQL."""
+    cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    )
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+    return [sql for _, sql in indexes]
+
+
+def finalize_database(conn):
+    """Refresh planner statistics and compact the file"""
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.execute('PRAGMA optimize')
+    conn.commit()
+    conn.execute('VACUUM')
+
+
+def ensure_manifest(cursor):
+    """Create the per-book build manifest table if missing"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS build_manifest (
+            source_file TEXT PRIMARY KEY,
+            book TEXT,
+            source_sha256 TEXT NOT NULL,
+            parser_version TEXT NOT NULL,
+            verse_count INTEGER NOT NULL,
+            built_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def read_manifest(cursor):
+    """Return {source_file: (book, source_sha256, parser_version)}, empty if no manifest yet"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'build_manifest'")
+    if cursor.fetchone() is None:
+        return {}
+    cursor.execute('SELECT source_file, book, source_sha256, parser_version FROM build_manifest')
+    return {source_file: (book, sha, version) for source_file, book, sha, version in cursor.fetchall()}
+
+
+def record_manifest(cursor, entries):
+    """Upsert (source_file, book, source_sha256, parser_version, verse_count) rows"""
+    cursor.executemany('''
+        INSERT OR REPLACE INTO build_manifest
+            (source_file, book, source_sha256, parser_version, verse_count, built_at)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ''', entries)
+
+
+def sha256_stream(stream, chunk_size=1024 * 1024):
+    """Hex SHA-256 of a binary stream, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def create_bible_verses_schema(cursor):
+    """Create the app's bible_verses table (same columns as the Dart DatabaseHelper)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bible_verses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            version TEXT NOT NULL,
+            book TEXT NOT NULL,
+            chapter INTEGER NOT NULL,
+            verse INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            language TEXT NOT NULL,
+            themes TEXT,
+            category TEXT,
+            reference TEXT
+        )
+    ''')
+
+
+def create_bible_verses_indexes(cursor):
+    """
+    Composite indexes for cross-translation lookups.
+
+    (version, book, chapter, verse) answers verse/chapter reads for one
+    translation; (language, version, book, chapter, verse) covers the app's
+    `WHERE version = ? AND language = ?` queries (DISTINCT book, MAX(chapter))
+    without touching the table.
+    """
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bible_verses_version_ref
+        ON bible_verses(version, book, chapter, verse)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bible_verses_language_ref
+        ON bible_verses(language, version, book, chapter, verse)
+    ''')
+
+
+def create_theme_schema(cursor):
+    """
+    Create the themes dictionary and the verse_themes junction.
+
+    verse_id refers to the database's verse table (verses or bible_verses).
+    The primary key answers "themes of this verse" and the untagged
+    anti-join; idx_verse_themes_theme makes "verses for anxiety" an index
+    range lookup in rank order.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS themes (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS verse_themes (
+            verse_id INTEGER NOT NULL,
+            theme_id INTEGER NOT NULL REFERENCES themes(id),
+            rank INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (verse_id, theme_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_verse_themes_theme
+        ON verse_themes(theme_id, rank, verse_id)
+    ''')
+
+
+def sync_verse_themes(cursor, verses_table='verses'):
+    """Rebuild the junction from the JSON themes column. Returns the number of links."""
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO themes (name)
+        SELECT DISTINCT j.value FROM {verses_table} v, json_each(v.themes) j
+        WHERE json_valid(v.themes) AND json_type(v.themes) = 'array'
+    ''')
+    cursor.execute('DELETE FROM verse_themes')
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO verse_themes (verse_id, theme_id, rank)
+        SELECT v.id, t.id, j.key FROM {verses_table} v, json_each(v.themes) j
+        JOIN themes t ON t.name = j.value
+        WHERE json_valid(v.themes) AND json_type(v.themes) = 'array'
+    ''')
+    return cursor.execute('SELECT COUNT(*) FROM verse_themes').fetchone()[0]
+
+
+def ensure_theme_tables(cursor, verses_table='verses'):
+    """Create the theme tables, backfilling them from the JSON column on first use"""
+    create_theme_schema(cursor)
+    if cursor.execute('SELECT 1 FROM verse_themes LIMIT 1').fetchone() is None:
+        sync_verse_themes(cursor, verses_table)
+
+
+def theme_ids(cursor, names):
+    """Return {name: id}, adding names missing from the themes dictionary"""
+    names = sorted(set(names))
+    cursor.executemany('INSERT OR IGNORE INTO themes (name) VALUES (?)', [(name,) for name in names])
+    ids = {}
+    for start in range(0, len(names), 500):
+        chunk = names[start:start + 500]
+        cursor.execute(f"SELECT name, id FROM themes WHERE name IN ({', '.join('?' * len(chunk))})", chunk)
+        ids.update(cursor.fetchall())
+    return ids
+
+
+def set_verse_themes(cursor, assignments, verses_table='verses'):
+    """
+    Replace the themes of each (verse_id, [theme, ...]) in rank order.
+
+    Writes the junction rows and the derived JSON column together.
+    """
+    assignments = [(verse_id, list(dict.fromkeys(names))) for verse_id, names in assignments]
+    ids = theme_ids(cursor, [name for _, names in assignments for name in names])
+    cursor.executemany('DELETE FROM verse_themes WHERE verse_id = ?',
+                       [(verse_id,) for verse_id, _ in assignments])
+    cursor.executemany(
+        'INSERT INTO verse_themes (verse_id, theme_id, rank) VALUES (?, ?, ?)',
+        [(verse_id, ids[name], rank) for verse_id, names in assignments for rank, name in enumerate(names)]
+    )
+    cursor.executemany(
+        f'UPDATE {verses_table} SET themes = ? WHERE id = ?',
+        [(json.dumps(names), verse_id) for verse_id, names in assignments]
+    )
+
+
+def remove_verse_themes(cursor, verses_table='verses'):
+    """Drop junction rows whose verse no longer exists"""
+    cursor.execute(f'''
+        DELETE FROM verse_themes
+        WHERE verse_id NOT IN (SELECT id FROM {verses_table})
+    ''')
+
+
+def create_markup_schema(cursor):
+    """
+    Side tables filled by the verse markup parser (verse_markup.py).
+
+    verse_words holds every word of a verse in order, with its Strong's
+    number (NULL when untagged) and character offset into clean_text;
+    verse_footnotes holds the footnotes split out of the verse text and
+    the clean_text offset they attach to.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS verse_words (
+            verse_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            word TEXT NOT NULL,
+            strong_id TEXT,
+            char_offset INTEGER NOT NULL,
+            PRIMARY KEY (verse_id, position)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS verse_footnotes (
+            verse_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            reference TEXT,
+            text TEXT NOT NULL,
+            char_offset INTEGER NOT NULL,
+            PRIMARY KEY (verse_id, position)
+        ) WITHOUT ROWID
+    ''')
+
+
+def create_strongs_schema(cursor):
+    """
+    Strong's concordance: every tagged word, clustered by Strong's number,
+    so "every verse using G26" is a primary-key range read. strongs_lemmas
+    holds the per-lemma counts and the most common English rendering.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS strongs_occurrences (
+            strong_id TEXT NOT NULL,
+            verse_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (strong_id, verse_id, position)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS strongs_lemmas (
+            strong_id TEXT PRIMARY KEY,
+            occurrences INTEGER NOT NULL,
+            verses INTEGER NOT NULL,
+            common_word TEXT
+        ) WITHOUT ROWID
+    ''')
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Streaming Bible source readers
+
+Every reader takes a local file path and yields SourceVerse tuples
+(book, chapter, verse, text) in source order, holding at most one verse
+(JSON: one array element, XML: one open element) in memory at a time:
+
+    scrollmapper   {"verses": [{"book_name", "chapter", "verse", "text"}, ...]}
+                   or {"books": [{"name", "chapters": [{"chapter", "verses": [...]}]}]}
+    godlytalias    {"resultset": {"row": [{"field": [book, chapter, verse, text]}, ...]}}
+    usfm           a .usfm file or a zip of them (usfm_parser.parse_usfm)
+    osis           OSIS XML, container or milestone <verse> elements (iterparse)
+    usx            USX 2/3 XML, a file or a zip of them (iterparse)
+    sqlite         a legacy `verses` database (create_web_bible_db.py output)
+    sql            a legacy `verses` SQL dump, .sql or .sql.gz (assets/*_optimized.sql.gz)
+
+The legacy readers prefer the cleaned text columns (spanish_text,
+spanish_text_original, clean_text) over `text` and carry `themes` along.
+
+Book names are normalized to the English names in assets/data/bible_books.json.
+
+Usage:
+    from bible_sources import read_source
+
+    for book, chapter, verse, text in read_source('en-web.json'):
+        ...
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+
+from usfm_parser import ATTRIBUTES_RE, parse_usfm
+
+BOOKS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assets', 'data', 'bible_books.json')
+
+# (USFM/USX code, OSIS id) in canonical order, matching bible_books.json ids 1-66
+BOOK_CODES = [
+    ('GEN', 'Gen'), ('EXO', 'Exod'), ('LEV', 'Lev'), ('NUM', 'Num'), ('DEU', 'Deut'),
+    ('JOS', 'Josh'), ('JDG', 'Judg'), ('RUT', 'Ruth'), ('1SA', '1Sam'), ('2SA', '2Sam'),
+    ('1KI', '1Kgs'), ('2KI', '2Kgs'), ('1CH', '1Chr'), ('2CH', '2Chr'), ('EZR', 'Ezra'),
+    ('NEH', 'Neh'), ('EST', 'Esth'), ('JOB', 'Job'), ('PSA', 'Ps'), ('PRO', 'Prov'),
+    ('ECC', 'Eccl'), ('SNG', 'Song'), ('ISA', 'Isa'), ('JER', 'Jer'), ('LAM', 'Lam'),
+    ('EZK', 'Ezek'), ('DAN', 'Dan'), ('HOS', 'Hos'), ('JOL', 'Joel'), ('AMO', 'Amos'),
+    ('OBA', 'Obad'), ('JON', 'Jonah'), ('MIC', 'Mic'), ('NAM', 'Nah'), ('HAB', 'Hab'),
+    ('ZEP', 'Zeph'), ('HAG', 'Hag'), ('ZEC', 'Zech'), ('MAL', 'Mal'), ('MAT', 'Matt'),
+    ('MRK', 'Mark'), ('LUK', 'Luke'), ('JHN', 'John'), ('ACT', 'Acts'), ('ROM', 'Rom'),
+    ('1CO', '1Cor'), ('2CO', '2Cor'), ('GAL', 'Gal'), ('EPH', 'Eph'), ('PHP', 'Phil'),
+    ('COL', 'Col'), ('1TH', '1Thess'), ('2TH', '2Thess'), ('1TI', '1Tim'), ('2TI', '2Tim'),
+    ('TIT', 'Titus'), ('PHM', 'Phlm'), ('HEB', 'Heb'), ('JAS', 'Jas'), ('1PE', '1Pet'),
+    ('2PE', '2Pet'), ('1JN', '1John'), ('2JN', '2John'), ('3JN', '3John'), ('JUD', 'Jude'),
+    ('REV', 'Rev'),
+]
+
+# Bytes read per chunk by the streaming JSON reader
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class SourceVerse(NamedTuple):
+    book: str
+    chapter: int
+    verse: int
+    text: str
+    themes: Optional[str] = None
+
+
+class SourceFormatError(ValueError):
+    """Raised when a source does not match the layout its reader expects"""
+
+
+def _load_book_names():
+    with open(BOOKS_JSON, encoding='utf-8') as f:
+        books = sorted(json.load(f)['books'], key=lambda b: b['id'])
+    by_number = {b['id']: b['englishName'] for b in books}
+    by_code = {}
+    for number, (usfm_code, osis_id) in enumerate(BOOK_CODES, start=1):
+        by_code[usfm_code] = by_code[osis_id] = by_number[number]
+    return by_number, by_code
+
+
+BOOK_NAMES_BY_NUMBER, BOOK_NAMES_BY_CODE = _load_book_names()
+
+
+def _load_book_ids():
+    with open(BOOKS_JSON, encoding='utf-8') as f:
+        books = json.load(f)['books']
+    ids = {}
+    for book in books:
+        ids[book['spanishName']] = book['id']
+        ids[book['englishName']] = book['id']
+    return ids
+
+
+# English and Spanish book names -> bible_books.json id
+BOOK_IDS_BY_NAME = _load_book_ids()
+
+
+def book_name(value):
+    """Normalize a book number, USFM/OSIS code or name to its English name"""
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        return BOOK_NAMES_BY_NUMBER.get(int(value), str(value))
+    return BOOK_NAMES_BY_CODE.get(value, BOOK_NAMES_BY_CODE.get(str(value).upper(), value))
+
+
+def plain_text(text):
+    """Drop word attributes (|strong="H1234") and collapse whitespace"""
+    return ' '.join(''.join(ATTRIBUTES_RE.split(text)).split())
+
+
+# --- JSON --------------------------------------------------------------------
+
+def iter_json_array(stream, keys, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of the first array stored under one of `keys`.
+
+    Reads `stream` (text) in chunks and decodes one element at a time with
+    raw_decode, so only the current element is ever held in memory.
+    Returns the key that matched via StopIteration.value.
+    """
+    opener = re.compile(r'"(%s)"\s*:\s*\[' % '|'.join(re.escape(k) for k in keys))
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = stream.read(chunk_size)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+    match = opener.search(buffer)
+    while match is None:
+        if eof:
+            raise SourceFormatError(f"No {' or '.join(keys)} array found")
+        # Keep a tail in case the key is split across chunks
+        buffer = buffer[-64:]
+        fill()
+        match = opener.search(buffer)
+    key = match.group(1)
+    buffer = buffer[match.end():]
+
+    while True:
+        position = 0
+        while True:
+            stripped = buffer.lstrip(' \t\r\n,')
+            position = len(buffer) - len(stripped)
+            if position < len(buffer) or eof:
+                break
+            fill()
+        buffer = buffer[position:]
+        if buffer.startswith(']'):
+            return key
+        if not buffer and eof:
+            raise SourceFormatError(f"Unterminated {key} array")
+        try:
+            element, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        buffer = buffer[end:]
+        yield element
+
+
+def _open_text(path):
+    return open(path, encoding='utf-8-sig')
+
+
+def read_scrollmapper(path) -> Iterator[SourceVerse]:
+    """scrollmapper/bible_databases JSON, flat "verses" or nested "books" layout"""
+    with _open_text(path) as f:
+        for item in iter_json_array(f, ('verses', 'books')):
+            if 'chapters' in item:
+                name = book_name(item.get('name') or item.get('book'))
+                for chapter in item['chapters']:
+                    for verse in chapter['verses']:
+                        yield SourceVerse(name, int(chapter['chapter']), int(verse['verse']), verse['text'])
+            else:
+                name = book_name(item.get('book_name') or item['book'])
+                yield SourceVerse(name, int(item['chapter']), int(item['verse']), item['text'])
+
+
+def read_godlytalias(path) -> Iterator[SourceVerse]:
+    """godlytalias/Bible-Database JSON: resultset.row[].field = [book, chapter, verse, text]"""
+    with _open_text(path) as f:
+        for row in iter_json_array(f, ('row',)):
+            fields = [field.get('value') if isinstance(field, dict) else field for field in row['field']]
+            if len(fields) < 4:
+                raise SourceFormatError(f"Expected 4 fields per row, got {fields!r}")
+            # Some exports prefix a row id: [id, book, chapter, verse, text]
+            book, chapter, verse, text = fields[-4:]
+            yield SourceVerse(book_name(book), int(chapter), int(verse), text)
+
+
+# --- USFM --------------------------------------------------------------------
+
+def _iter_members(path, suffixes):
+    """Yield text streams for `path` itself or, for a zip, each member with a matching suffix"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as z:
+            for name in sorted(n for n in z.namelist() if n.lower().endswith(suffixes)):
+                with z.open(name) as raw:
+                    yield name, raw
+    else:
+        with open(path, 'rb') as raw:
+            yield os.path.basename(path), raw
+
+
+def read_usfm(path) -> Iterator[SourceVerse]:
+    """USFM file or zip of USFM files; text keeps word attributes (word|strong="H1234")"""
+    for name, raw in _iter_members(path, ('.usfm', '.sfm')):
+        lines = io.TextIOWrapper(raw, encoding='utf-8-sig')
+        for record in parse_usfm(lines, os.path.splitext(name)[0]):
+            yield SourceVerse(BOOK_NAMES_BY_CODE.get(record.book_code, record.book),
+                              record.chapter, record.verse, record.text)
+
+
+# --- XML (OSIS / USX) --------------------------------------------------------
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+class _XmlVerseCollector:
+    """
+    Accumulate verse text from iterparse events.
+
+    An element's text is only complete once the next event arrives, and its
+    tail once the event after its end arrives, so each event first flushes the
+    previous element's pending text/tail and then updates the state. Finished
+    elements are detached from their parent to keep memory constant.
+    """
+
+    def __init__(self):
+        self.pending = None          # ('text' | 'tail', element)
+        self.skip_depth = 0          # >0 inside notes, titles and headings
+        self.parts = None            # text of the open verse, or None
+        self.stack = []
+
+    def flush(self):
+        if self.pending is None:
+            return
+        kind, elem = self.pending
+        self.pending = None
+        value = elem.text if kind == 'text' else elem.tail
+        if value and self.parts is not None and not self.skip_depth:
+            self.parts.append(value)
+        if kind == 'tail':
+            elem.clear()
+            if self.stack:
+                self.stack[-1].remove(elem)
+
+    def start(self, elem, skipped):
+        self.flush()
+        if skipped:
+            self.skip_depth += 1
+        self.stack.append(elem)
+        self.pending = ('text', elem)
+
+    def end(self, elem, skipped, block=False):
+        self.flush()
+        if block and self.parts is not None and not self.skip_depth:
+            # Paragraph and poetry-line boundaries separate words
+            self.parts.append(' ')
+        self.stack.pop()
+        if skipped:
+            self.skip_depth -= 1
+        self.pending = ('tail', elem)
+
+    def begin_verse(self):
+        self.parts = []
+
+    def end_verse(self):
+        text = WHITESPACE_RE.sub(' ', ''.join(self.parts or ())).strip()
+        self.parts = None
+        return text
+
+
+# OSIS elements whose content is not verse text
+OSIS_SKIPPED = frozenset({'note', 'title', 'rdg', 'reference', 'header'})
+# OSIS/USX block elements; their boundaries become spaces
+BLOCK_TAGS = frozenset({'p', 'l', 'lg', 'div', 'chapter', 'para', 'table', 'row', 'cell'})
+
+
+def read_osis(path) -> Iterator[SourceVerse]:
+    """OSIS XML with <verse osisID="Gen.1.1">…</verse> or sID/eID milestones"""
+    collector = _XmlVerseCollector()
+    current = None
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        tag = _local(elem.tag)
+        skipped = tag in OSIS_SKIPPED
+        if event == 'start':
+            collector.start(elem, skipped)
+            if tag == 'verse' and not elem.get('eID'):
+                current = elem.get('osisID') or elem.get('sID')
+                collector.begin_verse()
+            continue
+
+        is_container_end = tag == 'verse' and not elem.get('sID') and not elem.get('eID')
+        if tag == 'verse' and elem.get('eID'):
+            collector.flush()
+            current = current or elem.get('eID')
+            yield _osis_verse(current, collector.end_verse())
+            current = None
+            collector.end(elem, skipped)
+        elif is_container_end:
+            collector.flush()
+            yield _osis_verse(current, collector.end_verse())
+            current = None
+            collector.end(elem, skipped)
+        else:
+            collector.end(elem, skipped, tag in BLOCK_TAGS)
+
+
+def _osis_verse(osis_id, text):
+    if not osis_id:
+        raise SourceFormatError("OSIS <verse> without an osisID/sID")
+    # Spanning verses ("Gen.1.1 Gen.1.2") are stored under the first id
+    book, chapter, verse = osis_id.split()[0].split('.')[:3]
+    return SourceVerse(book_name(book), int(chapter), int(verse), text)
+
+
+# USX paragraph styles whose content is not verse text
+USX_SKIPPED_PARA = re.compile(
+    r'(?:h|toc\d*|toca\d*|rem|mt\d*|mte\d*|ms\d*|mr|s\d*|sr|r|d|sp|cl|cd|imt\d*|is\d*|ip|ipi|im|io\d*|iot)$'
+)
+
+
+def _iter_usx(stream) -> Iterator[SourceVerse]:
+    collector = _XmlVerseCollector()
+    book = chapter = verse = None
+
+    def finish():
+        nonlocal verse
+        if verse is not None:
+            collector.flush()
+            text = collector.end_verse()
+            yield SourceVerse(book_name(book), chapter, verse, text)
+            verse = None
+
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        tag = _local(elem.tag)
+        skipped = (tag in ('note', 'book', 'figure')
+                   or (tag == 'para' and USX_SKIPPED_PARA.match(elem.get('style', '')) is not None))
+        if event == 'start':
+            if tag == 'book':
+                book = elem.get('code')
+            elif tag == 'chapter' and elem.get('number'):
+                yield from finish()
+                chapter = int(elem.get('number'))
+            elif tag == 'verse' and elem.get('number'):
+                yield from finish()
+                collector.start(elem, skipped)
+                verse = int(re.match(r'\d+', elem.get('number')).group())
+                collector.begin_verse()
+                continue
+            elif tag == 'verse' and elem.get('eid'):
+                yield from finish()
+            collector.start(elem, skipped)
+        else:
+            collector.end(elem, skipped, tag in BLOCK_TAGS)
+    yield from finish()
+
+
+def read_usx(path) -> Iterator[SourceVerse]:
+    """USX 2/3 XML file or zip of them; verses end at eid milestones or the next verse/chapter"""
+    for _, raw in _iter_members(path, ('.usx', '.xml')):
+        yield from _iter_usx(raw)
+
+
+# --- Legacy SQLite database / SQL dump ----------------------------------------
+
+# Text columns of the legacy `verses` table, best first
+LEGACY_TEXT_COLUMNS = ('spanish_text', 'spanish_text_original', 'clean_text', 'text')
+
+
+def read_sqlite(path, text_columns=LEGACY_TEXT_COLUMNS) -> Iterator[SourceVerse]:
+    """Legacy `verses` table: (book, chapter, verse_number, text, ..., themes)"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(verses)')}
+        if not columns:
+            raise SourceFormatError(f"No verses table in {path}")
+        text = ', '.join(f"NULLIF({c}, '')" for c in text_columns if c in columns)
+        themes = 'themes' if 'themes' in columns else 'NULL'
+        cursor = conn.execute(
+            f"SELECT book, chapter, verse_number, COALESCE({text}, ''), {themes} FROM verses ORDER BY id"
+        )
+        for book, chapter, verse, verse_text, verse_themes in cursor:
+            yield SourceVerse(book_name(book), chapter, verse, verse_text, verse_themes)
+    finally:
+        conn.close()
+
+
+def _open_text_maybe_gzip(path):
+    with open(path, 'rb') as f:
+        gzipped = f.read(2) == b'\x1f\x8b'
+    return gzip.open(path, 'rt', encoding='utf-8') if gzipped else open(path, encoding='utf-8')
+
+
+def read_sql_dump(path, text_columns=LEGACY_TEXT_COLUMNS) -> Iterator[SourceVerse]:
+    """Replay a legacy SQL dump one statement at a time into a scratch database, then read it"""
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, 'dump.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        try:
+            statement = ''
+            with _open_text_maybe_gzip(path) as f:
+                for line in f:
+                    statement += line
+                    if not sqlite3.complete_statement(statement):
+                        continue
+                    # The dump's BEGIN/COMMIT are dropped; the sqlite3 module
+                    # already wraps the inserts in one transaction
+                    if not statement.lstrip().upper().startswith(('BEGIN', 'COMMIT')):
+                        conn.execute(statement)
+                    statement = ''
+            conn.commit()
+        finally:
+            conn.close()
+        yield from read_sqlite(db_path, text_columns)
+
+
+SOURCE_READERS: Dict[str, Callable[[str], Iterator[SourceVerse]]] = {
+    'scrollmapper': read_scrollmapper,
+    'godlytalias': read_godlytalias,
+    'usfm': read_usfm,
+    'osis': read_osis,
+    'usx': read_usx,
+    'sqlite': read_sqlite,
+    'sql': read_sql_dump,
+}
+
+
+def detect_format(path):
+    """Guess the reader for `path` from its name and first bytes"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as z:
+            names = [n.lower() for n in z.namelist()]
+        if any(n.endswith(('.usfm', '.sfm')) for n in names):
+            return 'usfm'
+        if any(n.endswith('.usx') for n in names):
+            return 'usx'
+        raise SourceFormatError(f"No USFM or USX files in {path}")
+
+    with open(path, 'rb') as f:
+        raw = f.read(4096)
+    if raw.startswith(b'SQLite format 3\x00'):
+        return 'sqlite'
+    if raw.startswith(b'\x1f\x8b'):
+        with gzip.open(path, 'rb') as f:
+            raw = f.read(4096)
+    head = raw.decode('utf-8', errors='ignore').lstrip('﻿ \t\r\n')
+    if head.upper().startswith(('PRAGMA', 'BEGIN', 'CREATE TABLE', 'INSERT')):
+        return 'sql'
+    if head.startswith('{') or head.startswith('['):
+        return 'godlytalias' if '"resultset"' in head else 'scrollmapper'
+    if head.startswith('\\'):
+        return 'usfm'
+    if '<osis' in head:
+        return 'osis'
+    if '<usx' in head:
+        return 'usx'
+    raise SourceFormatError(f"Unrecognized source format: {path}")
+
+
+def read_source(path, source_format=None) -> Iterator[SourceVerse]:
+    """Stream normalized verses from `path` using the named (or detected) reader"""
+    return SOURCE_READERS[source_format or detect_format(path)](path)
+
+
+def read_annotated_source(path, source_format=None) -> Iterator[SourceVerse]:
+    """Like read_source, but legacy databases yield the raw Strong's-annotated `text` column"""
+    source_format = source_format or detect_format(path)
+    if source_format in ('sqlite', 'sql'):
+        return SOURCE_READERS[source_format](path, text_columns=('text',))
+    return SOURCE_READERS[source_format](path)
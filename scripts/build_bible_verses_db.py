@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Build the app's bible_verses table for any number of translations
+
+Each translation is streamed from its source (any bible_sources.py reader:
+JSON, USFM, OSIS, USX, a legacy verses database or SQL dump) straight into
+the target schema the app queries:
+
+    bible_verses(id, version, book, chapter, verse, text, language,
+                 themes, category, reference)
+
+so there is no intermediate `verses` table and no bible_transform.sql
+pass. Rebuilding a translation replaces only that version's rows. Lookups
+go through composite (version, book, chapter, verse) and
+(language, version, book, chapter, verse) indexes. Source themes are
+linked into the themes / verse_themes tables after every load.
+
+Usage:
+    python3 build_bible_verses_db.py                     # WEB + RVR1909 from the shipped SQL dumps
+    python3 build_bible_verses_db.py --translation WEB en ../assets/bible.db \\
+                                     --translation KJV en en-kjv.json scrollmapper
+    python3 build_bible_verses_db.py --db ../assets/bible_verses.db --fast
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from typing import NamedTuple, Optional
+
+from bible_db import (PhaseTimer, begin_bulk_load, create_bible_verses_indexes,
+                      create_bible_verses_schema, create_theme_schema, drop_indexes,
+                      end_bulk_load, finalize_database, insert_batches, sync_verse_themes)
+from bible_sources import SOURCE_READERS, SourceFormatError, plain_text, read_source
+from download_cache import add_cache_arguments, cache_from_args
+
+DEFAULT_DB_PATH = "../assets/bible_verses.db"
+
+INSERT_BIBLE_VERSE_SQL = '''
+    INSERT INTO bible_verses (version, book, chapter, verse, text, language, themes, category, reference)
+    VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)
+'''
+
+
+class Translation(NamedTuple):
+    version: str
+    language: str
+    source: str
+    source_format: Optional[str] = None
+
+
+DEFAULT_TRANSLATIONS = [
+    Translation('WEB', 'en', '../assets/bible_web_optimized.sql.gz'),
+    Translation('RVR1909', 'es', '../assets/spanish_rvr1909_optimized.sql.gz'),
+]
+
+
+def parse_translation(values):
+    """argparse: VERSION LANGUAGE SOURCE [FORMAT]"""
+    if len(values) not in (3, 4):
+        raise argparse.ArgumentTypeError("--translation takes VERSION LANGUAGE SOURCE [FORMAT]")
+    if len(values) == 4 and values[3] not in SOURCE_READERS:
+        raise argparse.ArgumentTypeError(f"Unknown format {values[3]!r}; choose from {sorted(SOURCE_READERS)}")
+    return Translation(*values)
+
+
+def verse_rows(translation, verses):
+    """Yield bible_verses rows for one translation"""
+    for verse in verses:
+        yield (translation.version, verse.book, verse.chapter, verse.verse, plain_text(verse.text),
+               translation.language, verse.themes, f"{verse.book} {verse.chapter}:{verse.verse}")
+
+
+def build_database(translations, db_path, cache=None, fast=False):
+    """Load every translation into bible_verses. Returns {version: verse_count}."""
+    print(f"\n💾 Building bible_verses at {db_path}...")
+
+    timer = PhaseTimer()
+    counts = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        if fast:
+            begin_bulk_load(conn)
+        cursor = conn.cursor()
+
+        with timer.phase('schema'):
+            create_bible_verses_schema(cursor)
+            # Indexes (including any added outside this builder) are rebuilt after the load
+            dropped_indexes = drop_indexes(cursor, 'bible_verses') if fast else []
+
+        for translation in translations:
+            source = translation.source
+            if not os.path.exists(source):
+                source = cache.fetch(source)
+
+            print(f"📝 {translation.version} ({translation.language}) from {translation.source}...")
+            with timer.phase(f'load {translation.version}'):
+                cursor.execute('DELETE FROM bible_verses WHERE version = ?', (translation.version,))
+                verses = read_source(source, translation.source_format)
+                counts[translation.version] = insert_batches(
+                    cursor, INSERT_BIBLE_VERSE_SQL, verse_rows(translation, verses))
+            print(f"  ✅ {counts[translation.version]:,} verses")
+
+        print("🏷️  Linking themes...")
+        with timer.phase('themes'):
+            create_theme_schema(cursor)
+            links = sync_verse_themes(cursor, 'bible_verses')
+        print(f"  ✅ {links:,} verse_themes links")
+
+        print("🔍 Creating indexes...")
+        with timer.phase('indexes'):
+            for sql in dropped_indexes:
+                cursor.execute(sql)
+            create_bible_verses_indexes(cursor)
+            if not fast:
+                # Version-less reference lookups skip-scan the version index only with stats
+                cursor.execute('ANALYZE bible_verses')
+
+        conn.commit()
+
+        if fast:
+            end_bulk_load(conn)
+            print("🧹 Analyzing and compacting...")
+            with timer.phase('analyze + vacuum'):
+                finalize_database(conn)
+    finally:
+        conn.close()
+
+    timer.report()
+    return counts
+
+
+def print_statistics(db_path):
+    """Per-translation counts and a duplicate-reference check"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    print("\n📊 Translations:")
+    cursor.execute('''
+        SELECT version, language, COUNT(*), COUNT(DISTINCT book)
+        FROM bible_verses GROUP BY version, language ORDER BY language, version
+    ''')
+    for version, language, verses, books in cursor.fetchall():
+        print(f"   - {version:<10} {language:<4} {verses:>7,} verses  {books:>3} books")
+
+    cursor.execute('''
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM bible_verses
+            GROUP BY version, book, chapter, verse HAVING COUNT(*) > 1
+        )
+    ''')
+    duplicates = cursor.fetchone()[0]
+    if duplicates:
+        print(f"⚠️  {duplicates} verse references appear more than once")
+
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the bible_verses table for one or more translations")
+    parser.add_argument('--translation', nargs='+', action='append', metavar='ARG',
+                        help="VERSION LANGUAGE SOURCE [FORMAT]; repeat for more translations "
+                             "(default: WEB en + RVR1909 es from the shipped SQL dumps)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Output SQLite database path")
+    parser.add_argument('--fast', action='store_true',
+                        help="Bulk-load profile: unjournaled load, ANALYZE/optimize/VACUUM at the end")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        translations = [parse_translation(values) for values in args.translation or []] or DEFAULT_TRANSLATIONS
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    print("📖 Bible Verses Builder")
+    print("=" * 60)
+
+    try:
+        counts = build_database(translations, args.db, cache_from_args(args), fast=args.fast)
+    except (OSError, SourceFormatError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print_statistics(args.db)
+    print(f"\n✅ Complete! {sum(counts.values()):,} verses in {len(counts)} translations")
+    print(f"📍 Location: {args.db}")
+
+
+if __name__ == "__main__":
+    main()
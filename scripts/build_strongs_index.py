@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Strong's concordance index for the WEB
+
+The annotated WEB text in assets/bible.db tags most words with a Strong's
+number (`created|strong="H1254"`). This build step parses every verse with
+the shared markup parser (verse_markup.py) and inverts the tags into
+
+    strongs_occurrences(strong_id, verse_id, position)    one row per tagged word
+    strongs_lemmas(strong_id, occurrences, verses, common_word)
+
+strongs_occurrences is clustered by strong_id, so a word study such as
+"every verse using G26" reads one primary-key range instead of scanning
+the text with LIKE '%G26%'. Positions are word indexes into the parsed
+verse (the same positions as verse_words).
+
+--export writes the same two tables as a SQL pack for the app, keyed to
+the bible_verses ids of --app-db; there positions index the words of the
+shipped text, as in export_bible_assets.py's verse_strongs pack.
+
+Usage:
+    python3 build_strongs_index.py                              # ../assets/bible.db
+    python3 build_strongs_index.py --query G26 --query H1254
+    python3 build_strongs_index.py --export ../assets/strongs_web.sql --app-db ../assets/bible_verses.db
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter, defaultdict
+
+from bible_db import create_strongs_schema
+from bible_sources import read_annotated_source
+from export_bible_assets import format_inserts, gzip_file, strongs_tokens
+from verse_markup import parse_verse_markup
+
+DEFAULT_DB_PATH = "../assets/bible.db"
+DEFAULT_APP_DB_PATH = "../assets/bible_verses.db"
+EXPORT_BATCH_SIZE = 500
+
+
+def lemma_rows(occurrences, words):
+    """strongs_lemmas rows from (strong_id, verse_id, position) rows and a Counter of (strong_id, word)"""
+    counts = Counter()
+    verses = defaultdict(set)
+    for strong_id, verse_id, _ in occurrences:
+        counts[strong_id] += 1
+        verses[strong_id].add(verse_id)
+
+    common = {}
+    for (strong_id, word), _ in words.most_common():
+        common.setdefault(strong_id, word)
+
+    return [(strong_id, counts[strong_id], len(verses[strong_id]), common.get(strong_id))
+            for strong_id in sorted(counts)]
+
+
+def build_index(conn):
+    """(Re)build strongs_occurrences and strongs_lemmas from verses.text. Returns (occurrences, lemmas)."""
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS strongs_occurrences")
+    cursor.execute("DROP TABLE IF EXISTS strongs_lemmas")
+    create_strongs_schema(cursor)
+
+    occurrences = []
+    words = Counter()
+    for verse_id, text in cursor.execute("SELECT id, text FROM verses ORDER BY id").fetchall():
+        for position, (word, strong_id, _) in enumerate(parse_verse_markup(text).tokens):
+            if strong_id:
+                occurrences.append((strong_id, verse_id, position))
+                words[strong_id, word] += 1
+
+    # Insert in primary-key order so the WITHOUT ROWID b-tree is appended to, not split
+    occurrences.sort()
+    cursor.executemany("INSERT INTO strongs_occurrences VALUES (?, ?, ?)", occurrences)
+    lemmas = lemma_rows(occurrences, words)
+    cursor.executemany("INSERT INTO strongs_lemmas VALUES (?, ?, ?, ?)", lemmas)
+    conn.commit()
+    return len(occurrences), len(lemmas)
+
+
+def verses_for(conn, strong_id):
+    """Verses using a Strong's number, in canonical order"""
+    return conn.execute('''
+        SELECT v.id, v.reference FROM verses v
+        WHERE v.id IN (SELECT verse_id FROM strongs_occurrences WHERE strong_id = ?)
+        ORDER BY v.id
+    ''', (strong_id,)).fetchall()
+
+
+def compare_lookup(conn, strong_id, runs=5):
+    """Return (index ms, LIKE scan ms, verse count) for one Strong's number"""
+    def best(sql, params):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            rows = conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings), rows
+
+    index_ms, rows = best('SELECT DISTINCT verse_id FROM strongs_occurrences WHERE strong_id = ?', (strong_id,))
+    # The old way; also matches G260, G2600, ... which the index does not
+    like_ms, _ = best('SELECT id FROM verses WHERE text LIKE ?', (f'%"{strong_id}%',))
+    return index_ms, like_ms, len(rows)
+
+
+def pack_schema():
+    """CREATE TABLE IF NOT EXISTS statements for the pack, generated from bible_db.create_strongs_schema"""
+    conn = sqlite3.connect(':memory:')
+    create_strongs_schema(conn.cursor())
+    # sqlite_master keeps the statements without IF NOT EXISTS
+    statements = [sql.strip().replace('CREATE TABLE ', 'CREATE TABLE IF NOT EXISTS ', 1) + ';'
+                  for (sql,) in conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' ORDER BY rowid")]
+    conn.close()
+    return statements
+
+
+def export_pack(db_path, app_db, version, out_path, batch_size=EXPORT_BATCH_SIZE):
+    """Write the app pack for one translation. Returns (sizes, occurrences, lemmas, unmatched verses)."""
+    conn = sqlite3.connect(app_db)
+    targets = {(book, chapter, verse): (verse_id, text) for verse_id, book, chapter, verse, text in conn.execute(
+        'SELECT id, book, chapter, verse, text FROM bible_verses WHERE version = ?', (version,))}
+    conn.close()
+
+    occurrences = []
+    words = Counter()
+    unmatched = 0
+    for source_verse in read_annotated_source(db_path):
+        target = targets.get((source_verse.book, source_verse.chapter, source_verse.verse))
+        if target is None:
+            unmatched += 1
+            continue
+        verse_id, clean = target
+        shipped = clean.split()
+        for position, strong_id in strongs_tokens(source_verse.text, clean):
+            occurrences.append((strong_id, verse_id, position))
+            words[strong_id, shipped[position].strip('.,;:!?“”‘’"\'()[]')] += 1
+    occurrences.sort()
+    lemmas = lemma_rows(occurrences, words)
+
+    with open(out_path, 'w', encoding='utf-8') as f:
+        f.write('BEGIN TRANSACTION;\n')
+        for statement in pack_schema():
+            f.write(statement + '\n')
+        for table, rows in (('strongs_occurrences', occurrences), ('strongs_lemmas', lemmas)):
+            for statement in format_inserts(table, None, rows, batch_size):
+                f.write(statement + '\n')
+        f.write('COMMIT;\n')
+
+    return {'sql': os.path.getsize(out_path), 'gz': gzip_file(out_path)}, len(occurrences), len(lemmas), unmatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Strong's concordance index from the annotated WEB text")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Legacy database with annotated verses.text")
+    parser.add_argument('--query', action='append', default=[], metavar='STRONG_ID',
+                        help="Time a lookup against the LIKE scan it replaces (repeatable)")
+    parser.add_argument('--export', metavar='OUT', help="Write the app pack (SQL, plus a .gz copy)")
+    parser.add_argument('--app-db', default=DEFAULT_APP_DB_PATH, help="bible_verses database the pack is keyed to")
+    parser.add_argument('--version', default='WEB', help="Translation in --app-db to key the pack to")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+
+    print(f"📖 Building Strong's index in {args.db}...")
+    conn = sqlite3.connect(args.db)
+    start = time.perf_counter()
+    occurrences, lemmas = build_index(conn)
+    print(f"✅ {occurrences:,} occurrences of {lemmas:,} lemmas in {time.perf_counter() - start:.2f}s")
+
+    for strong_id in args.query:
+        strong_id = strong_id.upper()
+        index_ms, like_ms, verse_count = compare_lookup(conn, strong_id)
+        lemma = conn.execute('SELECT occurrences, common_word FROM strongs_lemmas WHERE strong_id = ?',
+                             (strong_id,)).fetchone()
+        if lemma is None:
+            print(f"🔍 {strong_id}: not found")
+            continue
+        print(f"🔍 {strong_id} ({lemma[1]}): {lemma[0]:,} occurrences in {verse_count:,} verses -- "
+              f"index {index_ms:.2f} ms, LIKE scan {like_ms:.2f} ms")
+        for verse_id, reference in verses_for(conn, strong_id)[:5]:
+            print(f"   {reference}")
+    conn.close()
+
+    if args.export:
+        if not os.path.exists(args.app_db):
+            print(f"❌ Database not found: {args.app_db}")
+            sys.exit(1)
+        print(f"\n📦 Exporting {args.version} pack keyed to {args.app_db}...")
+        sizes, occurrences, lemmas, unmatched = export_pack(args.db, args.app_db, args.version, args.export)
+        print(f"✅ {args.export}: {occurrences:,} occurrences, {lemmas:,} lemmas, "
+              f"{sizes['sql'] / 1024:,.0f} KB ({sizes['gz'] / 1024:,.0f} KB gzipped)")
+        if unmatched:
+            print(f"⚠️  {unmatched} source verses had no {args.version} row in {args.app_db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the app's Bible queries
+
+Runs EXPLAIN QUERY PLAN for the queries the Dart services issue against
+bible_verses (bible_chapter_service.dart, unified_verse_service.dart) on a
+built database, and fails when one of them falls back to a full table
+scan. Each query is then timed over --iterations runs, so an index
+dropped or reshaped by a builder change shows up before the database
+ships.
+
+Some catalog queries cannot use a b-tree index at all (a leading-wildcard
+LIKE over themes or text); they are marked as known scans and reported
+without failing the check, unless --strict is given. Queries whose
+optional tables are missing from the database (e.g. no FTS index) are
+skipped; a missing bible_verses table fails the check.
+
+The plan depends on ANALYZE statistics -- SQLite only skip-scans the
+(version, book, chapter, verse) index for a version-less reference
+lookup when sqlite_stat1 says version has few distinct values -- so the
+database is checked as shipped, never re-analyzed.
+
+Usage:
+    python3 check_query_plans.py                              # ../assets/bible_verses.db
+    python3 check_query_plans.py --db /tmp/bible_verses_web.db --iterations 500
+    python3 check_query_plans.py --version RVR1909 --language es --book Juan
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from typing import NamedTuple, Optional
+
+DEFAULT_DB_PATH = "../assets/bible_verses.db"
+DEFAULT_ITERATIONS = 200
+
+# Tables every shipped database has; the others (FTS, theme junction) are optional
+REQUIRED_TABLES = ('bible_verses',)
+
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)\b(?! VIRTUAL TABLE)')
+
+
+class CatalogQuery(NamedTuple):
+    name: str
+    source: str
+    sql: str
+    params: tuple
+    tables: tuple = ('bible_verses',)
+    known_scan: Optional[str] = None
+
+
+def query_catalog(version, language, book, chapter, verse, theme):
+    """The app's bible_verses queries, with sample parameters"""
+    return [
+        CatalogQuery(
+            'chapter verses', 'bible_chapter_service.getChapterVerses',
+            'SELECT * FROM bible_verses WHERE book = ? AND chapter = ? AND version = ? AND language = ? '
+            'ORDER BY verse ASC',
+            (book, chapter, version, language)),
+        CatalogQuery(
+            'chapter range', 'bible_chapter_service.getChapterRange',
+            'SELECT * FROM bible_verses '
+            'WHERE book = ? AND chapter >= ? AND chapter <= ? AND version = ? AND language = ? '
+            'ORDER BY chapter ASC, verse ASC',
+            (book, chapter, chapter + 2, version, language)),
+        CatalogQuery(
+            'chapter count', 'bible_chapter_service.getChapterCount',
+            'SELECT MAX(chapter) AS max_chapter FROM bible_verses WHERE book = ? AND version = ? AND language = ?',
+            (book, version, language)),
+        CatalogQuery(
+            'book list', 'bible_chapter_service.getAllBooks',
+            'SELECT DISTINCT book FROM bible_verses WHERE version = ? AND language = ?',
+            (version, language)),
+        CatalogQuery(
+            'chapter exists', 'bible_chapter_service.chapterExists',
+            'SELECT * FROM bible_verses WHERE book = ? AND chapter = ? AND version = ? AND language = ? LIMIT 1',
+            (book, chapter, version, language)),
+        CatalogQuery(
+            'verse by reference', 'unified_verse_service.getVerseByReference',
+            'SELECT * FROM bible_verses WHERE book = ? AND chapter = ? AND verse = ? LIMIT 1',
+            (book, chapter, verse)),
+        CatalogQuery(
+            'verse by id', 'unified_verse_service.addToFavorites',
+            'SELECT * FROM bible_verses WHERE id = ? LIMIT 1',
+            (1,)),
+        CatalogQuery(
+            'fts search', 'bible_chapter_service.searchVerses',
+            'SELECT bv.id, bv.book, bv.chapter, bv.verse, bv.text FROM bible_verses_fts fts '
+            'JOIN bible_verses bv ON fts.rowid = bv.id '
+            'WHERE fts.bible_verses_fts MATCH ? AND bv.version = ? AND bv.language = ? '
+            'ORDER BY bv.book, bv.chapter, bv.verse LIMIT 50',
+            (theme, version, language),
+            tables=('bible_verses', 'bible_verses_fts')),
+        CatalogQuery(
+            'verses for theme', 'verse_themes junction',
+            'SELECT bv.id, bv.book, bv.chapter, bv.verse, bv.text FROM themes t '
+            'JOIN verse_themes vt ON vt.theme_id = t.id JOIN bible_verses bv ON bv.id = vt.verse_id '
+            'WHERE t.name = ? AND bv.version = ? AND bv.language = ? ORDER BY vt.rank LIMIT 50',
+            (theme, version, language),
+            tables=('bible_verses', 'themes', 'verse_themes')),
+        CatalogQuery(
+            'theme search', 'unified_verse_service.searchByTheme',
+            'SELECT id, book, chapter, verse, text FROM bible_verses '
+            'WHERE themes LIKE ? OR category LIKE ? OR text LIKE ? LIMIT 50',
+            (f'%"{theme}"%', f'%{theme}%', f'%{theme}%'),
+            known_scan="leading-wildcard LIKE over the themes JSON; the verse_themes lookup above is indexed"),
+        CatalogQuery(
+            'text search fallback', 'unified_verse_service.searchVerses',
+            'SELECT id, book, chapter, verse, text FROM bible_verses '
+            'WHERE text LIKE ? OR book LIKE ? OR language LIKE ? LIMIT 50',
+            (f'%{theme}%',) * 3,
+            known_scan="LIKE fallback for when FTS is unavailable"),
+    ]
+
+
+def query_plan(conn, query):
+    """Return the EXPLAIN QUERY PLAN detail lines"""
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {query.sql}', query.params)]
+
+
+def full_scans(plan):
+    """Return the tables the plan reads end to end"""
+    return [match.group(1) for match in map(FULL_SCAN_RE.match, plan) if match]
+
+
+def time_query(conn, query, iterations):
+    """Return (mean ms, p95 ms, row count) over iterations runs"""
+    timings = []
+    rows = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        rows = len(conn.execute(query.sql, query.params).fetchall())
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.mean(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))], rows
+
+
+def check_database(db_path, catalog, iterations=DEFAULT_ITERATIONS, strict=False, show_plans=False):
+    """Check every catalog query. Returns the list of failures."""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'sqlite_stat1' not in tables:
+        print("⚠️  No ANALYZE statistics (sqlite_stat1); plans may differ from a finalized build")
+
+    failures = []
+    print(f"\n{'query':<22} {'plan':<10} {'rows':>6} {'mean ms':>9} {'p95 ms':>9}")
+    print("-" * 60)
+    for query in catalog:
+        missing = [table for table in query.tables if table not in tables]
+        missing_required = [table for table in missing if table in REQUIRED_TABLES]
+        if missing_required:
+            print(f"{query.name:<22} {'MISSING':<10} (no {', '.join(missing_required)})")
+            failures.append(f"{query.name} ({query.source}) needs missing table {', '.join(missing_required)}")
+            continue
+        if missing:
+            print(f"{query.name:<22} {'skipped':<10} (no {', '.join(missing)})")
+            continue
+
+        plan = query_plan(conn, query)
+        scans = full_scans(plan)
+        if not scans:
+            status = 'index'
+        elif query.known_scan and not strict:
+            status = 'known scan'
+        else:
+            status = 'FULL SCAN'
+            failures.append(f"{query.name} ({query.source}) scans {', '.join(scans)}")
+
+        mean_ms, p95_ms, rows = time_query(conn, query, iterations)
+        print(f"{query.name:<22} {status:<10} {rows:>6} {mean_ms:>9.3f} {p95_ms:>9.3f}")
+        if show_plans or status == 'FULL SCAN':
+            for line in plan:
+                print(f"    {line}")
+        if status == 'known scan':
+            print(f"    ({query.known_scan})")
+
+    conn.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when the app's Bible queries fall back to full table scans")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Built bible_verses database")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help="Timed runs per query")
+    parser.add_argument('--version', default='WEB', help="Sample translation parameter")
+    parser.add_argument('--language', default='en', help="Sample language parameter")
+    parser.add_argument('--book', default='John', help="Sample book parameter")
+    parser.add_argument('--theme', default='hope', help="Sample theme / search term")
+    parser.add_argument('--strict', action='store_true', help="Fail on known scans too")
+    parser.add_argument('--plans', action='store_true', help="Print every query plan")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+
+    print(f"🔍 Checking query plans in {args.db} ({args.iterations} iterations per query)...")
+    catalog = query_catalog(args.version, args.language, args.book, 3, 16, args.theme)
+    failures = check_database(args.db, catalog, args.iterations, args.strict, args.plans)
+
+    print("-" * 60)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ No unexpected full table scans")
+
+
+if __name__ == "__main__":
+    main()
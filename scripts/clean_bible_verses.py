@@ -3,11 +3,59 @@
 Clean Bible Verses Script
 Removes Strong's numbers and footnotes from WEB Bible database
 Creates clean_text column for training data
+
+Cleaning is done by the shared markup parser in verse_markup.py. With
+--tables one pass over the verses also writes the parsed words (with
+their Strong's numbers and offsets) to verse_words and the footnotes to
+verse_footnotes.
+
+The cleaner is registered as a deterministic SQLite function, so the whole
+table is cleaned by a single `UPDATE verses SET clean_text = clean(text)`
+inside the engine. For very large corpora, --workers N cleans id-range
+chunks in a process pool while the main process stays the only writer;
+the same pool parses the pages when the side tables are written (once
+they exist, every run keeps them in step with clean_text).
+--benchmark times every method (including the old row-by-row loop) on
+in-memory copies of the database.
+
+Runs are incremental: each verse records a hash of its source text and
+the version of the cleaner that produced clean_text, and only verses that
+are new, whose text changed, or that were cleaned by an older cleaner are
+reprocessed. Unchanged rows are not rewritten, so a re-run after a few
+corrections touches only their pages. --force reprocesses everything.
+
+Usage:
+    python3 clean_bible_verses.py
+    python3 clean_bible_verses.py --db ../assets/bible.db --workers 4
+    python3 clean_bible_verses.py --tables
+    python3 clean_bible_verses.py --tables --workers 4
+    python3 clean_bible_verses.py --force
+    python3 clean_bible_verses.py --benchmark
 """
 
+import argparse
+import hashlib
+import os
 import sqlite3
-import re
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from bible_db import create_markup_schema
+from verse_markup import MARKUP_PARSER_VERSION, parse_verse_markup
+
+# Names of the registered SQLite functions
+CLEAN_FUNCTION = 'clean'
+HASH_FUNCTION = 'source_hash'
+# Stamped on every cleaned row; rows with another stamp are re-cleaned
+CLEANER_VERSION = MARKUP_PARSER_VERSION
+TRACKING_COLUMNS = ('clean_text', 'text_hash', 'cleaner_version')
+# Rows whose clean_text is missing or out of date; takes CLEANER_VERSION
+STALE_SQL = f"(cleaner_version IS NOT ? OR text_hash IS NOT {HASH_FUNCTION}(text))"
+# Verses per worker chunk in the multi-process path
+CHUNK_SIZE = 5000
 
 def clean_verse_text(text):
     """
@@ -17,48 +65,33 @@ def clean_verse_text(text):
     Input: '\\+w For|strong="G1063"\\+w* God'
     Output: 'For God'
     """
-    if not text:
-        return ''
-
-    # Remove all \+w markers (opening and closing)
-    text = re.sub(r'\\\+w\s*', '', text)
-    text = re.sub(r'\\\+w\*', '', text)
-
-    # Remove remaining +w markers without backslash
-    text = re.sub(r'\+w\s*', '', text)
-    text = re.sub(r'\+w\*', '', text)
+    return parse_verse_markup(text).text
 
-    # Remove Strong's numbers
-    text = re.sub(r'\|strong="[HG]\d+"', '', text)
+def source_hash(text):
+    """Short SHA-256 of a verse's source text"""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()[:16]
 
-    # Remove footnotes: + N:NN text
-    text = re.sub(r'\s*\+\s*\d+:\d+\s+[^+]*(?=\+|$)', '', text)
 
-    # Remove standalone asterisks and pluses
-    text = re.sub(r'\*', '', text)
-    text = re.sub(r'\+', '', text)
+def add_tracking_columns(cursor):
+    """Add whichever of clean_text, text_hash, cleaner_version are missing. Returns their names."""
+    cursor.execute("PRAGMA table_info(verses)")
+    columns = {row[1] for row in cursor.fetchall()}
+    missing = [column for column in TRACKING_COLUMNS if column not in columns]
+    for column in missing:
+        cursor.execute(f"ALTER TABLE verses ADD COLUMN {column} TEXT")
+    return missing
 
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
-    text = text.strip()
-
-    return text
 
 def add_clean_text_column(db_path):
-    """Add clean_text column to verses table"""
+    """Add clean_text (and its change-tracking columns) to verses table"""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     try:
-        # Check if column already exists
-        cursor.execute("PRAGMA table_info(verses)")
-        columns = [row[1] for row in cursor.fetchall()]
-
-        if 'clean_text' not in columns:
-            print("Adding clean_text column...")
-            cursor.execute("ALTER TABLE verses ADD COLUMN clean_text TEXT")
-            conn.commit()
-            print("✓ Column added")
+        added = add_tracking_columns(cursor)
+        conn.commit()
+        if added:
+            print(f"✓ Added column(s): {', '.join(added)}")
         else:
             print("clean_text column already exists")
 
@@ -69,34 +102,214 @@ def add_clean_text_column(db_path):
     finally:
         conn.close()
 
-def clean_all_verses(db_path):
-    """Clean all verses in the database"""
-    conn = sqlite3.connect(db_path)
+def register_clean_function(conn):
+    """Register clean_verse_text and source_hash as deterministic SQL functions"""
+    conn.create_function(CLEAN_FUNCTION, 1, clean_verse_text, deterministic=True)
+    conn.create_function(HASH_FUNCTION, 1, source_hash, deterministic=True)
+
+
+def _select_sql(only_stale):
+    where = f" WHERE {STALE_SQL}" if only_stale else ''
+    return f"SELECT id, text FROM verses{where}", (CLEANER_VERSION,) if only_stale else ()
+
+
+def stale_counts(conn):
+    """Return (total, new, changed, outdated): verses never cleaned, with edited text, or from an older cleaner"""
+    register_clean_function(conn)
+    return conn.execute(f'''
+        SELECT COUNT(*),
+               COALESCE(SUM(text_hash IS NULL), 0),
+               COALESCE(SUM(text_hash IS NOT NULL AND text_hash IS NOT {HASH_FUNCTION}(text)), 0),
+               COALESCE(SUM(text_hash IS {HASH_FUNCTION}(text) AND cleaner_version IS NOT ?), 0)
+        FROM verses
+    ''', (CLEANER_VERSION,)).fetchone()
+
+
+def _keyset_pages(conn, chunk_size, only_stale=False):
+    """
+    Yield (id, text) pages in id order. Each page is read with its own
+    `id > ?` query and fetched in full, so callers can write between
+    pages without a cursor open on the table they update.
+    """
+    where = f"id > ? AND {STALE_SQL}" if only_stale else "id > ?"
+    params = (CLEANER_VERSION,) if only_stale else ()
+    last_id = -1
+    while True:
+        rows = conn.execute(
+            f"SELECT id, text FROM verses WHERE {where} ORDER BY id LIMIT ?", (last_id, *params, chunk_size)
+        ).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def clean_rows_loop(conn, only_stale=False):
+    """Original path: fetch every row, then one UPDATE per verse. Returns the row count."""
+    register_clean_function(conn)
     cursor = conn.cursor()
+    cursor.execute(*_select_sql(only_stale))
+    verses = cursor.fetchall()
 
-    try:
-        # Get all verses
-        print("Fetching verses...")
-        cursor.execute("SELECT id, text FROM verses")
-        verses = cursor.fetchall()
-
-        print(f"Cleaning {len(verses)} verses...")
-        cleaned_count = 0
-
-        for verse_id, text in verses:
-            clean_text = clean_verse_text(text)
-            cursor.execute(
-                "UPDATE verses SET clean_text = ? WHERE id = ?",
-                (clean_text, verse_id)
-            )
-            cleaned_count += 1
-
-            if cleaned_count % 1000 == 0:
-                print(f"  Cleaned {cleaned_count}/{len(verses)}...")
-                conn.commit()
+    cleaned_count = 0
+    for verse_id, text in verses:
+        cursor.execute(
+            "UPDATE verses SET clean_text = ?, text_hash = ?, cleaner_version = ? WHERE id = ?",
+            (clean_verse_text(text), source_hash(text), CLEANER_VERSION, verse_id)
+        )
+        cleaned_count += 1
+        if cleaned_count % 1000 == 0:
+            conn.commit()
+    conn.commit()
+    return cleaned_count
 
-        conn.commit()
-        print(f"✓ Cleaned {cleaned_count} verses")
+
+def clean_rows_in_engine(conn, only_stale=False):
+    """One UPDATE statement; SQLite calls clean() per row. Returns the row count."""
+    register_clean_function(conn)
+    where = f" WHERE {STALE_SQL}" if only_stale else ''
+    cursor = conn.execute(
+        f"UPDATE verses SET clean_text = {CLEAN_FUNCTION}(text), text_hash = {HASH_FUNCTION}(text), "
+        f"cleaner_version = ?{where}",
+        (CLEANER_VERSION,) * (2 if only_stale else 1))
+    conn.commit()
+    return cursor.rowcount
+
+
+def _clean_chunk(rows):
+    """Worker: clean one chunk of (id, text) rows. Returns [(clean_text, text_hash, cleaner_version, id)]."""
+    return [(clean_verse_text(text), source_hash(text), CLEANER_VERSION, verse_id) for verse_id, text in rows]
+
+
+def clean_rows_parallel(conn, workers, chunk_size=CHUNK_SIZE, only_stale=False):
+    """
+    Clean fixed-size chunks in a process pool. The main process reads the
+    chunks and is the only writer, applying each result with one
+    executemany; at most 2 * workers chunks are in flight. Returns the row count.
+    """
+    register_clean_function(conn)
+    chunks = _keyset_pages(conn, chunk_size, only_stale)
+
+    cleaned_count = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque(executor.submit(_clean_chunk, chunk) for chunk in islice(chunks, workers * 2))
+        while in_flight:
+            rows = in_flight.popleft().result()
+            next_chunk = next(chunks, None)
+            if next_chunk is not None:
+                in_flight.append(executor.submit(_clean_chunk, next_chunk))
+            conn.executemany(
+                "UPDATE verses SET clean_text = ?, text_hash = ?, cleaner_version = ? WHERE id = ?", rows)
+            cleaned_count += len(rows)
+    conn.commit()
+    return cleaned_count
+
+
+def _parse_chunk(rows):
+    """Worker: parse one page of (id, text) rows into (cleaned, words, footnotes) row lists"""
+    cleaned, words, footnotes = [], [], []
+    for verse_id, text in rows:
+        parsed = parse_verse_markup(text)
+        cleaned.append((parsed.text, source_hash(text), CLEANER_VERSION, verse_id))
+        words.extend((verse_id, position, word, strong_id, offset)
+                     for position, (word, strong_id, offset) in enumerate(parsed.tokens))
+        footnotes.extend((verse_id, position, note.reference, note.text, note.offset)
+                         for position, note in enumerate(parsed.footnotes))
+    return cleaned, words, footnotes
+
+
+def _parsed_pages(pages, workers):
+    """Yield (rows, parsed) per page, parsed in-process or in a pool with at most 2 * workers pages in flight"""
+    if workers <= 1:
+        for rows in pages:
+            yield rows, _parse_chunk(rows)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque((rows, executor.submit(_parse_chunk, rows)) for rows in islice(pages, workers * 2))
+        while in_flight:
+            rows, future = in_flight.popleft()
+            parsed = future.result()
+            next_rows = next(pages, None)
+            if next_rows is not None:
+                in_flight.append((next_rows, executor.submit(_parse_chunk, next_rows)))
+            yield rows, parsed
+
+
+def parse_all_verses(conn, chunk_size=CHUNK_SIZE, only_stale=False, workers=1):
+    """
+    One pass over the verses: clean_text plus the verse_words and
+    verse_footnotes side tables. With workers > 1 the pages are parsed in
+    a process pool; the main process stays the only writer. Returns
+    (verses, words, footnotes).
+    """
+    register_clean_function(conn)
+    cursor = conn.cursor()
+    create_markup_schema(cursor)
+    if only_stale:
+        # Side rows of deleted verses; the re-cleaned verses are replaced page by page
+        cursor.execute("DELETE FROM verse_words WHERE verse_id NOT IN (SELECT id FROM verses)")
+        cursor.execute("DELETE FROM verse_footnotes WHERE verse_id NOT IN (SELECT id FROM verses)")
+    else:
+        cursor.execute("DELETE FROM verse_words")
+        cursor.execute("DELETE FROM verse_footnotes")
+
+    totals = [0, 0, 0]
+    # Keyset pages: each read finishes before its writes start
+    pages = _keyset_pages(conn, chunk_size, only_stale)
+    for rows, (cleaned, words, footnotes) in _parsed_pages(pages, workers):
+        if only_stale:
+            stale_ids = [(verse_id,) for verse_id, _ in rows]
+            cursor.executemany("DELETE FROM verse_words WHERE verse_id = ?", stale_ids)
+            cursor.executemany("DELETE FROM verse_footnotes WHERE verse_id = ?", stale_ids)
+        cursor.executemany(
+            "UPDATE verses SET clean_text = ?, text_hash = ?, cleaner_version = ? WHERE id = ?", cleaned)
+        cursor.executemany("INSERT INTO verse_words VALUES (?, ?, ?, ?, ?)", words)
+        cursor.executemany("INSERT INTO verse_footnotes VALUES (?, ?, ?, ?, ?)", footnotes)
+        totals[0] += len(cleaned)
+        totals[1] += len(words)
+        totals[2] += len(footnotes)
+
+    conn.commit()
+    return tuple(totals)
+
+
+def clean_all_verses(db_path, workers=1, tables=False, force=False):
+    """Clean new, changed and outdated verses (every verse with force)"""
+    conn = sqlite3.connect(db_path)
+
+    try:
+        start = time.perf_counter()
+        has_tables = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('verse_words', 'verse_footnotes')").fetchone()[0] == 2
+        if tables and not has_tables:
+            # New side tables need every verse
+            force = True
+        # Side tables that exist are kept in step with clean_text
+        tables = tables or has_tables
+
+        total, new, changed, outdated = stale_counts(conn)
+        stale = new + changed + outdated
+        if not force:
+            print(f"⏭️  Skipping {total - stale} unchanged verses (cleaner version {CLEANER_VERSION}); "
+                  f"{new} new, {changed} changed, {outdated} from an older cleaner")
+            if not stale:
+                print("✓ Nothing to clean")
+                return True
+        only_stale = not force
+
+        if tables:
+            print("Parsing verses into clean_text, verse_words and verse_footnotes"
+                  f"{f' in {workers} processes' if workers > 1 else ''}...")
+            cleaned_count, word_count, footnote_count = parse_all_verses(conn, only_stale=only_stale,
+                                                                         workers=workers)
+            print(f"✓ {word_count} words, {footnote_count} footnotes")
+        elif workers > 1:
+            print(f"Cleaning verses in {workers} processes...")
+            cleaned_count = clean_rows_parallel(conn, workers, only_stale=only_stale)
+        else:
+            print("Cleaning verses in SQLite...")
+            cleaned_count = clean_rows_in_engine(conn, only_stale)
+        print(f"✓ Cleaned {cleaned_count} verses in {time.perf_counter() - start:.2f}s")
 
         return True
     except Exception as e:
@@ -106,6 +319,42 @@ def clean_all_verses(db_path):
     finally:
         conn.close()
 
+
+def benchmark(db_path, workers):
+    """Time each cleaning method on a fresh in-memory copy of the database"""
+    methods = [
+        ('row-by-row loop', clean_rows_loop),
+        ('in-engine UPDATE', clean_rows_in_engine),
+        (f'{workers} processes', lambda conn: clean_rows_parallel(conn, workers)),
+    ]
+
+    print(f"{'method':<20} {'verses':>8} {'seconds':>8}")
+    print("-" * 38)
+    results = {}
+    for name, method in methods:
+        source = sqlite3.connect(db_path)
+        conn = sqlite3.connect(':memory:')
+        source.backup(conn)
+        source.close()
+        add_tracking_columns(conn.cursor())
+        conn.execute("UPDATE verses SET clean_text = NULL, text_hash = NULL, cleaner_version = NULL")
+        conn.commit()
+
+        start = time.perf_counter()
+        count = method(conn)
+        elapsed = time.perf_counter() - start
+        results[name] = conn.execute("SELECT id, clean_text FROM verses ORDER BY id").fetchall()
+        conn.close()
+        print(f"{name:<20} {count:>8} {elapsed:>8.2f}")
+
+    outputs = list(results.values())
+    if any(output != outputs[0] for output in outputs[1:]):
+        print("✗ Methods produced different clean_text")
+        return False
+    print("✓ All methods produce identical clean_text")
+    return True
+
+
 def verify_cleaning(db_path):
     """Verify cleaning by checking sample verses"""
     conn = sqlite3.connect(db_path)
@@ -142,19 +391,39 @@ def verify_cleaning(db_path):
     print("\n" + "="*60)
 
 def main():
-    db_path = "../assets/bible.db"
+    parser = argparse.ArgumentParser(description="Fill verses.clean_text with markup-free verse text")
+    parser.add_argument('--db', default="../assets/bible.db", help="Bible database with a verses table")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Clean id-range chunks in N processes (for very large corpora)")
+    parser.add_argument('--tables', action='store_true',
+                        help="Also write verse_words and verse_footnotes in the same pass")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-clean every verse, not just new, changed or outdated ones")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Time the row loop, in-engine UPDATE and process pool on copies; no changes")
+    args = parser.parse_args()
+    db_path = args.db
 
     print("WEB Bible Verse Cleaner")
     print("="*60)
     print(f"Database: {db_path}\n")
 
+    if not os.path.exists(db_path):
+        print(f"✗ Database not found: {db_path}")
+        sys.exit(1)
+
+    if args.benchmark:
+        if not benchmark(db_path, max(args.workers, 2)):
+            sys.exit(1)
+        return
+
     # Step 1: Add clean_text column
     if not add_clean_text_column(db_path):
         print("\n✗ Failed to add column. Exiting.")
         sys.exit(1)
 
     # Step 2: Clean all verses
-    if not clean_all_verses(db_path):
+    if not clean_all_verses(db_path, args.workers, args.tables, args.force):
         print("\n✗ Failed to clean verses. Exiting.")
         sys.exit(1)
 
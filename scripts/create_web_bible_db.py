@@ -2,141 +2,418 @@
 """
 Create World English Bible (WEB) SQLite database from raw text
 Downloads from ebible.org (official WEB source)
+
+The USFM bundle is spooled to disk in fixed-size chunks, each book is
+opened lazily from the archive and verses are fed to SQLite from a
+generator, so peak memory stays flat no matter how large the bundle is.
+
+Downloads go through the content-addressed cache in download_cache.py:
+a cache hit skips the transfer, --offline never touches the network and
+--mirror file:///path serves sources from a local mirror.
+
+Use --fast for the bulk-load profile (no journal during load, deferred
+indexes, ANALYZE/optimize/VACUUM at the end).
+
+Use --workers N to parse books in a process pool. Workers return one book
+of rows at a time and the main process stays the only SQLite writer,
+inserting books in canonical order so verse ids are deterministic.
+
+Reruns are incremental: a build_manifest table stores each book's SHA-256
+and the parser version, and only books whose entry changed are deleted and
+re-inserted (FTS and verse_themes links included). Untouched books keep
+their ids, clean_text and themes. Rebuilt books are re-inserted with the
+ids their verses had before, so ids keep following canonical book order
+and a delta against the previous build only shows the edited verses. A
+new book, or one that gained verses, has no id range to fit into; the
+build then falls back to a full rebuild. Use --full to drop everything and
+rebuild.
+
+Usage:
+    python3 create_web_bible_db.py [--source URL_OR_ZIP] [--db PATH] [--fast] [--workers N] [--full]
+                                   [--sha256 HEX] [--offline] [--mirror URL] [--cache-dir DIR]
 """
 
+import argparse
+import io
+import os
 import sqlite3
-import urllib.request
-import re
+import sys
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
-print("📖 Downloading World English Bible (WEB) from ebible.org...")
+from bible_db import (PhaseTimer, begin_bulk_load, create_theme_schema, end_bulk_load,
+                      ensure_manifest, ensure_theme_tables, finalize_database, insert_batches,
+                      read_manifest, record_manifest, sha256_stream)
+from download_cache import add_cache_arguments, cache_from_args
+from usfm_parser import PARSER_VERSION, parse_usfm
 
 # Download WEB Bible in USFM format (most parseable)
-url = "https://ebible.org/Scriptures/engwebp_usfm.zip"
+WEB_USFM_URL = "https://ebible.org/Scriptures/engwebp_usfm.zip"
+DEFAULT_DB_PATH = "../assets/bible.db"
 
-try:
-    import zipfile
-    import io
+INSERT_VERSE_SQL = '''
+    INSERT INTO verses (book, chapter, verse_number, text, translation, reference)
+    VALUES (?, ?, ?, ?, 'WEB', ?)
+'''
 
-    print("⬇️  Downloading ZIP file...")
-    with urllib.request.urlopen(url) as response:
-        zip_data = response.read()
+INSERT_VERSE_WITH_ID_SQL = '''
+    INSERT INTO verses (id, book, chapter, verse_number, text, translation, reference)
+    VALUES (?, ?, ?, ?, ?, 'WEB', ?)
+'''
 
-    print("📦 Extracting USFM files...")
-    with zipfile.ZipFile(io.BytesIO(zip_data)) as z:
-        # Find all USFM files
-        usfm_files = [f for f in z.namelist() if f.endswith('.usfm')]
-        print(f"Found {len(usfm_files)} Bible books")
 
-        # Create database
-        db_path = "../assets/bible.db"
-        print(f"\n💾 Creating SQLite database at {db_path}...")
+def list_usfm_books(zip_path):
+    """Return the archive's USFM members in canonical (file name) order"""
+    with zipfile.ZipFile(zip_path) as z:
+        return sorted(f for f in z.namelist() if f.endswith('.usfm'))
 
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
 
-        # Drop existing tables
-        cursor.execute('DROP TABLE IF EXISTS verses')
-        cursor.execute('DROP TABLE IF EXISTS verses_fts')
-
-        # Create verses table
-        cursor.execute('''
-            CREATE TABLE verses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                book TEXT NOT NULL,
-                chapter INTEGER NOT NULL,
-                verse_number INTEGER NOT NULL,
-                text TEXT NOT NULL,
-                translation TEXT DEFAULT 'WEB',
-                reference TEXT NOT NULL,
-                themes TEXT
-            )
-        ''')
-
-        # Create FTS table for search
-        cursor.execute('''
-            CREATE VIRTUAL TABLE verses_fts USING fts5(
-                text,
-                content=verses,
-                tokenize='porter ascii'
-            )
-        ''')
-
-        print("📝 Parsing and inserting verses...\n")
-
-        verse_count = 0
-        for usfm_file in sorted(usfm_files):
-            content = z.read(usfm_file).decode('utf-8')
-
-            # Extract book name from \h tag
-            book_match = re.search(r'\\h (.+)', content)
-            book_name = book_match.group(1).strip() if book_match else usfm_file.replace('.usfm', '')
-
-            # Parse chapters and verses
-            current_chapter = 0
-            for line in content.split('\n'):
-                # Chapter marker
-                if line.startswith('\\c '):
-                    current_chapter = int(line.split()[1])
-
-                # Verse marker
-                elif line.startswith('\\v '):
-                    # Extract verse number and text
-                    match = re.match(r'\\v (\d+)(.+)', line)
-                    if match:
-                        verse_num = int(match.group(1))
-                        verse_text = match.group(2).strip()
-
-                        # Clean up USFM markers
-                        verse_text = re.sub(r'\\[a-z]+\*?', '', verse_text)
-                        verse_text = ' '.join(verse_text.split())
-
-                        if verse_text and current_chapter > 0:
-                            reference = f"{book_name} {current_chapter}:{verse_num}"
-
-                            cursor.execute('''
-                                INSERT INTO verses (book, chapter, verse_number, text, translation, reference)
-                                VALUES (?, ?, ?, ?, 'WEB', ?)
-                            ''', (book_name, current_chapter, verse_num, verse_text, reference))
-
-                            verse_count += 1
+def hash_usfm_books(zip_path, usfm_files):
+    """Return {member_name: sha256} for the given books, streamed from the archive"""
+    with zipfile.ZipFile(zip_path) as z:
+        hashes = {}
+        for usfm_file in usfm_files:
+            with z.open(usfm_file) as raw:
+                hashes[usfm_file] = sha256_stream(raw)
+        return hashes
+
+
+def iter_usfm_books(zip_path, usfm_files):
+    """
+    Yield (member_name, lines) for the given USFM books in the archive.
+
+    Members are opened one at a time and decoded line by line, so only the
+    current line of the current book is held in memory.
+    """
+    with zipfile.ZipFile(zip_path) as z:
+        for usfm_file in usfm_files:
+            with z.open(usfm_file) as raw:
+                yield usfm_file, io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def verse_rows(lines, fallback_name):
+    """Yield insert-ready rows for the verses of one book"""
+    for record in parse_usfm(lines, fallback_name):
+        yield (record.book, record.chapter, record.verse, record.text,
+               f"{record.book} {record.chapter}:{record.verse}")
+
+
+def iter_verse_rows(zip_path, usfm_files, built):
+    """
+    Yield insert-ready verse rows for the given books, one book at a time.
+
+    `built` is filled with {member_name: (book, verse_count)} as books finish.
+    """
+    verse_count = 0
+    for usfm_file, lines in iter_usfm_books(zip_path, usfm_files):
+        book_name = usfm_file.replace('.usfm', '')
+        book_count = 0
+        for row in verse_rows(lines, book_name):
+            book_name = row[0]
+            book_count += 1
+            yield row
+
+        verse_count += book_count
+        built[usfm_file] = (book_name, book_count)
+        print(f"  ✅ {book_name}: {verse_count} total verses so far")
 
+
+def parse_book(zip_path, usfm_file):
+    """Worker: parse one book from the archive into a batch of rows"""
+    with zipfile.ZipFile(zip_path) as z, z.open(usfm_file) as raw:
+        lines = io.TextIOWrapper(raw, encoding='utf-8')
+        return list(verse_rows(lines, usfm_file.replace('.usfm', '')))
+
+
+def iter_verse_rows_parallel(zip_path, usfm_files, built, workers):
+    """
+    Parse books in a process pool and yield their rows in canonical order.
+
+    At most 2 * workers books are in flight, so memory stays bounded even
+    when the writer falls behind the parsers.
+    """
+    print(f"Parsing with {workers} workers")
+
+    remaining = iter(usfm_files)
+    verse_count = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque(
+            (usfm_file, executor.submit(parse_book, zip_path, usfm_file))
+            for usfm_file in islice(remaining, workers * 2)
+        )
+        while in_flight:
+            usfm_file, future = in_flight.popleft()
+            rows = future.result()
+
+            next_file = next(remaining, None)
+            if next_file is not None:
+                in_flight.append((next_file, executor.submit(parse_book, zip_path, next_file)))
+
+            yield from rows
+            verse_count += len(rows)
+            book_name = rows[0][0] if rows else usfm_file.replace('.usfm', '')
+            built[usfm_file] = (book_name, len(rows))
             print(f"  ✅ {book_name}: {verse_count} total verses so far")
 
-        # Populate FTS index
-        print("\n🔍 Building full-text search index...")
-        cursor.execute('INSERT INTO verses_fts(text) SELECT text FROM verses')
 
-        # Create indexes
-        print("🔍 Creating indexes...")
-        cursor.execute('CREATE INDEX idx_book_chapter ON verses(book, chapter)')
-        cursor.execute('CREATE INDEX idx_reference ON verses(reference)')
-        cursor.execute('CREATE INDEX idx_book ON verses(book)')
+def create_schema(cursor):
+    """Drop and recreate the verses, FTS and verse_themes tables"""
+    cursor.execute('DROP TABLE IF EXISTS verses')
+    cursor.execute('DROP TABLE IF EXISTS verses_fts')
+    cursor.execute('DROP TABLE IF EXISTS verse_themes')
+
+    cursor.execute('''
+        CREATE TABLE verses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book TEXT NOT NULL,
+            chapter INTEGER NOT NULL,
+            verse_number INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            translation TEXT DEFAULT 'WEB',
+            reference TEXT NOT NULL,
+            themes TEXT
+        )
+    ''')
+
+    # Create FTS table for search
+    cursor.execute('''
+        CREATE VIRTUAL TABLE verses_fts USING fts5(
+            text,
+            content=verses,
+            tokenize='porter ascii'
+        )
+    ''')
+    create_theme_schema(cursor)
+
+
+def create_indexes(cursor):
+    """Create lookup indexes once the verses are loaded"""
+    cursor.execute('CREATE INDEX idx_book_chapter ON verses(book, chapter)')
+    cursor.execute('CREATE INDEX idx_reference ON verses(reference)')
+    cursor.execute('CREATE INDEX idx_book ON verses(book)')
+
+
+def remove_book(cursor, book_name):
+    """Delete one book's verses, their full-text entries and theme links"""
+    # External-content FTS needs the old values to drop its entries
+    cursor.execute('''
+        INSERT INTO verses_fts(verses_fts, rowid, text)
+        SELECT 'delete', id, text FROM verses WHERE book = ?
+    ''', (book_name,))
+    cursor.execute('''
+        DELETE FROM verse_themes WHERE verse_id IN (SELECT id FROM verses WHERE book = ?)
+    ''', (book_name,))
+    cursor.execute('DELETE FROM verses WHERE book = ?', (book_name,))
+
+
+def plan_incremental_build(cursor, hashes):
+    """
+    Compare source hashes with the stored manifest.
+
+    Returns (changed, removed) member lists, or None when the database has
+    no manifest and needs a full build.
+    """
+    manifest = read_manifest(cursor)
+    if not manifest:
+        return None
+
+    changed = [f for f, sha in hashes.items()
+               if manifest.get(f, (None, None, None))[1:] != (sha, PARSER_VERSION)]
+    removed = [f for f in manifest if f not in hashes]
+    return changed, removed
 
+
+def assign_original_ids(cursor, manifest, built, rows):
+    """
+    Prefix the rows of rebuilt books with the ids the book had before.
+
+    `rows` holds the books of `built` in order. Each book takes its old ids
+    in ascending order, so ids keep following canonical book order. Returns
+    None when a book is new or has more verses than its old id range.
+    """
+    with_ids = []
+    start = 0
+    for usfm_file, (book_name, verse_count) in built.items():
+        old_book = manifest.get(usfm_file, (None,))[0]
+        old_ids = [verse_id for (verse_id,) in cursor.execute(
+            'SELECT id FROM verses WHERE book = ? ORDER BY id', (old_book,))]
+        if verse_count > len(old_ids):
+            print(f"↪️  {book_name} has {verse_count} verses but {len(old_ids)} ids from the last build")
+            return None
+        with_ids.extend((verse_id, *row) for verse_id, row in zip(old_ids, rows[start:start + verse_count]))
+        start += verse_count
+    return with_ids
+
+
+def build_database(zip_path, db_path, fast=False, workers=1, full=False):
+    """
+    Parse the archive into the SQLite database. Returns the verse count.
+
+    Rebuilds only changed books when the database carries a manifest from an
+    earlier build, unless `full` is set.
+    """
+    print(f"\n💾 Creating SQLite database at {db_path}...")
+
+    timer = PhaseTimer()
+    conn = sqlite3.connect(db_path)
+    try:
+        if fast:
+            begin_bulk_load(conn)
+        cursor = conn.cursor()
+
+        usfm_files = list_usfm_books(zip_path)
+        print(f"Found {len(usfm_files)} Bible books")
+
+        with timer.phase('hash sources'):
+            hashes = hash_usfm_books(zip_path, usfm_files)
+
+        plan = None if full else plan_incremental_build(cursor, hashes)
+
+        built = {}
+        if plan is not None:
+            # Changed books are parsed before anything is removed, so a book
+            # that no longer fits its old ids can still fall back to a full build
+            to_build, removed = plan
+            manifest = read_manifest(cursor)
+            if to_build:
+                print("📝 Parsing changed books...\n")
+            with timer.phase('parse'):
+                parsed = list(iter_verse_rows_parallel(zip_path, to_build, built, workers) if workers > 1
+                              else iter_verse_rows(zip_path, to_build, built))
+            id_rows = assign_original_ids(cursor, manifest, built, parsed)
+            if id_rows is None:
+                print("♻️  Falling back to a full build to keep verse ids in canonical order")
+                plan = None
+                built = {}
+
+        if plan is None:
+            with timer.phase('schema'):
+                create_schema(cursor)
+                ensure_manifest(cursor)
+                cursor.execute('DELETE FROM build_manifest')
+            to_build = usfm_files
+        else:
+            skipped = len(usfm_files) - len(to_build)
+            print(f"♻️  Incremental build: {len(to_build)} changed, {len(removed)} removed, "
+                  f"{skipped} unchanged books kept")
+            with timer.phase('remove stale books'):
+                ensure_theme_tables(cursor)
+                for usfm_file in to_build + removed:
+                    if usfm_file in manifest:
+                        remove_book(cursor, manifest[usfm_file][0])
+                cursor.executemany('DELETE FROM build_manifest WHERE source_file = ?',
+                                   [(f,) for f in removed])
+
+        if plan is None:
+            print("📝 Parsing and inserting verses...\n")
+            if workers > 1:
+                rows = iter_verse_rows_parallel(zip_path, to_build, built, workers)
+            else:
+                rows = iter_verse_rows(zip_path, to_build, built)
+            with timer.phase('parse + insert'):
+                insert_batches(cursor, INSERT_VERSE_SQL, rows)
+        else:
+            with timer.phase('insert'):
+                insert_batches(cursor, INSERT_VERSE_WITH_ID_SQL, id_rows)
+
+        with timer.phase('full-text index'):
+            if plan is None:
+                # Populate FTS index from the content table
+                print("\n🔍 Building full-text search index...")
+                cursor.execute("INSERT INTO verses_fts(verses_fts) VALUES('rebuild')")
+            elif built:
+                print("\n🔍 Updating full-text search index...")
+                for book_name, _ in built.values():
+                    cursor.execute('''
+                        INSERT INTO verses_fts(rowid, text)
+                        SELECT id, text FROM verses WHERE book = ?
+                    ''', (book_name,))
+
+        if plan is None:
+            print("🔍 Creating indexes...")
+            with timer.phase('indexes'):
+                create_indexes(cursor)
+
+        record_manifest(cursor, [
+            (usfm_file, book_name, hashes[usfm_file], PARSER_VERSION, verse_count)
+            for usfm_file, (book_name, verse_count) in built.items()
+        ])
         conn.commit()
 
-        # Verify
+        if fast:
+            end_bulk_load(conn)
+            print("🧹 Analyzing and compacting...")
+            with timer.phase('analyze + vacuum'):
+                finalize_database(conn)
+
         cursor.execute('SELECT COUNT(*) FROM verses')
         total = cursor.fetchone()[0]
+    finally:
+        conn.close()
 
-        cursor.execute('SELECT COUNT(DISTINCT book) FROM verses')
-        books = cursor.fetchone()[0]
+    timer.report()
+    return total
+
+
+def print_statistics(db_path):
+    """Print verse/book counts and file size of the finished database"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT COUNT(*) FROM verses')
+    total = cursor.fetchone()[0]
+
+    cursor.execute('SELECT COUNT(DISTINCT book) FROM verses')
+    books = cursor.fetchone()[0]
+
+    conn.close()
+
+    print(f"\n✅ Complete!")
+    print(f"📊 Statistics:")
+    print(f"   - Total verses: {total}")
+    print(f"   - Bible books: {books}")
+    print(f"   - Translation: World English Bible (WEB)")
+    print(f"📍 Location: {db_path}")
+
+    size_mb = os.path.getsize(db_path) / (1024 * 1024)
+    print(f"💾 Database size: {size_mb:.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the WEB SQLite database from USFM")
+    parser.add_argument('--source', default=WEB_USFM_URL,
+                        help="USFM zip URL or local path (default: ebible.org engwebp)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Output SQLite database path")
+    parser.add_argument('--fast', action='store_true',
+                        help="Bulk-load profile: unjournaled load, ANALYZE/optimize/VACUUM at the end")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Parse books in N processes (default: 1, in-process)")
+    parser.add_argument('--full', action='store_true',
+                        help="Drop and rebuild every book instead of only changed ones")
+    parser.add_argument('--sha256', help="Expected SHA-256 of the source archive")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    print("📖 Downloading World English Bible (WEB) from ebible.org...")
+
+    try:
+        if os.path.exists(args.source):
+            zip_path = args.source
+        else:
+            zip_path = cache_from_args(args).fetch(args.source, sha256=args.sha256)
+
+        print("📦 Reading USFM files...")
+        build_database(zip_path, args.db, fast=args.fast, workers=args.workers, full=args.full)
+        print_statistics(args.db)
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
 
-        conn.close()
 
-        print(f"\n✅ Complete!")
-        print(f"📊 Statistics:")
-        print(f"   - Total verses: {total}")
-        print(f"   - Bible books: {books}")
-        print(f"   - Translation: World English Bible (WEB)")
-        print(f"📍 Location: {db_path}")
-
-        # Show database size
-        import os
-        size_mb = os.path.getsize(db_path) / (1024 * 1024)
-        print(f"💾 Database size: {size_mb:.2f} MB")
-
-except Exception as e:
-    print(f"❌ Error: {e}")
-    import traceback
-    traceback.print_exc()
-    exit(1)
+if __name__ == "__main__":
+    main()
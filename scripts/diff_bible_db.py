@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Row-level delta packs between two Bible database builds
+
+Compares the verse table of two builds (the legacy `verses` table of
+assets/bible.db, or `bible_verses`) and writes a gzipped SQL patch keyed
+by verse id:
+
+    DELETE FROM verses WHERE id IN (...);                    removed verses
+    INSERT INTO verses (...) VALUES (...), ...;              new verses
+    CREATE TEMP TABLE delta_themes (id, value); ...          changed values,
+    UPDATE verses SET themes = d.value FROM delta_themes d   one column at a time
+        WHERE verses.id = d.id;
+
+Only changed columns of changed rows are shipped, so a theme re-tagging
+run costs the new themes values and nothing else. Each build is
+identified by a content digest of its rows; the deltas manifest chains
+them (parent -> version) so a client on any earlier version can walk the
+chain to the latest one. Every patch is applied to a copy of the old
+build and checked against the new digest before it is recorded.
+
+Usage:
+    python3 diff_bible_db.py old_bible.db ../assets/bible.db
+    python3 diff_bible_db.py old.db new.db --out-dir ../assets/deltas --table bible_verses
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import sys
+
+from export_bible_assets import format_inserts
+
+DEFAULT_OUT_DIR = "../assets/deltas"
+MANIFEST_FORMAT = 1
+BATCH_SIZE = 500
+
+
+def detect_table(conn):
+    """bible_verses if present, else the legacy verses table"""
+    tables = {name for (name,) in conn.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+    for table in ('bible_verses', 'verses'):
+        if table in tables:
+            return table
+    raise ValueError("No bible_verses or verses table")
+
+
+def table_columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({table})')]
+
+
+def content_digest(conn, table, schema='main'):
+    """Short SHA-256 over every row, in id order; identifies a build"""
+    digest = hashlib.sha256()
+    for row in conn.execute(f'SELECT * FROM {schema}.{table} ORDER BY id'):
+        digest.update(repr(row).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def patch_statements(conn, table, columns):
+    """
+    Return (statements, (inserts, updated rows, deletes)) turning
+    main.<table> into new.<table>.
+    """
+    statements = []
+    deleted = [row_id for (row_id,) in conn.execute(
+        f'SELECT id FROM main.{table} WHERE id NOT IN (SELECT id FROM new.{table}) ORDER BY id')]
+    for start in range(0, len(deleted), BATCH_SIZE):
+        ids = ','.join(map(str, deleted[start:start + BATCH_SIZE]))
+        statements.append(f'DELETE FROM {table} WHERE id IN ({ids});')
+
+    inserted = conn.execute(
+        f'SELECT COUNT(*) FROM new.{table} WHERE id NOT IN (SELECT id FROM main.{table})').fetchone()[0]
+    rows = conn.execute(
+        f'SELECT {", ".join(columns)} FROM new.{table} WHERE id NOT IN (SELECT id FROM main.{table}) ORDER BY id')
+    statements.extend(format_inserts(table, columns, rows, BATCH_SIZE))
+
+    updated = set()
+    for column in columns:
+        if column == 'id':
+            continue
+        changes = conn.execute(f'''
+            SELECT n.id, n.{column} FROM new.{table} n JOIN main.{table} o ON o.id = n.id
+            WHERE n.{column} IS NOT o.{column} ORDER BY n.id
+        ''').fetchall()
+        if not changes:
+            continue
+        updated.update(row_id for row_id, _ in changes)
+        statements.append(f'CREATE TEMP TABLE delta_{column} (id INTEGER PRIMARY KEY, value);')
+        statements.extend(format_inserts(f'delta_{column}', None, changes, BATCH_SIZE))
+        statements.append(f'UPDATE {table} SET {column} = d.value FROM delta_{column} d '
+                          f'WHERE {table}.id = d.id;')
+        statements.append(f'DROP TABLE delta_{column};')
+
+    return statements, (inserted, len(updated), len(deleted))
+
+
+def build_patch(old_db, new_db, table=None):
+    """Return (patch SQL text, table, old digest, new digest, counts)"""
+    conn = sqlite3.connect(old_db)
+    try:
+        table = table or detect_table(conn)
+        conn.execute('ATTACH DATABASE ? AS new', (new_db,))
+        old_columns = table_columns(conn, 'main', table)
+        columns = table_columns(conn, 'new', table)
+        if old_columns != columns:
+            raise ValueError(f"{table} columns differ: {old_columns} vs {columns}; ship a full build instead")
+
+        statements, counts = patch_statements(conn, table, columns)
+        patch_sql = '\n'.join(['BEGIN TRANSACTION;', *statements, 'COMMIT;']) + '\n'
+        return (patch_sql, table,
+                content_digest(conn, table, 'main'), content_digest(conn, table, 'new'), counts)
+    finally:
+        conn.close()
+
+
+def verify_patch(old_db, patch_sql, table, expected_digest):
+    """Apply the patch to an in-memory copy of the old build and compare digests"""
+    source = sqlite3.connect(old_db)
+    conn = sqlite3.connect(':memory:')
+    source.backup(conn)
+    source.close()
+    conn.executescript(patch_sql)
+    actual = content_digest(conn, table)
+    conn.close()
+    return actual == expected_digest
+
+
+def gzip_bytes(text):
+    """Deterministic gzip (mtime 0) so identical patches hash identically"""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(filename='', mode='wb', fileobj=buffer, compresslevel=9, mtime=0) as gz:
+        gz.write(text.encode('utf-8'))
+    return buffer.getvalue()
+
+
+def load_manifest(path):
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {'format': MANIFEST_FORMAT, 'latest': None, 'versions': []}
+
+
+def record_delta(manifest, old_digest, new_digest, entry):
+    """Append one link to the version chain"""
+    known = {v['version'] for v in manifest['versions']}
+    if old_digest not in known:
+        manifest['versions'].append({'version': old_digest, 'parent': None, 'delta': None})
+    elif manifest['latest'] not in (None, old_digest):
+        print(f"⚠️  Manifest latest is {manifest['latest']}, this delta starts from {old_digest} (branching the chain)")
+    manifest['versions'] = [v for v in manifest['versions'] if v['version'] != new_digest]
+    manifest['versions'].append({'version': new_digest, 'parent': old_digest, 'delta': entry})
+    manifest['latest'] = new_digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a row-level delta pack between two Bible database builds")
+    parser.add_argument('old_db', help="Previous build")
+    parser.add_argument('new_db', help="New build")
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR, help="Directory for delta files and manifest.json")
+    parser.add_argument('--table', help="Verse table to compare (default: bible_verses, else verses)")
+    args = parser.parse_args()
+
+    for path in (args.old_db, args.new_db):
+        if not os.path.exists(path):
+            print(f"❌ Database not found: {path}")
+            sys.exit(1)
+
+    print(f"🔍 Comparing {args.old_db} -> {args.new_db}...")
+    try:
+        patch_sql, table, old_digest, new_digest, (inserts, updates, deletes) = build_patch(
+            args.old_db, args.new_db, args.table)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"   - table: {table}")
+    print(f"   - {inserts:,} inserts, {updates:,} updated rows, {deletes:,} deletes")
+    if old_digest == new_digest:
+        print("✅ Builds are identical, nothing to ship")
+        return
+
+    if not verify_patch(args.old_db, patch_sql, table, new_digest):
+        print("❌ Patched copy does not match the new build")
+        sys.exit(1)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    data = gzip_bytes(patch_sql)
+    name = f"delta_{old_digest}_{new_digest}.sql.gz"
+    with open(os.path.join(args.out_dir, name), 'wb') as f:
+        f.write(data)
+
+    manifest_path = os.path.join(args.out_dir, 'manifest.json')
+    manifest = load_manifest(manifest_path)
+    record_delta(manifest, old_digest, new_digest, {
+        'file': name,
+        'table': table,
+        'bytes': len(data),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'inserts': inserts,
+        'updates': updates,
+        'deletes': deletes,
+    })
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+
+    print(f"✅ {name}: {len(data) / 1024:.1f} KB gzipped (verified against the new build)")
+    print(f"📍 Manifest: {manifest_path} (latest {new_digest})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Content-addressed download cache for Bible source fetches
+
+Downloads are streamed to disk in chunks and stored under their SHA-256:
+
+    <cache_dir>/objects/<sha256>     file contents
+    <cache_dir>/urls.json            {url: sha256}
+
+A cached file is verified against its hash before every use, so a hit
+skips the transfer entirely and a corrupted entry is fetched again.
+Offline mode never touches the network and fails on a miss. A mirror
+(e.g. file:///srv/bible-mirror) is tried before the original URL, using
+the URL's file name.
+
+Usage:
+    from download_cache import DownloadCache
+
+    cache = DownloadCache(offline=True)
+    zip_path = cache.fetch("https://ebible.org/Scriptures/engwebp_usfm.zip")
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import urllib.parse
+import urllib.request
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'BIBLE_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'everyday-christian', 'bible-sources'),
+)
+
+# Bytes copied per read while downloading
+CHUNK_SIZE = 1024 * 1024
+
+
+class DownloadCacheError(Exception):
+    """Raised on offline misses and integrity failures"""
+
+
+def sha256_file(path, chunk_size=CHUNK_SIZE):
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, offline=False, mirror=None):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.index_path = os.path.join(cache_dir, 'urls.json')
+        self.offline = offline
+        self.mirror = mirror.rstrip('/') if mirror else None
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self, index):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def _object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256)
+
+    def _verified(self, sha256):
+        """Return the object path if it exists and matches its hash, else None"""
+        path = self._object_path(sha256)
+        if not os.path.exists(path):
+            return None
+        if sha256_file(path) != sha256:
+            print(f"⚠️  Cached object {sha256[:12]} failed verification, discarding")
+            os.unlink(path)
+            return None
+        return path
+
+    def lookup(self, url, sha256=None):
+        """Return the verified cached path for `url` (or `sha256`) without downloading, or None"""
+        sha256 = sha256 or self._load_index().get(url)
+        return self._verified(sha256) if sha256 else None
+
+    def candidate_urls(self, url):
+        """Mirror location first (by file name), then the original URL"""
+        urls = []
+        if self.mirror:
+            name = os.path.basename(urllib.parse.urlparse(url).path)
+            urls.append(f"{self.mirror}/{name}")
+        urls.append(url)
+        return urls
+
+    def _download(self, url):
+        """Stream `url` into a temporary file in the cache directory. Returns (temp path, sha256)."""
+        digest = hashlib.sha256()
+        tmp = tempfile.NamedTemporaryFile(dir=self.cache_dir, delete=False)
+        try:
+            with urllib.request.urlopen(url) as response, tmp:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            return tmp.name, digest.hexdigest()
+        except BaseException:
+            if os.path.exists(tmp.name):
+                os.unlink(tmp.name)
+            raise
+
+    def fetch(self, url, sha256=None):
+        """
+        Return a local, verified path for `url`.
+
+        With `sha256`, the cache is consulted by content and any download
+        must match it; a mismatching candidate is skipped for the next one.
+        Raises DownloadCacheError on an offline miss or when every candidate
+        fails the hash check (the last candidate's error otherwise).
+        """
+        cached = self.lookup(url, sha256)
+        if cached:
+            print(f"📦 Cache hit: {url}")
+            if sha256:
+                self._remember(url, sha256)
+            return cached
+
+        if self.offline:
+            raise DownloadCacheError(f"Offline mode: {url} is not in the cache ({self.cache_dir})")
+
+        last_error = None
+        for candidate in self.candidate_urls(url):
+            try:
+                print(f"⬇️  Downloading {candidate}...")
+                tmp_path, actual = self._download(candidate)
+            except (OSError, ValueError) as e:
+                print(f"   ↪ {candidate} unavailable: {e}")
+                last_error = e
+                continue
+
+            if sha256 and actual != sha256:
+                # Only the download is dropped; an object other URLs cached under `actual` stays.
+                # A stale mirror copy (matched by file name only) falls through to the next candidate.
+                os.unlink(tmp_path)
+                print(f"   ↪ {candidate} failed the integrity check")
+                last_error = DownloadCacheError(
+                    f"Integrity check failed for {candidate}: expected {sha256}, got {actual}")
+                continue
+            path = self._object_path(actual)
+            os.replace(tmp_path, path)
+            self._remember(url, actual)
+            return path
+
+        raise last_error
+
+    def _remember(self, url, sha256):
+        index = self._load_index()
+        if index.get(url) != sha256:
+            index[url] = sha256
+            self._save_index(index)
+
+
+def add_cache_arguments(parser):
+    """Add the shared --cache-dir/--offline/--mirror options to an ArgumentParser"""
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Download cache directory (default: $BIBLE_CACHE_DIR or ~/.cache/...)")
+    parser.add_argument('--offline', action='store_true',
+                        help="Never touch the network; fail if a source is not cached")
+    parser.add_argument('--mirror', help="Mirror base URL tried first, e.g. file:///srv/bible-mirror")
+
+
+def cache_from_args(args):
+    return DownloadCache(args.cache_dir, offline=args.offline, mirror=args.mirror)
@@ -1,92 +1,169 @@
 #!/usr/bin/env python3
 """
 Download and create World English Bible (WEB) SQLite database
+
+Use --fast for the bulk-load profile (no journal during load, deferred
+indexes, ANALYZE/optimize/VACUUM at the end).
+
+Sources are read by the streaming readers in bible_sources.py, so any
+supported layout (scrollmapper or godlytalias JSON, USFM, OSIS, USX) is
+loaded one verse at a time through the same bulk-insert path. Pass
+--source to build from a local file or another URL (--format overrides
+detection).
+
+Both default JSON sources go through the content-addressed download cache, so
+reruns (and the fallback source) never download twice; --offline and
+--mirror file:///path work as in create_web_bible_db.py.
+
+Usage:
+    python3 download_web_bible.py [--db PATH] [--fast] [--offline] [--mirror URL] [--cache-dir DIR]
+    python3 download_web_bible.py --source eng-web.osis.xml [--format osis]
 """
 
+import argparse
+import os
 import sqlite3
-import urllib.request
-import json
-
-print("📖 Downloading World English Bible (WEB)...")
-
-# Download WEB Bible JSON
-url = "https://raw.githubusercontent.com/scrollmapper/bible_databases/master/bibles/en-web.json"
-try:
-    with urllib.request.urlopen(url) as response:
-        web_data = json.loads(response.read().decode())
-    print(f"✅ Downloaded {len(web_data.get('verses', []))} verses")
-except Exception as e:
-    print(f"❌ Failed to download: {e}")
-    print("\n🔄 Trying alternative source...")
-
-    # Try alternative: https://github.com/unyieldinggrace/BibleData
-    url2 = "https://raw.githubusercontent.com/godlytalias/Bible-Database/master/English/WEB.json"
+import sys
+
+from bible_db import (PhaseTimer, begin_bulk_load, create_theme_schema, drop_indexes,
+                      end_bulk_load, finalize_database, insert_batches)
+from bible_sources import SOURCE_READERS, read_source
+from download_cache import add_cache_arguments, cache_from_args
+
+WEB_JSON_URL = "https://raw.githubusercontent.com/scrollmapper/bible_databases/master/bibles/en-web.json"
+# Alternative: https://github.com/unyieldinggrace/BibleData
+WEB_JSON_FALLBACK_URL = "https://raw.githubusercontent.com/godlytalias/Bible-Database/master/English/WEB.json"
+DEFAULT_DB_PATH = "../assets/bible.db"
+
+INSERT_VERSE_SQL = '''
+    INSERT INTO verses (book, chapter, verse_number, text, translation, reference)
+    VALUES (?, ?, ?, ?, 'WEB', ?)
+'''
+
+
+def download_web_data(cache):
+    """Download WEB Bible JSON, falling back to the alternative source. Returns the cached path."""
     try:
-        with urllib.request.urlopen(url2) as response:
-            web_data = json.loads(response.read().decode())
+        path = cache.fetch(WEB_JSON_URL)
+        print(f"✅ Downloaded WEB JSON")
+        return path
+    except Exception as e:
+        print(f"❌ Failed to download: {e}")
+        print("\n🔄 Trying alternative source...")
+
+    try:
+        path = cache.fetch(WEB_JSON_FALLBACK_URL)
         print(f"✅ Downloaded from alternative source")
+        return path
     except Exception as e2:
         print(f"❌ Alternative also failed: {e2}")
-        exit(1)
-
-# Create SQLite database
-db_path = "../assets/bible.db"
-print(f"\n💾 Creating SQLite database at {db_path}...")
-
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
-
-# Create verses table
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS verses (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        book TEXT NOT NULL,
-        chapter INTEGER NOT NULL,
-        verse_number INTEGER NOT NULL,
-        text TEXT NOT NULL,
-        translation TEXT DEFAULT 'WEB',
-        reference TEXT NOT NULL,
-        themes TEXT
-    )
-''')
-
-# Create FTS table for search
-cursor.execute('''
-    CREATE VIRTUAL TABLE IF NOT EXISTS verses_fts USING fts5(
-        text,
-        content=verses,
-        tokenize='porter ascii'
-    )
-''')
-
-print("📝 Inserting verses...")
-
-# Insert verses
-verse_count = 0
-for verse in web_data.get('verses', web_data.get('resultset', {}).get('row', [])):
-    book = verse.get('book', verse.get('field', [{}])[0].get('value', ''))
-    chapter = verse.get('chapter', verse.get('field', [{}])[1].get('value', 1))
-    verse_num = verse.get('verse', verse.get('field', [{}])[2].get('value', 1))
-    text = verse.get('text', verse.get('field', [{}])[3].get('value', ''))
-
-    reference = f"{book} {chapter}:{verse_num}"
-
-    cursor.execute('''
-        INSERT INTO verses (book, chapter, verse_number, text, translation, reference)
-        VALUES (?, ?, ?, ?, 'WEB', ?)
-    ''', (book, chapter, verse_num, text, reference))
-
-    verse_count += 1
-    if verse_count % 1000 == 0:
-        print(f"  {verse_count} verses inserted...")
-
-# Create indexes
-print("\n🔍 Creating indexes...")
-cursor.execute('CREATE INDEX IF NOT EXISTS idx_book_chapter ON verses(book, chapter)')
-cursor.execute('CREATE INDEX IF NOT EXISTS idx_reference ON verses(reference)')
-
-conn.commit()
-conn.close()
-
-print(f"\n✅ Complete! {verse_count} verses in WEB SQLite database")
-print(f"📍 Location: {db_path}")
+        sys.exit(1)
+
+
+def iter_verse_rows(verses):
+    """Turn normalized source verses into insert-ready rows, printing progress every 1000 verses"""
+    verse_count = 0
+    for verse in verses:
+        reference = f"{verse.book} {verse.chapter}:{verse.verse}"
+        yield verse.book, verse.chapter, verse.verse, verse.text, reference
+
+        verse_count += 1
+        if verse_count % 1000 == 0:
+            print(f"  {verse_count} verses inserted...")
+
+
+def build_database(verses, db_path, fast=False):
+    """Insert an iterable of (book, chapter, verse, text) into the SQLite database. Returns verse count."""
+    print(f"\n💾 Creating SQLite database at {db_path}...")
+
+    timer = PhaseTimer()
+    conn = sqlite3.connect(db_path)
+    try:
+        if fast:
+            begin_bulk_load(conn)
+        cursor = conn.cursor()
+
+        with timer.phase('schema'):
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS verses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    book TEXT NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    verse_number INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    translation TEXT DEFAULT 'WEB',
+                    reference TEXT NOT NULL,
+                    themes TEXT
+                )
+            ''')
+            create_theme_schema(cursor)
+            # Indexes from an earlier run are rebuilt after the load
+            dropped_indexes = drop_indexes(cursor, 'verses') if fast else []
+
+        print("📝 Inserting verses...")
+        with timer.phase('insert'):
+            verse_count = insert_batches(cursor, INSERT_VERSE_SQL, iter_verse_rows(verses))
+
+        # Create FTS table for search, populated from the content table
+        print("\n🔍 Building full-text search index...")
+        with timer.phase('full-text index'):
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS verses_fts USING fts5(
+                    text,
+                    content=verses,
+                    tokenize='porter ascii'
+                )
+            ''')
+            cursor.execute("INSERT INTO verses_fts(verses_fts) VALUES('rebuild')")
+
+        print("🔍 Creating indexes...")
+        with timer.phase('indexes'):
+            for sql in dropped_indexes:
+                cursor.execute(sql)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_book_chapter ON verses(book, chapter)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_reference ON verses(reference)')
+
+        conn.commit()
+
+        if fast:
+            end_bulk_load(conn)
+            print("🧹 Analyzing and compacting...")
+            with timer.phase('analyze + vacuum'):
+                finalize_database(conn)
+    finally:
+        conn.close()
+
+    timer.report()
+    return verse_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the WEB SQLite database from JSON")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Output SQLite database path")
+    parser.add_argument('--fast', action='store_true',
+                        help="Bulk-load profile: unjournaled load, ANALYZE/optimize/VACUUM at the end")
+    parser.add_argument('--source', help="Local file or URL to build from (default: WEB JSON downloads)")
+    parser.add_argument('--format', choices=sorted(SOURCE_READERS),
+                        help="Source layout (default: detected from the file)")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    cache = cache_from_args(args)
+    if args.source:
+        source_path = args.source if os.path.exists(args.source) else cache.fetch(args.source)
+    else:
+        print("📖 Downloading World English Bible (WEB)...")
+        source_path = download_web_data(cache)
+
+    try:
+        verse_count = build_database(read_source(source_path, args.format), args.db, fast=args.fast)
+    except ValueError as e:
+        print(f"❌ Could not read {source_path}: {e}")
+        sys.exit(1)
+
+    print(f"\n✅ Complete! {verse_count} verses in WEB SQLite database")
+    print(f"📍 Location: {args.db}")
+
+
+if __name__ == "__main__":
+    main()
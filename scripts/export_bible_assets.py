@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+Export web delivery assets from a bible_verses database
+
+Reads the output of build_bible_verses_db.py and writes a SQL dump the web
+app can replay directly into bible_verses (no transform pass).
+
+With --fts the dump also carries a pre-built bible_verses_fts index: the
+FTS5 table is created with exactly the definition BibleFtsSetupWeb uses
+(default unicode61 tokenizer, external content bible_verses), populated and
+optimized offline, and its shadow tables (_data, _idx, _docsize, _config)
+are shipped as plain rows together with the sync triggers. Replaying the
+dump leaves a populated index, so BibleFtsSetupWeb.isFtsSetup() is true and
+the client skips tokenizing ~62k verses at startup.
+
+With --image the export is a SQLite database image instead of SQL text:
+the staged database (indexes, ANALYZE statistics and, with --fts, the
+index) is written with VACUUM INTO at --page-size and gzipped. The web
+helper opens it as-is (sqflite's writeDatabaseBytes / sql.js
+`new SQL.Database(bytes)`); nothing is parsed or replayed on the device.
+
+--batch-size N writes N rows per INSERT statement and --compact drops the
+per-row constants (version, language, category) by loading each
+translation through a temp table whose column defaults supply them; the
+whole dump is always one transaction. --measure-batches replays the dump
+in Python's sqlite3 at several batch sizes to pick the fastest setting.
+
+--slim is the smallest replayable profile: books are dictionary-encoded to
+the integer ids of assets/data/bible_books.json, only the cleaned text is
+shipped, ids are implied when contiguous, and version, language and
+`reference` are computed while the rows are copied into bible_verses.
+Strong's numbers are not part of bible_verses; --strongs VERSION SOURCE
+writes them to an optional side pack (verse_strongs(verse_id, position,
+strong_id), position = word index in the shipped text) from an annotated
+source such as the legacy assets/bible.db.
+
+--measure exports every variant and compares payload size (raw and gzip)
+against startup cost: SQL replay (plus the client-side FTS build when the
+index is not shipped) versus opening the image at several page sizes.
+
+Usage:
+    python3 export_bible_assets.py --fts                         # ../assets/bible_verses.sql(.gz) + FTS index
+    python3 export_bible_assets.py --version WEB --out bible_web.sql
+    python3 export_bible_assets.py --image --fts                 # ../assets/bible_verses_web.db(.gz)
+    python3 export_bible_assets.py --batch-size 500 --compact
+    python3 export_bible_assets.py --slim --version WEB --strongs WEB ../assets/bible.db
+    python3 export_bible_assets.py --measure
+    python3 export_bible_assets.py --measure-batches
+"""
+
+import argparse
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from itertools import islice
+
+from bible_db import create_bible_verses_indexes, create_bible_verses_schema
+from bible_sources import BOOK_IDS_BY_NAME, read_annotated_source
+
+DEFAULT_DB_PATH = "../assets/bible_verses.db"
+DEFAULT_OUT_PATH = "../assets/bible_verses.sql"
+DEFAULT_IMAGE_PATH = "../assets/bible_verses_web.db"
+
+# sqlite3.wasm reads whole pages; larger pages mean fewer reads per chapter
+# but more slack per page. --measure sweeps these.
+DEFAULT_PAGE_SIZE = 4096
+MEASURED_PAGE_SIZES = (1024, 4096, 8192, 16384, 65536)
+MEASURED_BATCH_SIZES = (1, 10, 50, 100, 500, 1000, 5000)
+# Fastest setting from --measure-batches; used by --slim unless --batch-size is given
+SLIM_BATCH_SIZE = 500
+
+BIBLE_VERSES_COLUMNS = ('id', 'version', 'book', 'chapter', 'verse', 'text',
+                        'language', 'themes', 'category', 'reference')
+
+# Must match BibleFtsSetupWeb._createFtsTable / _createTriggers
+FTS_TABLE_SQL = '''CREATE VIRTUAL TABLE bible_verses_fts USING fts5(
+  book,
+  chapter UNINDEXED,
+  verse UNINDEXED,
+  text,
+  version UNINDEXED,
+  language UNINDEXED,
+  content='bible_verses',
+  content_rowid='id'
+)'''
+
+FTS_TRIGGERS_SQL = [
+    '''CREATE TRIGGER bible_verses_ai
+AFTER INSERT ON bible_verses BEGIN
+  INSERT INTO bible_verses_fts(rowid, book, chapter, verse, text, version, language)
+  VALUES (new.id, new.book, new.chapter, new.verse, new.text, new.version, new.language);
+END''',
+    '''CREATE TRIGGER bible_verses_ad
+AFTER DELETE ON bible_verses BEGIN
+  DELETE FROM bible_verses_fts WHERE rowid = old.id;
+END''',
+    '''CREATE TRIGGER bible_verses_au
+AFTER UPDATE ON bible_verses BEGIN
+  UPDATE bible_verses_fts
+  SET book=new.book, chapter=new.chapter, verse=new.verse,
+      text=new.text, version=new.version, language=new.language
+  WHERE rowid=new.id;
+END''',
+]
+
+FTS_SHADOW_TABLES = ('bible_verses_fts_data', 'bible_verses_fts_idx',
+                     'bible_verses_fts_docsize', 'bible_verses_fts_config')
+
+
+def sql_literal(value):
+    """Render a Python value as a SQLite literal"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, bytes):
+        return f"X'{value.hex()}'"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def format_inserts(table, columns, rows, batch_size=1):
+    """Yield INSERT statements for `rows`, `batch_size` rows per statement"""
+    column_sql = f"({', '.join(columns)})" if columns else ''
+    separator = ',\n' if batch_size > 1 else ','
+    prefix = f"INSERT INTO {table}{column_sql} VALUES" + ('\n' if batch_size > 1 else '')
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield prefix + separator.join(f"({','.join(map(sql_literal, row))})" for row in batch) + ';'
+
+
+def insert_statements(cursor, table, columns=None, batch_size=1):
+    """Yield INSERTs for every row of `table`, `batch_size` rows per statement"""
+    cursor.execute(f"SELECT {', '.join(columns) if columns else '*'} FROM {table} ORDER BY 1")
+    yield from format_inserts(table, columns, cursor, batch_size)
+
+
+def compact_verse_inserts(conn, batch_size):
+    """
+    Yield bible_verses INSERTs without the per-row constants.
+
+    Rows of each (version, language) go through a temp table whose defaults
+    supply version and language (category is always NULL), then move to
+    bible_verses in one INSERT ... SELECT.
+    """
+    groups = conn.execute(
+        'SELECT version, language FROM bible_verses GROUP BY version, language ORDER BY MIN(id)').fetchall()
+    load_columns = ('id', 'book', 'chapter', 'verse', 'text', 'themes', 'reference')
+    for version, language in groups:
+        yield f'''CREATE TEMP TABLE bible_verses_load (
+  id INTEGER PRIMARY KEY,
+  version TEXT DEFAULT {sql_literal(version)},
+  book TEXT, chapter INTEGER, verse INTEGER, text TEXT,
+  language TEXT DEFAULT {sql_literal(language)},
+  themes TEXT, category TEXT, reference TEXT
+);'''
+        rows = conn.execute(f'''
+            SELECT {', '.join(load_columns)} FROM bible_verses
+            WHERE version = ? AND language = ? ORDER BY id
+        ''', (version, language))
+        yield from format_inserts('bible_verses_load', load_columns, rows, batch_size)
+        yield (f"INSERT INTO bible_verses ({', '.join(BIBLE_VERSES_COLUMNS)}) "
+               f"SELECT {', '.join(BIBLE_VERSES_COLUMNS)} FROM bible_verses_load;")
+        yield 'DROP TABLE bible_verses_load;'
+
+
+def slim_verse_inserts(conn, batch_size):
+    """
+    Yield bible_verses INSERTs in the slim encoding.
+
+    Per translation: a temp book dictionary (bible_books.json id -> name as
+    spelled in that translation) and temp rows of (book id, chapter, verse,
+    text, themes), ids omitted when contiguous; one INSERT ... SELECT then
+    rebuilds the full rows, computing `reference`.
+    """
+    groups = conn.execute(
+        'SELECT version, language FROM bible_verses GROUP BY version, language ORDER BY MIN(id)').fetchall()
+    for version, language in groups:
+        names = [name for (name,) in conn.execute(
+            'SELECT book FROM bible_verses WHERE version = ? GROUP BY book ORDER BY MIN(id)', (version,))]
+        book_ids = {}
+        for name in names:
+            # Books outside bible_books.json get ids after the 66-book canon
+            book_ids[name] = BOOK_IDS_BY_NAME.get(name) or 100 + len(book_ids)
+        first_id, last_id, count = conn.execute(
+            'SELECT MIN(id), MAX(id), COUNT(*) FROM bible_verses WHERE version = ?', (version,)).fetchone()
+        contiguous = last_id - first_id + 1 == count
+
+        yield 'CREATE TEMP TABLE slim_books (id INTEGER PRIMARY KEY, name TEXT);'
+        yield from format_inserts('slim_books', None, sorted((i, n) for n, i in book_ids.items()), batch_size)
+        yield 'CREATE TEMP TABLE slim_verses (id INTEGER PRIMARY KEY, b INTEGER, c INTEGER, v INTEGER, t TEXT, th TEXT);'
+        rows = conn.execute(
+            'SELECT id, book, chapter, verse, text, themes FROM bible_verses WHERE version = ? ORDER BY id', (version,))
+        if contiguous:
+            # rowids 1..n are assigned in insert order
+            id_sql = f's.id + {first_id - 1}'
+            yield from format_inserts('slim_verses', ('b', 'c', 'v', 't', 'th'),
+                                      ((book_ids[b], c, v, t, th) for _, b, c, v, t, th in rows), batch_size)
+        else:
+            id_sql = 's.id'
+            yield from format_inserts('slim_verses', None,
+                                      ((i, book_ids[b], c, v, t, th) for i, b, c, v, t, th in rows), batch_size)
+        yield (f"INSERT INTO bible_verses ({', '.join(BIBLE_VERSES_COLUMNS)}) "
+               f"SELECT {id_sql}, {sql_literal(version)}, b.name, s.c, s.v, s.t, {sql_literal(language)}, s.th, NULL, "
+               f"b.name || ' ' || s.c || ':' || s.v FROM slim_verses s JOIN slim_books b ON b.id = s.b ORDER BY s.id;")
+        yield 'DROP TABLE slim_verses;'
+        yield 'DROP TABLE slim_books;'
+
+
+STRONG_RE = re.compile(r'\bstrong="([^"]+)"')
+ANNOTATED_WORD_RE = re.compile(r'(\S+?)(\|[^\s"|]+="[^"]*"(?:\s[^\s"|]+="[^"]*")*)')
+WORD_KEY_RE = re.compile(r'\W+')
+
+# Shipped words scanned ahead when matching an annotated word; skips the
+# occasional unannotated word without running off the end of the verse
+ALIGN_WINDOW = 8
+
+
+def _word_key(word):
+    return WORD_KEY_RE.sub('', word).lower()
+
+
+def strongs_tokens(annotated, clean):
+    """
+    Yield (position, strong_id) for the annotated words of a verse.
+
+    Positions index the whitespace-separated words of the shipped `clean`
+    text. Annotated words are matched to clean words in order, so text the
+    cleaner dropped (legacy footnotes) is simply skipped.
+    """
+    keys = [_word_key(word) for word in clean.split()]
+    position = 0
+    for match in ANNOTATED_WORD_RE.finditer(annotated):
+        strong = STRONG_RE.search(match.group(2))
+        if not strong:
+            continue
+        key = _word_key(match.group(1))
+        for candidate in range(position, min(position + ALIGN_WINDOW, len(keys))):
+            if keys[candidate] == key:
+                yield candidate, strong.group(1)
+                position = candidate + 1
+                break
+
+
+def export_strongs_pack(source_db, version, annotated_source, out_path, batch_size=500):
+    """Write the optional Strong's side pack for one translation. Returns (sizes, tokens, unmatched verses)."""
+    conn = sqlite3.connect(source_db)
+    verses = {(book, chapter, verse): (verse_id, text) for verse_id, book, chapter, verse, text in conn.execute(
+        'SELECT id, book, chapter, verse, text FROM bible_verses WHERE version = ?', (version,))}
+    conn.close()
+
+    unmatched = tokens = 0
+
+    def rows():
+        nonlocal unmatched, tokens
+        for source_verse in read_annotated_source(annotated_source):
+            target = verses.get((source_verse.book, source_verse.chapter, source_verse.verse))
+            if target is None:
+                unmatched += 1
+                continue
+            verse_id, clean = target
+            for position, strong_id in strongs_tokens(source_verse.text, clean):
+                tokens += 1
+                yield verse_id, position, strong_id
+
+    with open(out_path, 'w', encoding='utf-8') as f:
+        f.write('BEGIN TRANSACTION;\n')
+        f.write('CREATE TABLE IF NOT EXISTS verse_strongs (\n'
+                '  verse_id INTEGER NOT NULL,\n'
+                '  position INTEGER NOT NULL,\n'
+                '  strong_id TEXT NOT NULL,\n'
+                '  PRIMARY KEY (verse_id, position)\n'
+                ') WITHOUT ROWID;\n')
+        for statement in format_inserts('verse_strongs', None, rows(), batch_size):
+            f.write(statement + '\n')
+        f.write('COMMIT;\n')
+
+    return {'sql': os.path.getsize(out_path), 'gz': gzip_file(out_path)}, tokens, unmatched
+
+
+def stage_database(source_db, stage_path, versions=None, fts=False):
+    """Copy the selected translations (ids preserved) into a scratch database, optionally indexing them"""
+    conn = sqlite3.connect(stage_path)
+    cursor = conn.cursor()
+    create_bible_verses_schema(cursor)
+    cursor.execute('ATTACH DATABASE ? AS source', (source_db,))
+    where = ''
+    if versions:
+        where = f"WHERE version IN ({', '.join('?' * len(versions))})"
+    cursor.execute(f'''
+        INSERT INTO bible_verses ({', '.join(BIBLE_VERSES_COLUMNS)})
+        SELECT {', '.join(BIBLE_VERSES_COLUMNS)} FROM source.bible_verses {where} ORDER BY id
+    ''', versions or ())
+    conn.commit()
+    cursor.execute('DETACH DATABASE source')
+
+    if fts:
+        cursor.execute(FTS_TABLE_SQL)
+        cursor.execute("INSERT INTO bible_verses_fts(bible_verses_fts) VALUES('rebuild')")
+        # Merge all segments into one b-tree: smallest payload, fastest queries
+        cursor.execute("INSERT INTO bible_verses_fts(bible_verses_fts) VALUES('optimize')")
+        conn.commit()
+    return conn
+
+
+def iter_dump(conn, fts=False, batch_size=1, compact=False, slim=False):
+    """Yield the statements of the bible_verses (and FTS) dump, all in one transaction"""
+    cursor = conn.cursor()
+    yield 'PRAGMA foreign_keys=OFF;'
+    yield 'BEGIN TRANSACTION;'
+    schema = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'bible_verses'").fetchone()[0]
+    yield schema.strip() + ';'
+    if slim:
+        yield from slim_verse_inserts(conn, batch_size)
+    elif compact:
+        yield from compact_verse_inserts(conn, batch_size)
+    else:
+        yield from insert_statements(cursor, 'bible_verses', BIBLE_VERSES_COLUMNS, batch_size)
+
+    if fts:
+        # Creating the table writes the default _config/_data rows; the
+        # shipped rows replace them
+        yield FTS_TABLE_SQL + ';'
+        for table in FTS_SHADOW_TABLES:
+            for statement in insert_statements(conn.cursor(), table, batch_size=batch_size):
+                yield statement.replace('INSERT INTO', 'INSERT OR REPLACE INTO', 1)
+        for trigger in FTS_TRIGGERS_SQL:
+            yield trigger + ';'
+
+    create_bible_verses_indexes(cursor)
+    for (sql,) in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'bible_verses' AND sql IS NOT NULL"):
+        yield sql.strip() + ';'
+    yield 'COMMIT;'
+
+
+def gzip_file(path):
+    """Write path + '.gz' next to `path`. Returns the compressed size."""
+    with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb', compresslevel=9) as dst:
+        shutil.copyfileobj(src, dst)
+    return os.path.getsize(path + '.gz')
+
+
+def export_dump(source_db, out_path, versions=None, fts=False, compress=True, batch_size=1, compact=False,
+                slim=False):
+    """Write the SQL dump (and a .gz copy). Returns {'sql': bytes, 'gz': bytes}."""
+    with tempfile.TemporaryDirectory() as workdir:
+        conn = stage_database(source_db, os.path.join(workdir, 'stage.db'), versions, fts)
+        try:
+            with open(out_path, 'w', encoding='utf-8') as f:
+                for statement in iter_dump(conn, fts, batch_size, compact, slim):
+                    f.write(statement + '\n')
+        finally:
+            conn.close()
+
+    sizes = {'sql': os.path.getsize(out_path)}
+    if compress:
+        sizes['gz'] = gzip_file(out_path)
+    return sizes
+
+
+def export_image(source_db, out_path, versions=None, fts=False, page_size=DEFAULT_PAGE_SIZE, compress=True):
+    """Write a compacted SQLite image (and a .gz copy). Returns {'db': bytes, 'gz': bytes}."""
+    if os.path.exists(out_path):
+        # VACUUM INTO refuses to overwrite
+        os.unlink(out_path)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        conn = stage_database(source_db, os.path.join(workdir, 'stage.db'), versions, fts)
+        try:
+            if fts:
+                for trigger in FTS_TRIGGERS_SQL:
+                    conn.execute(trigger)
+            create_bible_verses_indexes(conn.cursor())
+            conn.commit()
+            conn.execute('ANALYZE')
+            conn.commit()
+            # A pending page_size applies to the VACUUM INTO target
+            conn.execute(f'PRAGMA page_size={int(page_size)}')
+            conn.execute('VACUUM INTO ?', (out_path,))
+        finally:
+            conn.close()
+
+    sizes = {'db': os.path.getsize(out_path)}
+    if compress:
+        sizes['gz'] = gzip_file(out_path)
+    return sizes
+
+
+def replay_seconds(dump_path, build_fts=False, search=True):
+    """Time replaying a dump into an in-memory database, plus the client's FTS build if asked"""
+    with open(dump_path, encoding='utf-8') as f:
+        script = f.read()
+
+    start = time.perf_counter()
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(script)
+    if build_fts:
+        conn.execute(FTS_TABLE_SQL)
+        conn.execute('''
+            INSERT INTO bible_verses_fts(rowid, book, chapter, verse, text, version, language)
+            SELECT id, book, chapter, verse, text, version, language FROM bible_verses
+        ''')
+        for trigger in FTS_TRIGGERS_SQL:
+            conn.execute(trigger)
+        conn.commit()
+    elapsed = time.perf_counter() - start
+
+    hits = None
+    if search:
+        hits = conn.execute("SELECT COUNT(*) FROM bible_verses_fts WHERE bible_verses_fts MATCH 'love'").fetchone()[0]
+    conn.close()
+    return elapsed, hits
+
+
+def first_query(conn):
+    """What the app runs to render the first screen: one chapter"""
+    return conn.execute(
+        "SELECT verse, text FROM bible_verses WHERE version = ? AND book = ? AND chapter = ? ORDER BY verse",
+        ('WEB', 'John', 3)).fetchall()
+
+
+def sql_load_seconds(gz_path):
+    """Decompress and replay a gzipped dump, then render the first chapter"""
+    start = time.perf_counter()
+    with gzip.open(gz_path, 'rt', encoding='utf-8') as f:
+        script = f.read()
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(script)
+    first_query(conn)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def image_load_seconds(gz_path):
+    """Decompress and open a gzipped image in memory, then render the first chapter"""
+    start = time.perf_counter()
+    with gzip.open(gz_path, 'rb') as f:
+        image = f.read()
+    conn = sqlite3.connect(':memory:')
+    conn.deserialize(image)
+    first_query(conn)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def measure_image(source_db, versions=None, fts=True, runs=3):
+    """Print payload size vs load time for the SQL dump and images at several page sizes"""
+    mb = 1024 * 1024
+    print(f"\n⏱️  SQL replay vs database image{' (with FTS index)' if fts else ''}")
+    print("=" * 78)
+    print(f"{'variant':<22} {'raw MB':>8} {'gzip MB':>8} {'load s':>10}  speedup")
+    print("-" * 78)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'dump.sql')
+        sizes = export_dump(source_db, path, versions, fts=fts)
+        baseline = min(sql_load_seconds(path + '.gz') for _ in range(runs))
+        print(f"{'SQL replay':<22} {sizes['sql'] / mb:>8.2f} {sizes['gz'] / mb:>8.2f} {baseline:>10.3f}  1.0x")
+
+        for page_size in MEASURED_PAGE_SIZES:
+            path = os.path.join(workdir, f'image_{page_size}.db')
+            sizes = export_image(source_db, path, versions, fts=fts, page_size=page_size)
+            seconds = min(image_load_seconds(path + '.gz') for _ in range(runs))
+            print(f"{f'image, {page_size // 1024}K pages':<22} {sizes['db'] / mb:>8.2f} {sizes['gz'] / mb:>8.2f} "
+                  f"{seconds:>10.3f}  {baseline / seconds:.1f}x")
+    print("-" * 78)
+    print(f"load = gunzip + replay/open + first chapter query (best of {runs}, CPython sqlite3 {sqlite3.sqlite_version})")
+
+
+def measure_batches(source_db, versions=None, runs=3):
+    """Print dump size and replay time for each INSERT batch size, plain and compact"""
+    mb = 1024 * 1024
+    print("\n⏱️  Replay time by INSERT batch size")
+    print("=" * 66)
+    print(f"{'batch':>6} {'compact':>8} {'statements':>11} {'sql MB':>8} {'gzip MB':>8} {'replay s':>9}")
+    print("-" * 66)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        best = None
+        for batch_size in MEASURED_BATCH_SIZES:
+            for compact in (False, True):
+                path = os.path.join(workdir, f'batch_{batch_size}_{compact}.sql')
+                sizes = export_dump(source_db, path, versions, batch_size=batch_size, compact=compact)
+                with open(path, encoding='utf-8') as f:
+                    statements = sum(1 for line in f if line.startswith('INSERT'))
+                seconds = min(replay_seconds(path, build_fts=False, search=False)[0] for _ in range(runs))
+                print(f"{batch_size:>6} {'yes' if compact else 'no':>8} {statements:>11,} "
+                      f"{sizes['sql'] / mb:>8.2f} {sizes['gz'] / mb:>8.2f} {seconds:>9.3f}")
+                if best is None or seconds < best[0]:
+                    best = (seconds, batch_size, compact)
+
+    print("-" * 66)
+    seconds, batch_size, compact = best
+    print(f"🏁 Fastest: --batch-size {batch_size}{' --compact' if compact else ''} ({seconds:.3f}s, best of {runs}, "
+          f"CPython sqlite3 {sqlite3.sqlite_version})")
+
+
+def measure(source_db, versions=None, runs=3):
+    """Print payload size vs startup time with and without the shipped FTS index"""
+    mb = 1024 * 1024
+    print("\n⏱️  Shipped FTS vs client-side FTS build")
+    print("=" * 78)
+    print(f"{'variant':<22} {'sql MB':>8} {'gzip MB':>8} {'startup s':>10}  breakdown")
+    print("-" * 78)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {}
+        for label, fts in (('dump + client FTS', False), ('dump with FTS', True)):
+            path = os.path.join(workdir, f'fts_{fts}.sql')
+            sizes = export_dump(source_db, path, versions, fts=fts)
+            timings = [replay_seconds(path, build_fts=not fts) for _ in range(runs)]
+            seconds = min(t for t, _ in timings)
+            results[label] = (sizes, seconds, timings[0][1])
+            detail = 'replay + tokenize every verse' if not fts else 'replay only'
+            print(f"{label:<22} {sizes['sql'] / mb:>8.2f} {sizes['gz'] / mb:>8.2f} {seconds:>10.2f}  {detail}")
+
+    (base_sizes, base_seconds, base_hits), (fts_sizes, fts_seconds, fts_hits) = results.values()
+    print("-" * 78)
+    print(f"gzip payload: {100 * (fts_sizes['gz'] - base_sizes['gz']) / base_sizes['gz']:+.1f}%   "
+          f"startup: {100 * (fts_seconds - base_seconds) / base_seconds:+.1f}% "
+          f"(best of {runs}, CPython sqlite3 {sqlite3.sqlite_version}; sqlite3.wasm is slower, the ratio is what matters)")
+    if base_hits != fts_hits:
+        print(f"❌ Search mismatch: {base_hits} vs {fts_hits} hits for 'love'")
+    else:
+        print(f"✅ Both variants return {fts_hits} hits for 'love'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export web delivery assets from a bible_verses database")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="bible_verses database (build_bible_verses_db.py)")
+    parser.add_argument('--out', help="Output file; a .gz copy is written next to it "
+                                      "(default: ../assets/bible_verses.sql, or bible_verses_web.db with --image)")
+    parser.add_argument('--version', action='append', dest='versions',
+                        help="Translation to export (repeatable, default: all)")
+    parser.add_argument('--fts', action='store_true', help="Ship a pre-built bible_verses_fts index in the dump")
+    parser.add_argument('--image', action='store_true',
+                        help="Export a compacted SQLite database image (VACUUM INTO) instead of a SQL dump")
+    parser.add_argument('--page-size', type=int,
+                        help=f"Page size of the exported image (default: {DEFAULT_PAGE_SIZE})")
+    parser.add_argument('--batch-size', type=int,
+                        help=f"Rows per INSERT statement in the SQL dump (default: 1, {SLIM_BATCH_SIZE} with --slim)")
+    parser.add_argument('--compact', action='store_true',
+                        help="Omit per-row constants (version, language, category) from the SQL dump")
+    parser.add_argument('--slim', action='store_true',
+                        help="Slim profile: integer book ids, clean text only, computed reference (implies batching)")
+    parser.add_argument('--strongs', nargs=2, metavar=('VERSION', 'SOURCE'),
+                        help="Also write a Strong's side pack for VERSION from an annotated source (e.g. ../assets/bible.db)")
+    parser.add_argument('--measure-batches', action='store_true',
+                        help="Report sqlite3 replay time for each INSERT batch size")
+    parser.add_argument('--measure', action='store_true',
+                        help="Compare payload size and startup time across FTS, SQL dump and image variants")
+    args = parser.parse_args()
+
+    # Options that would otherwise be silently ignored
+    if args.image:
+        dump_only = [flag for flag, given in (('--slim', args.slim), ('--compact', args.compact),
+                                              ('--batch-size', args.batch_size is not None)) if given]
+        if dump_only:
+            parser.error(f"{', '.join(dump_only)} {'applies' if len(dump_only) == 1 else 'apply'} "
+                         f"only to the SQL dump, not to --image")
+    elif args.page_size is not None:
+        parser.error("--page-size only applies to --image")
+    if args.slim and args.compact:
+        parser.error("--slim already drops the per-row constants; --compact cannot be combined with it")
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db} (run build_bible_verses_db.py first)")
+        sys.exit(1)
+
+    if args.measure or args.measure_batches:
+        if args.measure:
+            measure(args.db, args.versions)
+            measure_image(args.db, args.versions)
+        if args.measure_batches:
+            measure_batches(args.db, args.versions)
+        return
+
+    print(f"📦 Exporting {', '.join(args.versions) if args.versions else 'all translations'} from {args.db}...")
+    if args.image:
+        out = args.out or DEFAULT_IMAGE_PATH
+        sizes = export_image(args.db, out, args.versions, fts=args.fts,
+                             page_size=args.page_size or DEFAULT_PAGE_SIZE)
+        raw = sizes['db']
+    else:
+        out = args.out or DEFAULT_OUT_PATH
+        batch_size = args.batch_size or (SLIM_BATCH_SIZE if args.slim else 1)
+        sizes = export_dump(args.db, out, args.versions, fts=args.fts,
+                            batch_size=batch_size, compact=args.compact, slim=args.slim)
+        raw = sizes['sql']
+    print(f"✅ {out}: {raw / 1024 / 1024:.1f} MB, {sizes['gz'] / 1024 / 1024:.1f} MB gzipped"
+          f"{' (with pre-built FTS index)' if args.fts else ''}")
+
+    if args.strongs:
+        version, annotated_source = args.strongs
+        pack = f"{os.path.splitext(out)[0]}_strongs_{version.lower()}.sql"
+        print(f"🔤 Writing Strong's side pack for {version} from {annotated_source}...")
+        sizes, tokens, unmatched = export_strongs_pack(args.db, version, annotated_source, pack)
+        print(f"✅ {pack}: {tokens:,} tagged words, {sizes['sql'] / 1024 / 1024:.1f} MB, "
+              f"{sizes['gz'] / 1024 / 1024:.1f} MB gzipped")
+        if unmatched:
+            print(f"⚠️  {unmatched} source verses had no {version} row")
+
+
+if __name__ == "__main__":
+    main()
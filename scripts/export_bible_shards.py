@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Export lazy-loadable Bible shards with a manifest
+
+Splits each translation of a bible_verses database into per-book or
+per-testament shards, so the web client can fetch Psalms or the Gospels
+first and stream the rest in the background. Every shard is a
+self-contained gzipped SQL file (CREATE TABLE IF NOT EXISTS + INSERTs,
+ids preserved) written deterministically (gzip mtime 0), so rebuilding
+unchanged data yields byte-identical files and hashes.
+
+manifest.json:
+
+    {
+      "format": 1,
+      "granularity": "book",
+      "translations": {
+        "WEB": {
+          "language": "en",
+          "verse_count": 31103,
+          "shards": [
+            {"file": "WEB/01-genesis.sql.gz", "books": ["Genesis"],
+             "testament": "Old Testament", "verse_count": 1533,
+             "first_id": 1, "last_id": 1533,
+             "bytes": 181234, "raw_bytes": 905521, "sha256": "..."}
+          ]
+        }
+      }
+    }
+
+--verify re-checks a manifest offline: file sizes and hashes, that each
+shard replays to exactly its verse count and id range, that shards do not
+overlap, and that together they reproduce the source rows.
+
+Usage:
+    # from the legacy asset database, fully offline
+    python3 build_bible_verses_db.py --translation WEB en ../assets/bible.db --db /tmp/web.db
+    python3 export_bible_shards.py --db /tmp/web.db --out-dir /tmp/shards
+    python3 export_bible_shards.py --verify /tmp/shards/manifest.json --db /tmp/web.db
+
+    python3 export_bible_shards.py --db ../assets/bible_verses.db --out-dir ../assets/shards
+    python3 export_bible_shards.py --granularity testament
+    python3 export_bible_shards.py --verify ../assets/shards/manifest.json --db ../assets/bible_verses.db
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+
+from export_bible_assets import BIBLE_VERSES_COLUMNS, DEFAULT_DB_PATH, insert_statements
+
+DEFAULT_OUT_DIR = "../assets/shards"
+BOOKS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assets', 'data', 'bible_books.json')
+MANIFEST_FORMAT = 1
+
+
+def load_books():
+    """Return {english or spanish name: book} from bible_books.json"""
+    with open(BOOKS_JSON, encoding='utf-8') as f:
+        books = json.load(f)['books']
+    by_name = {}
+    for book in books:
+        by_name[book['englishName']] = book
+        by_name[book['spanishName']] = book
+    return by_name
+
+
+def slug(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def plan_shards(conn, version, granularity, books):
+    """
+    Return the shards of one translation in canonical order.
+
+    Each shard is a dict with books, testament, and the id range of its verses.
+    """
+    rows = conn.execute('''
+        SELECT book, MIN(id), MAX(id), COUNT(*)
+        FROM bible_verses WHERE version = ? GROUP BY book
+    ''', (version,)).fetchall()
+
+    def book_id(name):
+        # Books outside the 66-book canon sort last, in id order
+        return books[name]['id'] if name in books else 99
+
+    rows.sort(key=lambda r: (book_id(r[0]), r[1]))
+
+    shards = []
+    for book, first_id, last_id, count in rows:
+        info = books.get(book)
+        testament = info['testament'] if info else 'Other'
+        if granularity == 'testament' and shards and shards[-1]['testament'] == testament:
+            shard = shards[-1]
+            shard['books'].append(book)
+            shard['first_id'] = min(shard['first_id'], first_id)
+            shard['last_id'] = max(shard['last_id'], last_id)
+            shard['verse_count'] += count
+            continue
+        # File names use the English name so every translation shards alike
+        english = info['englishName'] if info else book
+        name = f"{book_id(book):02d}-{slug(english)}" if granularity == 'book' else slug(testament)
+        shards.append({
+            'name': name,
+            'books': [book],
+            'testament': testament,
+            'verse_count': count,
+            'first_id': first_id,
+            'last_id': last_id,
+        })
+    return shards
+
+
+def write_shard(conn, path, version, shard_books):
+    """Write one deterministic gzipped SQL shard. Returns (gz bytes, raw bytes, sha256)."""
+    schema = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'bible_verses'").fetchone()[0]
+    schema = schema.strip().replace('CREATE TABLE bible_verses', 'CREATE TABLE IF NOT EXISTS bible_verses', 1)
+
+    placeholders = ', '.join('?' * len(shard_books))
+    conn.execute('DROP TABLE IF EXISTS temp.shard_rows')
+    conn.execute(f'''
+        CREATE TEMP TABLE shard_rows AS
+        SELECT {', '.join(BIBLE_VERSES_COLUMNS)} FROM bible_verses
+        WHERE version = ? AND book IN ({placeholders}) ORDER BY id
+    ''', (version, *shard_books))
+
+    buffer = io.BytesIO()
+    raw_bytes = 0
+    with gzip.GzipFile(filename='', mode='wb', fileobj=buffer, compresslevel=9, mtime=0) as gz:
+        def write(line):
+            nonlocal raw_bytes
+            data = (line + '\n').encode('utf-8')
+            raw_bytes += len(data)
+            gz.write(data)
+
+        write('BEGIN TRANSACTION;')
+        write(schema + ';')
+        for statement in insert_statements(conn.cursor(), 'temp.shard_rows', BIBLE_VERSES_COLUMNS):
+            write(statement.replace('INSERT INTO temp.shard_rows', 'INSERT INTO bible_verses', 1))
+        write('COMMIT;')
+    conn.execute('DROP TABLE temp.shard_rows')
+
+    data = buffer.getvalue()
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data), raw_bytes, hashlib.sha256(data).hexdigest()
+
+
+def export_shards(db_path, out_dir, granularity='book', versions=None):
+    """Write every shard and manifest.json. Returns the manifest."""
+    books = load_books()
+    conn = sqlite3.connect(db_path)
+    try:
+        translations = conn.execute('''
+            SELECT version, language, COUNT(*) FROM bible_verses
+            GROUP BY version, language ORDER BY MIN(id)
+        ''').fetchall()
+        manifest = {'format': MANIFEST_FORMAT, 'granularity': granularity, 'translations': {}}
+
+        for version, language, verse_count in translations:
+            if versions and version not in versions:
+                continue
+            os.makedirs(os.path.join(out_dir, version), exist_ok=True)
+            entries = []
+            for shard in plan_shards(conn, version, granularity, books):
+                relative = f"{version}/{shard.pop('name')}.sql.gz"
+                size, raw_size, sha256 = write_shard(conn, os.path.join(out_dir, relative), version, shard['books'])
+                entries.append({'file': relative, **shard, 'bytes': size, 'raw_bytes': raw_size, 'sha256': sha256})
+            manifest['translations'][version] = {
+                'language': language,
+                'verse_count': verse_count,
+                'shards': entries,
+            }
+            total = sum(e['bytes'] for e in entries)
+            print(f"  ✅ {version}: {len(entries)} shards, {verse_count:,} verses, {total / 1024 / 1024:.2f} MB gzipped")
+    finally:
+        conn.close()
+
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    return manifest
+
+
+def rows_digest(rows):
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(repr(row).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def verify_manifest(manifest_path, db_path=None):
+    """Check every shard against the manifest (and the source database). Returns the list of problems."""
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    base = os.path.dirname(manifest_path)
+    source = sqlite3.connect(db_path) if db_path else None
+    problems = []
+    columns = ', '.join(BIBLE_VERSES_COLUMNS)
+
+    for version, translation in manifest['translations'].items():
+        covered = 0
+        previous_last = 0
+        for shard in translation['shards']:
+            label = shard['file']
+            path = os.path.join(base, shard['file'])
+            if not os.path.exists(path):
+                problems.append(f"{label}: missing")
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) != shard['bytes']:
+                problems.append(f"{label}: {len(data)} bytes, manifest says {shard['bytes']}")
+            if hashlib.sha256(data).hexdigest() != shard['sha256']:
+                problems.append(f"{label}: sha256 mismatch")
+                continue
+
+            conn = sqlite3.connect(':memory:')
+            try:
+                conn.executescript(gzip.decompress(data).decode('utf-8'))
+            except (OSError, EOFError, UnicodeDecodeError, sqlite3.Error) as e:
+                problems.append(f"{label}: does not replay ({e})")
+                conn.close()
+                continue
+            count, first_id, last_id = conn.execute('SELECT COUNT(*), MIN(id), MAX(id) FROM bible_verses').fetchone()
+            if (count, first_id, last_id) != (shard['verse_count'], shard['first_id'], shard['last_id']):
+                problems.append(f"{label}: holds {count} verses {first_id}-{last_id}, manifest says "
+                                f"{shard['verse_count']} verses {shard['first_id']}-{shard['last_id']}")
+            if first_id is not None and first_id <= previous_last:
+                problems.append(f"{label}: id range overlaps the previous shard")
+            previous_last = max(previous_last, last_id or 0)
+            covered += count
+
+            if source:
+                placeholders = ', '.join('?' * len(shard['books']))
+                expected = source.execute(f'''
+                    SELECT {columns} FROM bible_verses WHERE version = ? AND book IN ({placeholders}) ORDER BY id
+                ''', (version, *shard['books']))
+                actual = conn.execute(f'SELECT {columns} FROM bible_verses ORDER BY id')
+                if rows_digest(expected) != rows_digest(actual):
+                    problems.append(f"{label}: rows differ from {db_path}")
+            conn.close()
+
+        if covered != translation['verse_count']:
+            problems.append(f"{version}: shards hold {covered} verses, manifest says {translation['verse_count']}")
+        if source:
+            (expected_count,) = source.execute(
+                'SELECT COUNT(*) FROM bible_verses WHERE version = ?', (version,)).fetchone()
+            if covered != expected_count:
+                problems.append(f"{version}: shards hold {covered} verses, {db_path} has {expected_count}")
+
+    if source:
+        source.close()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export per-book or per-testament Bible shards with a manifest")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="bible_verses database (build_bible_verses_db.py)")
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR, help="Directory for shards and manifest.json")
+    parser.add_argument('--granularity', choices=('book', 'testament'), default='book')
+    parser.add_argument('--version', action='append', dest='versions',
+                        help="Translation to export (repeatable, default: all)")
+    parser.add_argument('--verify', metavar='MANIFEST',
+                        help="Verify an existing manifest (against --db when it exists) instead of exporting")
+    args = parser.parse_args()
+
+    if args.verify:
+        db_path = args.db if os.path.exists(args.db) else None
+        print(f"🔍 Verifying {args.verify}{f' against {db_path}' if db_path else ''}...")
+        problems = verify_manifest(args.verify, db_path)
+        for problem in problems:
+            print(f"  ❌ {problem}")
+        if problems:
+            sys.exit(1)
+        print("✅ All shards match the manifest")
+        return
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db} (run build_bible_verses_db.py first)")
+        sys.exit(1)
+
+    print(f"📦 Sharding {args.db} by {args.granularity} into {args.out_dir}...")
+    export_shards(args.db, args.out_dir, args.granularity, args.versions)
+    print(f"📍 Manifest: {os.path.join(args.out_dir, 'manifest.json')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Persistent response cache for the LLM-backed tools
+
+Messages API responses are stored in a SQLite database keyed by
+
+    sha256(model, normalized prompt, generation parameters)
+
+where the prompt is normalized so that whitespace-only differences (line
+endings, trailing spaces, surrounding blank lines) hit the same entry.
+A rerun after a crash, or a second run over the same input, replays the
+stored responses instead of paying for them again.
+
+Entries older than the TTL are evicted, and the least recently used ones
+go when the cache grows past its size limit. --cache-only never calls the
+API and fails on a miss, so a run can be replayed completely offline from
+recorded responses.
+
+Usage:
+    from llm_cache import ResponseCache, message_text
+
+    cache = ResponseCache(cache_only=True)
+    text = message_text(client, dict(model=..., max_tokens=4000, messages=[...]), cache)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    'LLM_CACHE_DB',
+    os.path.join(os.path.expanduser('~'), '.cache', 'everyday-christian', 'llm_responses.db'),
+)
+DEFAULT_TTL_DAYS = 90
+DEFAULT_MAX_MB = 256
+
+
+class LLMCacheError(Exception):
+    """Raised on cache misses in cache-only mode"""
+
+
+def normalize_prompt(text):
+    """Prompt text with line endings, trailing spaces and surrounding blank lines normalized"""
+    return '\n'.join(line.rstrip() for line in text.replace('\r\n', '\n').strip().split('\n'))
+
+
+def _normalize_content(content):
+    if isinstance(content, str):
+        return normalize_prompt(content)
+    if isinstance(content, list):
+        return [_normalize_content(part) for part in content]
+    if isinstance(content, dict):
+        return {key: _normalize_content(value) if key in ('text', 'content') else value
+                for key, value in content.items()}
+    return content
+
+
+def cache_key(request):
+    """Return (key, prompt hash) for a Messages API request dict"""
+    prompt = {
+        'system': _normalize_content(request.get('system')),
+        'messages': [{'role': message['role'], 'content': _normalize_content(message['content'])}
+                     for message in request.get('messages', [])],
+    }
+    prompt_hash = hashlib.sha256(json.dumps(prompt, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+    params = {name: value for name, value in request.items() if name not in ('model', 'messages', 'system')}
+    key_source = json.dumps({'model': request.get('model'), 'prompt': prompt_hash, 'params': params},
+                            sort_keys=True)
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest(), prompt_hash
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS, max_mb=DEFAULT_MAX_MB,
+                 cache_only=False):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400 if ttl_days else None
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        self.cache_only = cache_only
+        self.hits = 0
+        self.misses = 0
+        # The taggers call the API from worker threads
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    prompt_hash TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)')
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection, committed and closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, request):
+        """Cached response text for a request, or None (expired entries count as misses)"""
+        key, _ = cache_key(request)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute('SELECT response, created FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                return None
+            conn.execute('UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?', (now, key))
+        return row[0]
+
+    def put(self, request, response):
+        key, prompt_hash = cache_key(request)
+        params = {name: value for name, value in request.items() if name not in ('model', 'messages', 'system')}
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)', (
+                key, request.get('model'), prompt_hash, json.dumps(params, sort_keys=True), response,
+                len(response.encode('utf-8')), now, now))
+            self._evict(conn, now)
+
+    def discard(self, request):
+        """Drop a cached response the caller could not use (e.g. invalid JSON)"""
+        key, _ = cache_key(request)
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def _evict(self, conn, now):
+        if self.ttl_seconds:
+            conn.execute('DELETE FROM responses WHERE created < ?', (now - self.ttl_seconds,))
+        if self.max_bytes:
+            total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM responses').fetchone()[0]
+            if total > self.max_bytes:
+                # Least recently used first, until the cache fits again
+                doomed, freed = [], 0
+                for key, size in conn.execute('SELECT key, bytes FROM responses ORDER BY last_used'):
+                    if total - freed <= self.max_bytes:
+                        break
+                    doomed.append((key,))
+                    freed += size
+                conn.executemany('DELETE FROM responses WHERE key = ?', doomed)
+
+    def complete(self, client, request):
+        """Response text for a request: from the cache, else from the API (stored for next time)"""
+        cached = self.get(request)
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return cached
+        if self.cache_only:
+            raise LLMCacheError(f"Cache-only mode: no cached response for this request ({self.path})")
+        text = client.messages.create(**request).content[0].text
+        self.put(request, text)
+        return text
+
+    def summary(self):
+        return f"📦 LLM cache: {self.hits} hits, {self.misses} misses ({self.path})"
+
+
+def message_text(client, request, cache=None):
+    """First text block of a Messages API response, through the cache when one is given"""
+    if cache is not None:
+        return cache.complete(client, request)
+    return client.messages.create(**request).content[0].text
+
+
+def add_cache_arguments(parser):
+    """Add the shared --cache-db/--cache-only/--no-cache/--cache-ttl-days/--cache-max-mb options"""
+    parser.add_argument('--cache-db', default=DEFAULT_CACHE_PATH,
+                        help="LLM response cache (default: $LLM_CACHE_DB or ~/.cache/...)")
+    parser.add_argument('--cache-only', action='store_true',
+                        help="Replay cached responses only; never call the API, fail on a miss")
+    parser.add_argument('--no-cache', action='store_true', help="Call the API without reading or writing the cache")
+    parser.add_argument('--cache-ttl-days', type=float, default=DEFAULT_TTL_DAYS,
+                        help="Expire cached responses after this many days (0: never)")
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_MB,
+                        help="Evict least recently used responses past this size (0: unlimited)")
+
+
+def cache_from_args(args):
+    """ResponseCache for the parsed options, or None with --no-cache"""
+    if args.no_cache:
+        if args.cache_only:
+            raise SystemExit("❌ --cache-only and --no-cache cannot be combined")
+        return None
+    return ResponseCache(args.cache_db, ttl_days=args.cache_ttl_days, max_mb=args.cache_max_mb,
+                         cache_only=args.cache_only)
@@ -2,8 +2,17 @@
 """
 Spanish Localization Agent for Everyday Christian App
 Uses Claude Code session credentials for AI-powered translation
+
+Translation responses go through the persistent LLM response cache
+(llm_cache.py): rerunning over unchanged strings is instant and free, and
+--cache-only replays the recorded translation without an API key.
+
+Usage:
+    python3 scripts/localize_agent.py
+    python3 scripts/localize_agent.py --cache-only
 """
 
+import argparse
 import os
 import json
 import re
@@ -11,24 +20,35 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Set
 
+from llm_cache import add_cache_arguments, cache_from_args, message_text
+
 try:
     from anthropic import Anthropic
 except ImportError:
-    print("❌ Error: anthropic package not installed")
-    print("Install it with: pip install anthropic")
-    sys.exit(1)
+    # Only needed when responses are not replayed from the cache
+    Anthropic = None
 
 
 class LocalizationAgent:
-    def __init__(self):
+    def __init__(self, cache=None):
         self.project_root = Path(__file__).parent.parent
         self.lib_dir = self.project_root / "lib"
         self.l10n_dir = self.project_root / "lib" / "l10n"
         self.extracted_strings: Dict[str, str] = {}
+        self.cache = cache
         self.client = self._init_anthropic_client()
 
     def _init_anthropic_client(self) -> Anthropic:
         """Initialize Anthropic client using API key from environment"""
+        if self.cache and self.cache.cache_only:
+            print("📼 Cache-only mode: replaying recorded responses, no API calls")
+            return None
+
+        if Anthropic is None:
+            print("❌ Error: anthropic package not installed")
+            print("Install it with: pip install anthropic")
+            sys.exit(1)
+
         # Check for API key in environment
         api_key = os.getenv('ANTHROPIC_API_KEY')
 
@@ -139,23 +159,29 @@ English strings to translate:
 
 Return ONLY a valid JSON object with the same keys but Spanish values. Do not include any explanations or markdown formatting."""
 
-        try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4096,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
+        request = {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 4096,
+            "messages": [{
+                "role": "user",
+                "content": prompt
+            }]
+        }
 
-            spanish_json = response.content[0].text.strip()
+        try:
+            spanish_json = message_text(self.client, request, self.cache).strip()
 
             # Remove markdown code blocks if present
             spanish_json = re.sub(r'```json\n?', '', spanish_json)
             spanish_json = re.sub(r'```\n?', '', spanish_json)
 
-            spanish_strings = json.loads(spanish_json)
+            try:
+                spanish_strings = json.loads(spanish_json)
+            except json.JSONDecodeError:
+                # Don't replay an unusable response on the next run
+                if self.cache:
+                    self.cache.discard(request)
+                raise
             print(f"✅ Translation complete: {len(spanish_strings)} strings translated")
             return spanish_strings
 
@@ -260,11 +286,17 @@ output-class: AppLocalizations
         print(f"   3. Import: import 'package:flutter_gen/gen_l10n/app_localizations.dart';")
         print(f"   4. Use: AppLocalizations.of(context)!.yourKey")
         print(f"   5. Test both languages in the app")
+        if self.cache:
+            print(self.cache.summary())
         print("=" * 60)
 
 
 def main():
-    agent = LocalizationAgent()
+    parser = argparse.ArgumentParser(description="Extract UI strings and translate them to Spanish with Claude")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    agent = LocalizationAgent(cache_from_args(args))
     agent.run()
 
 
@@ -4,12 +4,28 @@ Theme-to-Verse Mapping Script
 Maps 75 themes to 25 relevant Bible verses each (1,875 total mappings)
 
 Uses keyword matching and manual curation for theological accuracy.
+
+Verses are ranked with BM25 over clean_text (theme_scoring.py): the corpus
+is tokenized once and every (verse, theme) score comes from one sparse
+matrix product, so all themes are mapped in about a second. Keywords match
+their simple inflections (pray -> prayed, praying). numpy and scipy are
+optional (pip install numpy scipy); without them, or with --scoring like,
+the original per-keyword LIKE search is used.
+
+Usage:
+    python3 map_themes_to_verses.py
+    python3 map_themes_to_verses.py --scoring tfidf --db ../assets/bible.db
 """
 
+import argparse
 import sqlite3
 import json
-import re
-from collections import defaultdict
+import time
+
+from theme_scoring import ThemeScorer, scoring_available
+
+# Verses kept per theme
+VERSES_PER_THEME = 25
 
 # Theme keyword mappings for verse search
 THEME_KEYWORDS = {
@@ -153,9 +169,30 @@ def search_verses_for_theme(cursor, theme_name, keywords, limit=50):
                 'match_score': score
             })
 
-    return unique_results[:25]  # Return top 25 verses
+    return unique_results[:VERSES_PER_THEME]  # Return top 25 verses
 
-def create_theme_verse_mappings(db_path, output_path):
+def score_theme_verses(cursor, method='bm25'):
+    """
+    Rank verses for every theme with one BM25/TF-IDF scoring pass.
+    Returns {theme: [verse dicts]} in the search_verses_for_theme format.
+    """
+    verses = cursor.execute("SELECT id, reference, clean_text FROM verses ORDER BY id").fetchall()
+    scorer = ThemeScorer([clean_text for _, _, clean_text in verses], THEME_KEYWORDS, method=method, inflect=True)
+
+    results = {}
+    for theme_name in THEME_KEYWORDS:
+        results[theme_name] = [
+            {
+                'verse_id': verses[row][0],
+                'reference': verses[row][1],
+                'text': verses[row][2],
+                'match_score': round(score, 3)
+            }
+            for row, score in scorer.top_verses(theme_name, VERSES_PER_THEME)
+        ]
+    return results
+
+def create_theme_verse_mappings(db_path, output_path, scoring='bm25'):
     """Create mappings for all 75 themes"""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
@@ -164,10 +201,16 @@ def create_theme_verse_mappings(db_path, output_path):
 
     print("🔍 Mapping themes to Bible verses...\n")
 
+    start = time.perf_counter()
+    scored = score_theme_verses(cursor, scoring) if scoring != 'like' else None
+
     for theme_name, keywords in THEME_KEYWORDS.items():
         print(f"  Processing: {theme_name} ({len(keywords)} keywords)")
 
-        verses = search_verses_for_theme(cursor, theme_name, keywords)
+        if scored is not None:
+            verses = scored[theme_name]
+        else:
+            verses = search_verses_for_theme(cursor, theme_name, keywords)
 
         all_mappings[theme_name] = {
             'theme': theme_name,
@@ -179,6 +222,7 @@ def create_theme_verse_mappings(db_path, output_path):
         print(f"    ✓ Found {len(verses)} verses\n")
 
     conn.close()
+    print(f"⏱️  Scored {len(all_mappings)} themes ({scoring}) in {time.perf_counter() - start:.2f}s")
 
     # Save to JSON
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -224,8 +268,18 @@ def verify_mappings(mappings):
     print("\n" + "="*60)
 
 def main():
-    db_path = "../assets/bible.db"
-    output_path = "../assets/training_data/theme_verse_mappings.json"
+    parser = argparse.ArgumentParser(description="Map themes to their most relevant Bible verses")
+    parser.add_argument('--db', default="../assets/bible.db", help="Bible database with verses.clean_text")
+    parser.add_argument('--out', default="../assets/training_data/theme_verse_mappings.json", help="Output JSON")
+    parser.add_argument('--scoring', choices=('bm25', 'tfidf', 'like'), default='bm25',
+                        help="Verse ranking (like: the original per-keyword LIKE search)")
+    args = parser.parse_args()
+    db_path = args.db
+    output_path = args.out
+    scoring = args.scoring
+    if scoring != 'like' and not scoring_available():
+        print("⚠️  numpy/scipy not installed (pip install numpy scipy); using the LIKE search")
+        scoring = 'like'
 
     print("Theme-to-Verse Mapping Script")
     print("="*60)
@@ -233,7 +287,7 @@ def main():
     print(f"Output: {output_path}\n")
 
     # Create mappings
-    mappings = create_theme_verse_mappings(db_path, output_path)
+    mappings = create_theme_verse_mappings(db_path, output_path, scoring)
 
     # Verify and show samples
     verify_mappings(mappings)
@@ -2,17 +2,46 @@
 """
 Fast Bible Theme Tagger - Tags critical books (Psalms + NT) using Claude API
 Uses batch processing and parallel requests for maximum speed.
+Themes are written to the verse_themes junction (and the derived JSON column).
+
+Before any API call, untagged verses whose nearest already-tagged neighbors
+(hashed n-gram cosine similarity, see theme_propagation.py) agree on their
+themes take those themes directly; only the low-confidence rest is sent to
+the LLM. Verses tagged in an earlier phase seed the later ones.
+--no-propagate sends everything to the API.
+
+API responses go through the persistent response cache (llm_cache.py), so
+a rerun after a crash replays the batches already paid for; --cache-only
+replays recorded responses without calling the API at all.
+
+Usage:
+    python3 scripts/tag_critical_books.py
+    python3 scripts/tag_critical_books.py --min-similarity 0.7 --min-agreement 0.6
+    python3 scripts/tag_critical_books.py --no-propagate
+    python3 scripts/tag_critical_books.py --cache-only
 """
 
+import argparse
 import sqlite3
 import json
 import os
 import sys
-from anthropic import Anthropic
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Tuple
 import time
 
+try:
+    from anthropic import Anthropic
+except ImportError:
+    # Only needed when responses are not replayed from the cache
+    Anthropic = None
+
+from bible_db import ensure_theme_tables, set_verse_themes
+from llm_cache import add_cache_arguments, cache_from_args, message_text
+from theme_propagation import (DEFAULT_K, DEFAULT_MIN_AGREEMENT, DEFAULT_MIN_SIMILARITY, load_corpus,
+                               propagate_themes)
+from theme_scoring import scoring_available
+
 # Available themes (from your app)
 AVAILABLE_THEMES = [
     "hope", "faith", "love", "grace", "mercy", "forgiveness", "redemption",
@@ -29,22 +58,30 @@ AVAILABLE_THEMES = [
 ]
 
 class BibleThemeTagger:
-    def __init__(self, db_path: str, batch_size: int = 50):
+    def __init__(self, db_path: str, batch_size: int = 50, propagate: bool = True,
+                 propagation: Dict[str, float] = None, cache=None):
         self.db_path = db_path
         self.batch_size = batch_size
-        self.client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+        self.cache = cache
+        # Cache-only replays never reach the API
+        self.client = None if cache and cache.cache_only else Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+        self.propagate = propagate
+        # k, min_similarity, min_agreement for propagate_themes
+        self.propagation = propagation or {}
 
     def get_untagged_verses(self, books: List[str]) -> List[Tuple[int, str, str]]:
         """Get all untagged verses from specified books"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        ensure_theme_tables(cursor)
+        conn.commit()
 
         placeholders = ','.join('?' * len(books))
         query = f"""
             SELECT id, reference, text
-            FROM verses
+            FROM verses v
             WHERE book IN ({placeholders})
-            AND (themes IS NULL OR themes = '' OR LENGTH(themes) <= 2)
+            AND NOT EXISTS (SELECT 1 FROM verse_themes vt WHERE vt.verse_id = v.id)
             ORDER BY id
         """
 
@@ -54,7 +91,7 @@ class BibleThemeTagger:
 
         return verses
 
-    def tag_batch(self, verses: List[Tuple[int, str, str]]) -> List[Tuple[int, str]]:
+    def tag_batch(self, verses: List[Tuple[int, str, str]]) -> List[Tuple[int, List[str]]]:
         """Tag a batch of verses using Claude API"""
         # Format batch for Claude
         verse_text = "\n\n".join([
@@ -73,15 +110,15 @@ Be concise - pick the most relevant 1-3 themes per verse.
 Verses:
 {verse_text}"""
 
-        try:
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=4000,
-                messages=[{"role": "user", "content": prompt}]
-            )
+        request = {
+            "model": "claude-3-5-sonnet-20241022",
+            "max_tokens": 4000,
+            "messages": [{"role": "user", "content": prompt}]
+        }
 
+        try:
             # Parse response
-            response_text = message.content[0].text.strip()
+            response_text = message_text(self.client, request, self.cache).strip()
 
             # Extract JSON (might be wrapped in markdown)
             if "```json" in response_text:
@@ -89,24 +126,56 @@ Verses:
             elif "```" in response_text:
                 response_text = response_text.split("```")[1].split("```")[0].strip()
 
-            results = json.loads(response_text)
-
-            # Convert to (id, json_themes) tuples
-            return [(r["id"], json.dumps(r["themes"])) for r in results]
+            try:
+                results = json.loads(response_text)
+                if not isinstance(results, list):
+                    raise ValueError(f"expected a JSON array, got {type(results).__name__}")
+                # Convert to (id, themes) tuples
+                tagged = [(r["id"], r["themes"]) for r in results]
+                batch_ids = {v[0] for v in verses}
+                for verse_id, themes in tagged:
+                    # bool is an int subclass; true/false is never a verse id
+                    if isinstance(verse_id, bool) or not isinstance(verse_id, int) or verse_id not in batch_ids:
+                        raise ValueError(f"result id {verse_id!r} is not a verse of this batch")
+                    if not isinstance(themes, list) or not all(isinstance(theme, str) for theme in themes):
+                        raise ValueError(f"verse {verse_id} needs a list of theme names, got {themes!r}")
+            except (ValueError, KeyError, TypeError):
+                # Don't replay an unusable response on the next run
+                # (json.JSONDecodeError is a ValueError)
+                if self.cache:
+                    self.cache.discard(request)
+                raise
+
+            return tagged
 
         except Exception as e:
             print(f"Error tagging batch: {e}")
             return []
 
-    def update_themes(self, tagged_verses: List[Tuple[int, str]]):
+    def propagate_tags(self, verses: List[Tuple[int, str, str]]) -> List[Tuple[int, str, str]]:
+        """Assign themes from confident tagged neighbors; return the verses still needing the API"""
+        conn = sqlite3.connect(self.db_path)
+        corpus, tagged = load_corpus(conn.cursor())
+        conn.close()
+
+        start = time.time()
+        assigned, queue = propagate_themes(corpus, tagged, targets={v[0] for v in verses}, **self.propagation)
+        if assigned:
+            self.update_themes(assigned)
+
+        api_batches = -(-len(queue) // self.batch_size)
+        saved_batches = -(-len(verses) // self.batch_size) - api_batches
+        print(f"🔗 Propagated themes to {len(assigned)} verses from tagged neighbors "
+              f"in {time.time() - start:.1f}s ({saved_batches} API batches saved)")
+        queued = set(queue)
+        return [v for v in verses if v[0] in queued]
+
+    def update_themes(self, tagged_verses: List[Tuple[int, List[str]]]):
         """Update database with tagged themes"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        cursor.executemany(
-            "UPDATE verses SET themes = ? WHERE id = ?",
-            [(themes, vid) for vid, themes in tagged_verses]
-        )
+        set_verse_themes(cursor, tagged_verses)
 
         conn.commit()
         conn.close()
@@ -122,6 +191,15 @@ Verses:
             return
 
         print(f"📊 Found {total} untagged verses")
+
+        if self.propagate:
+            verses = self.propagate_tags(verses)
+            total = len(verses)
+            if total == 0:
+                print("✅ All verses tagged from neighbors!")
+                return
+            print(f"📨 {total} low-confidence verses left for the API")
+
         print(f"🚀 Processing in batches of {self.batch_size} with {max_workers} parallel workers\n")
 
         # Split into batches
@@ -160,20 +238,43 @@ Verses:
         print(f"📈 Average rate: {completed/elapsed:.1f} verses/second")
 
 def main():
-    # Check for API key
-    if not os.environ.get("ANTHROPIC_API_KEY"):
+    parser = argparse.ArgumentParser(description="Tag critical books with Claude, propagating to near-duplicates first")
+    parser.add_argument('--db', default="assets/bible.db", help="Bible database")
+    parser.add_argument('--no-propagate', action='store_true', help="Send every untagged verse to the API")
+    parser.add_argument('--k', type=int, default=DEFAULT_K, help="Nearest tagged neighbors per verse")
+    parser.add_argument('--min-similarity', type=float, default=DEFAULT_MIN_SIMILARITY,
+                        help="Cosine similarity a neighbor needs to vote")
+    parser.add_argument('--min-agreement', type=float, default=DEFAULT_MIN_AGREEMENT,
+                        help="Weighted share of neighbor votes a theme needs")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    cache = cache_from_args(args)
+
+    # Check for the client and API key (not needed to replay the cache)
+    live = not (cache and cache.cache_only)
+    if live and Anthropic is None:
+        print("❌ Error: anthropic package not installed")
+        print("Install it with: pip install anthropic")
+        sys.exit(1)
+    if live and not os.environ.get("ANTHROPIC_API_KEY"):
         print("❌ Error: ANTHROPIC_API_KEY environment variable not set")
         print("\nSet it with:")
         print('  export ANTHROPIC_API_KEY="your-key-here"')
         sys.exit(1)
 
-    db_path = "assets/bible.db"
+    db_path = args.db
 
     if not os.path.exists(db_path):
         print(f"❌ Error: Database not found at {db_path}")
         sys.exit(1)
 
-    tagger = BibleThemeTagger(db_path, batch_size=50)
+    propagate = not args.no_propagate
+    if propagate and not scoring_available():
+        print("⚠️  numpy/scipy not installed (pip install numpy scipy); sending every verse to the API")
+        propagate = False
+
+    tagger = BibleThemeTagger(db_path, batch_size=50, propagate=propagate, propagation={
+        'k': args.k, 'min_similarity': args.min_similarity, 'min_agreement': args.min_agreement}, cache=cache)
 
     # Priority 1: Psalms (most important comfort book)
     print("=" * 70)
@@ -199,7 +300,7 @@ def main():
     cursor = conn.cursor()
     cursor.execute("SELECT COUNT(*) FROM verses")
     total = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM verses WHERE themes IS NOT NULL AND LENGTH(themes) > 2")
+    cursor.execute("SELECT COUNT(DISTINCT verse_id) FROM verse_themes")
     tagged = cursor.fetchone()[0]
     conn.close()
 
@@ -209,6 +310,8 @@ def main():
     print(f"Total verses: {total:,}")
     print(f"Tagged verses: {tagged:,}")
     print(f"Coverage: {100*tagged/total:.1f}%")
+    if cache:
+        print(cache.summary())
 
 if __name__ == "__main__":
     main()
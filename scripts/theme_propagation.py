@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Neighbor propagation of verse themes
+
+Many untagged verses are near-copies of verses that already have themes
+(parallel passages in the Gospels, Kings/Chronicles, repeated refrains in
+the Psalms). Before anything is sent to the API, each verse is turned into
+a cheap hashed vector of its word unigrams and bigrams (TF-IDF weighted,
+L2-normalized, very common words dropped), and every untagged verse is
+compared against every tagged one with a chunked sparse cosine product.
+
+A verse takes its neighbors' themes when
+
+    - its k nearest tagged neighbors at or above --min-similarity exist, and
+    - a theme's similarity-weighted share of their votes is at least
+      --min-agreement
+
+(up to three themes, strongest first). Everything else stays in the queue
+for the LLM. --evaluate hides a sample of the already-tagged verses,
+propagates from the rest and reports how many would have been
+auto-assigned and how well they match, so the thresholds can be tuned
+without spending API calls.
+
+Requires NumPy and SciPy (pip install numpy scipy).
+
+Usage:
+    python3 theme_propagation.py --db ../assets/bible.db --evaluate
+    python3 theme_propagation.py --evaluate --min-similarity 0.7 --min-agreement 0.5
+
+    from theme_propagation import propagate_themes
+    assigned, queue = propagate_themes(verses, tagged)
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+import zlib
+from collections import defaultdict
+
+from bible_db import ensure_theme_tables
+from theme_scoring import np, scoring_available, sparse, tokenize
+from verse_markup import clean_text
+
+# Hashed feature space; collisions only blur similarity slightly
+FEATURE_BITS = 18
+# Features in more than this share of verses ("the", "and", "of") carry no signal
+MAX_DOCUMENT_SHARE = 0.05
+DEFAULT_K = 5
+DEFAULT_MIN_SIMILARITY = 0.6
+DEFAULT_MIN_AGREEMENT = 0.6
+MAX_THEMES = 3
+# Untagged verses compared per sparse product
+CHUNK_SIZE = 2000
+
+
+def hashed_vectors(texts, bits=FEATURE_BITS, max_share=MAX_DOCUMENT_SHARE):
+    """Sparse rows of L2-normalized TF-IDF over hashed word unigrams and bigrams"""
+    mask = (1 << bits) - 1
+    rows, columns = [], []
+    for row, text in enumerate(texts):
+        tokens = tokenize(text)
+        features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+        rows.extend([row] * len(features))
+        columns.extend(zlib.crc32(feature.encode('utf-8')) & mask for feature in features)
+
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64))),
+        shape=(len(texts), mask + 1))
+    counts.sum_duplicates()
+
+    document_frequency = np.bincount(counts.indices, minlength=mask + 1)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)).astype(np.float32)
+    idf[document_frequency > max_share * len(texts)] = 0
+    counts.data = (1 + np.log(counts.data)) * idf[counts.indices]
+    counts.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ counts
+
+
+def vote(neighbors, themes_of, min_agreement=DEFAULT_MIN_AGREEMENT, max_themes=MAX_THEMES):
+    """Themes whose similarity-weighted share of the neighbors' votes reaches min_agreement, best first"""
+    weights = defaultdict(float)
+    total = 0.0
+    for neighbor, similarity in neighbors:
+        total += similarity
+        for theme in themes_of[neighbor]:
+            weights[theme] += similarity
+    if not total:
+        return []
+    agreed = [(weight / total, theme) for theme, weight in weights.items() if weight / total >= min_agreement]
+    return [theme for _, theme in sorted(agreed, key=lambda item: -item[0])[:max_themes]]
+
+
+def propagate_themes(verses, tagged, k=DEFAULT_K, min_similarity=DEFAULT_MIN_SIMILARITY,
+                     min_agreement=DEFAULT_MIN_AGREEMENT, targets=None, chunk_size=CHUNK_SIZE):
+    """
+    Split untagged verses into confident neighbor assignments and an LLM queue.
+
+    `verses` is [(verse_id, text)] for every verse (tagged ones included,
+    so they count towards the corpus statistics); `tagged` is
+    {verse_id: [theme, ...]}. Only untagged verses in `targets` (default:
+    all) are considered. Returns ([(verse_id, themes)], [verse_id]).
+    """
+    if not scoring_available():
+        raise RuntimeError("Theme propagation needs numpy and scipy (pip install numpy scipy)")
+
+    vectors = hashed_vectors([text for _, text in verses])
+    ids = [verse_id for verse_id, _ in verses]
+    tagged_rows = [row for row, verse_id in enumerate(ids) if tagged.get(verse_id)]
+    untagged_rows = [row for row, verse_id in enumerate(ids)
+                     if not tagged.get(verse_id) and (targets is None or verse_id in targets)]
+    if not tagged_rows:
+        return [], [ids[row] for row in untagged_rows]
+
+    themes_of = [tagged[ids[row]] for row in tagged_rows]
+    tagged_vectors = vectors[tagged_rows].T.tocsc()
+
+    assigned, queue = [], []
+    for start in range(0, len(untagged_rows), chunk_size):
+        chunk = untagged_rows[start:start + chunk_size]
+        similarities = (vectors[chunk] @ tagged_vectors).tocsr()
+        for offset, row in enumerate(chunk):
+            begin, end = similarities.indptr[offset], similarities.indptr[offset + 1]
+            scores = similarities.data[begin:end]
+            keep = np.flatnonzero(scores >= min_similarity)
+            if len(keep) > k:
+                keep = keep[np.argpartition(-scores[keep], k - 1)[:k]]
+            neighbors = [(similarities.indices[begin + index], float(scores[index])) for index in keep]
+            themes = vote(neighbors, themes_of, min_agreement) if neighbors else []
+            if themes:
+                assigned.append((ids[row], themes))
+            else:
+                queue.append(ids[row])
+    return assigned, queue
+
+
+def load_corpus(cursor):
+    """[(verse_id, clean text)] for every verse and {verse_id: [theme, ...]} from the junction"""
+    has_clean_text = any(row[1] == 'clean_text' for row in cursor.execute("PRAGMA table_info(verses)"))
+    if has_clean_text:
+        verses = cursor.execute("SELECT id, COALESCE(clean_text, text) FROM verses ORDER BY id").fetchall()
+    else:
+        verses = [(verse_id, clean_text(text)) for verse_id, text in
+                  cursor.execute("SELECT id, text FROM verses ORDER BY id")]
+
+    tagged = defaultdict(list)
+    for verse_id, theme in cursor.execute('''
+        SELECT vt.verse_id, t.name FROM verse_themes vt JOIN themes t ON t.id = vt.theme_id
+        ORDER BY vt.verse_id, vt.rank
+    '''):
+        tagged[verse_id].append(theme)
+    return verses, dict(tagged)
+
+
+def evaluate(verses, tagged, holdout=0.2, seed=0, **thresholds):
+    """Hide a share of the tagged verses, propagate, and compare with their real themes"""
+    hidden = set(random.Random(seed).sample(sorted(tagged), int(len(tagged) * holdout)))
+    visible = {verse_id: themes for verse_id, themes in tagged.items() if verse_id not in hidden}
+
+    start = time.perf_counter()
+    assigned, _ = propagate_themes(verses, visible, **thresholds)
+    elapsed = time.perf_counter() - start
+
+    hidden_assigned = [(verse_id, themes) for verse_id, themes in assigned if verse_id in hidden]
+    top_hits = sum(1 for verse_id, themes in hidden_assigned if themes[0] in tagged[verse_id])
+    overlap = sum(len(set(themes) & set(tagged[verse_id])) / len(themes) for verse_id, themes in hidden_assigned)
+    return {
+        'hidden': len(hidden),
+        'assigned': len(hidden_assigned),
+        'coverage': len(hidden_assigned) / len(hidden) if hidden else 0,
+        'top_theme_precision': top_hits / len(hidden_assigned) if hidden_assigned else 0,
+        'theme_precision': overlap / len(hidden_assigned) if hidden_assigned else 0,
+        'seconds': elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propagate verse themes from tagged nearest neighbors")
+    parser.add_argument('--db', default="../assets/bible.db", help="Bible database with verses and verse_themes")
+    parser.add_argument('--k', type=int, default=DEFAULT_K, help="Nearest tagged neighbors per verse")
+    parser.add_argument('--min-similarity', type=float, default=DEFAULT_MIN_SIMILARITY,
+                        help="Cosine similarity a neighbor needs to vote")
+    parser.add_argument('--min-agreement', type=float, default=DEFAULT_MIN_AGREEMENT,
+                        help="Weighted share of neighbor votes a theme needs")
+    parser.add_argument('--evaluate', action='store_true',
+                        help="Hold out tagged verses and measure coverage and precision (no writes)")
+    parser.add_argument('--holdout', type=float, default=0.2, help="Share of tagged verses hidden by --evaluate")
+    args = parser.parse_args()
+
+    if not scoring_available():
+        print("❌ numpy and scipy are required (pip install numpy scipy)")
+        sys.exit(1)
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db)
+    cursor = conn.cursor()
+    ensure_theme_tables(cursor)
+    conn.commit()
+    verses, tagged = load_corpus(cursor)
+    conn.close()
+    thresholds = {'k': args.k, 'min_similarity': args.min_similarity, 'min_agreement': args.min_agreement}
+    print(f"📖 {len(verses):,} verses, {len(tagged):,} tagged")
+
+    if args.evaluate:
+        result = evaluate(verses, tagged, args.holdout, **thresholds)
+        print(f"🔍 Held out {result['hidden']:,} tagged verses: {result['assigned']:,} auto-assigned "
+              f"({100 * result['coverage']:.1f}%) in {result['seconds']:.2f}s")
+        print(f"   top theme correct: {100 * result['top_theme_precision']:.1f}%, "
+              f"assigned themes correct: {100 * result['theme_precision']:.1f}%")
+        return
+
+    start = time.perf_counter()
+    assigned, queue = propagate_themes(verses, tagged, **thresholds)
+    print(f"🔗 {len(assigned):,} untagged verses have confident neighbors, {len(queue):,} need the LLM "
+          f"({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Vectorized BM25 / TF-IDF theme scoring over the verse corpus
+
+Tokenizes every verse once into a sparse verse x term count matrix,
+turns the theme keyword lists into a sparse term x theme query matrix,
+and scores every (verse, theme) pair with one sparse matrix product:
+
+    scores = bm25_weights(counts) @ queries          # verses x themes
+
+Top-k verses per theme and top-k themes per verse are read straight off
+the score matrix. Used by Bible_Theme_Tagger.py (--scoring bm25) and
+map_themes_to_verses.py in place of per-verse, per-theme keyword loops.
+
+Keywords are words or phrases ("cast burden"); phrases are counted as
+n-grams of the verse tokens. A trailing * matches any word starting with
+the keyword ("believ*"); with inflect=True a plain keyword also matches
+its simple inflections (pray -> prays, prayed, praying, prayeth).
+
+Requires NumPy and SciPy (pip install numpy scipy); callers check
+scoring_available() and fall back to their keyword loops without them.
+
+Usage:
+    from theme_scoring import ThemeScorer
+
+    scorer = ThemeScorer(texts, {'hope': ['hope', 'anchor', 'wait*']})
+    scorer.top_verses('hope', 25)     # [(row, score), ...] best first
+    scorer.top_themes(3)              # [[(theme, score), ...] per verse]
+"""
+
+import re
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)*")
+# Standard BM25 parameters
+K1 = 1.5
+B = 0.75
+# Endings tried for a plain keyword when inflect=True
+INFLECTIONS = ('', 's', 'es', 'd', 'ed', 'ing', 'eth', 'est')
+# Theme regexes Bible_Theme_Tagger can express as keywords: \bword\b, \bprefix, \bsome phrase\b
+KEYWORD_PATTERN_RE = re.compile(r'\\b([a-z]+(?: [a-z]+)*)(\\b)?')
+
+
+def scoring_available():
+    return np is not None and sparse is not None
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def pattern_keyword(pattern):
+    """Keyword for a theme regex (\\bfaith\\b -> faith, \\bbeliev -> believ*), or None"""
+    match = KEYWORD_PATTERN_RE.fullmatch(pattern)
+    if not match:
+        return None
+    return match.group(1) if match.group(2) else match.group(1) + '*'
+
+
+class ThemeScorer:
+    """BM25 (or TF-IDF) scores of every verse against every theme's keywords"""
+
+    def __init__(self, texts, themes, method='bm25', inflect=False, k1=K1, b=B):
+        if not scoring_available():
+            raise RuntimeError("Theme scoring needs numpy and scipy (pip install numpy scipy)")
+        self.themes = list(themes)
+        self.theme_index = {theme: column for column, theme in enumerate(self.themes)}
+
+        keywords = {theme: [keyword.lower().strip() for keyword in theme_keywords]
+                    for theme, theme_keywords in themes.items()}
+        phrases = {tuple(keyword.rstrip('*').split()) for theme_keywords in keywords.values()
+                   for keyword in theme_keywords if ' ' in keyword.rstrip('*')}
+
+        counts, lengths, vocabulary = self._count_terms(texts, phrases)
+        weights = self._term_weights(counts, lengths, method, k1, b)
+        queries = self._query_matrix(keywords, vocabulary, inflect)
+        self.scores = (weights @ queries).toarray()
+
+    @staticmethod
+    def _count_terms(texts, phrases):
+        """Sparse verse x term counts (words plus the keyword phrases), verse lengths and the vocabulary"""
+        vocabulary = {}
+        term_id = vocabulary.setdefault
+        phrase_lengths = sorted({len(phrase) for phrase in phrases})
+        phrase_starts = {phrase[0] for phrase in phrases}
+
+        rows, columns, lengths = [], [], []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            terms = [term_id(token, len(vocabulary)) for token in tokens]
+            if phrase_starts:
+                for position, token in enumerate(tokens):
+                    if token not in phrase_starts:
+                        continue
+                    for n in phrase_lengths:
+                        phrase = tuple(tokens[position:position + n])
+                        if phrase in phrases:
+                            terms.append(term_id(' '.join(phrase), len(vocabulary)))
+            rows.extend([row] * len(terms))
+            columns.extend(terms)
+            lengths.append(len(tokens))
+
+        counts = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64))),
+            shape=(len(lengths), len(vocabulary)))
+        counts.sum_duplicates()
+        return counts, np.array(lengths, dtype=np.float64), vocabulary
+
+    @staticmethod
+    def _term_weights(counts, lengths, method, k1, b):
+        """Per (verse, term) weight, computed on the non-zero entries only"""
+        verses = counts.shape[0]
+        document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+        weights = counts.copy()
+        term_frequency = weights.data
+        columns = weights.indices
+        if method == 'bm25':
+            idf = np.log1p((verses - document_frequency + 0.5) / (document_frequency + 0.5))
+            average_length = lengths.mean() if verses else 0.0
+            row_lengths = np.repeat(lengths, np.diff(weights.indptr))
+            norm = k1 * (1 - b + b * row_lengths / average_length) if average_length else k1
+            weights.data = idf[columns] * term_frequency * (k1 + 1) / (term_frequency + norm)
+        elif method == 'tfidf':
+            idf = np.log((1 + verses) / (1 + document_frequency)) + 1
+            weights.data = (1 + np.log(term_frequency)) * idf[columns]
+        else:
+            raise ValueError(f"Unknown scoring method: {method}")
+        return weights
+
+    def _query_matrix(self, keywords, vocabulary, inflect):
+        """Sparse term x theme matrix: 1 where a vocabulary term matches one of the theme's keywords"""
+        by_prefix = defaultdict(list)
+        prefixes = {keyword[:-1] for theme_keywords in keywords.values() for keyword in theme_keywords
+                    if keyword.endswith('*')}
+        if prefixes:
+            for term, column in vocabulary.items():
+                for length in range(1, len(term) + 1):
+                    if term[:length] in prefixes:
+                        by_prefix[term[:length]].append(column)
+
+        entries = {}
+        for theme, theme_keywords in keywords.items():
+            theme_column = self.theme_index[theme]
+            for keyword in theme_keywords:
+                if keyword.endswith('*'):
+                    columns = by_prefix.get(keyword[:-1], [])
+                elif inflect and ' ' not in keyword:
+                    columns = [vocabulary[keyword + ending] for ending in INFLECTIONS if keyword + ending in vocabulary]
+                else:
+                    columns = [vocabulary[keyword]] if keyword in vocabulary else []
+                for column in columns:
+                    entries[column, theme_column] = 1.0
+
+        term_columns = np.array([term for term, _ in entries], dtype=np.int64)
+        theme_columns = np.array([theme for _, theme in entries], dtype=np.int64)
+        return sparse.csr_matrix((np.ones(len(entries)), (term_columns, theme_columns)),
+                                 shape=(len(vocabulary), len(self.themes)))
+
+    def top_verses(self, theme, k):
+        """[(row, score)] of the k best verses for a theme, best first; zero scores are dropped"""
+        column = self.scores[:, self.theme_index[theme]]
+        k = min(k, len(column))
+        if not k:
+            return []
+        candidates = np.argpartition(-column, k - 1)[:k]
+        # Best score first, ties in verse order
+        candidates = candidates[np.lexsort((candidates, -column[candidates]))]
+        return [(int(row), float(column[row])) for row in candidates if column[row] > 0]
+
+    def top_themes(self, k):
+        """For every verse, [(theme, score)] of its k best themes, best first; ties keep theme order"""
+        order = np.argsort(-self.scores, axis=1, kind='stable')[:, :k]
+        best = np.take_along_axis(self.scores, order, axis=1)
+        return [[(self.themes[column], float(score)) for column, score in zip(columns, scores) if score > 0]
+                for columns, scores in zip(order.tolist(), best.tolist())]
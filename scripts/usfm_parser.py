@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+USFM Parser
+Single-pass tokenizer and state machine for USFM scripture files.
+
+One compiled regex splits the source into markers and text runs. A small
+state machine tracks book/chapter/verse and routes every text run to the
+current verse, a footnote, or nowhere (titles, headings, cross references).
+Verse text that continues onto \\p, \\q, \\m ... lines stays with its verse,
+and nested character markers (\\+w inside \\wj, \\+wh inside footnotes) are
+unwrapped instead of leaking into the output.
+
+Usage:
+    from usfm_parser import parse_usfm
+
+    with open('02-GENengwebp.usfm', encoding='utf-8') as f:
+        for record in parse_usfm(f):
+            print(record.book, record.chapter, record.verse, record.clean_text)
+"""
+
+import re
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+# Bump whenever the records produced for the same input change, so
+# incremental builds know to re-parse every book
+PARSER_VERSION = '1'
+
+# A run of text and complete \w word|attributes\w* spans (the bulk of WEB
+# text, matched in one step), \marker, \+marker (nested) or \marker*
+# (closing). An opening marker eats one following whitespace character, a
+# closing marker eats nothing.
+TOKEN_RE = re.compile(
+    r'((?:[^\\]++|\\\+?w [^\\]*+\\\+?w\*)++)'
+    r'|\\(\+?)([A-Za-z]+[0-9]*)(?:(\*)|\s?)'
+    r'|\\'
+)
+# Word attributes left behind once \w markers are unwrapped: |strong="H1254"
+ATTRIBUTES_RE = re.compile(r'\|[^\s"|]+="[^"]*"(?:\s[^\s"|]+="[^"]*")*')
+ARGUMENT_RE = re.compile(r'\s*(\S*)\s?(.*)', re.DOTALL)
+NUMBER_RE = re.compile(r'\d*')
+
+# Paragraph markers whose text is not verse text (identification, titles,
+# headings, introductions, labels). Matched on the marker without its digit.
+HEADER_MARKERS = frozenset({
+    'id', 'ide', 'h', 'toc', 'toca', 'rem', 'sts', 'usfm', 'restore',
+    'mt', 'mte', 'ms', 'mr', 's', 'sr', 'r', 'd', 'sp', 'sd', 'cl', 'cd', 'cp', 'lit',
+    'imt', 'imte', 'is', 'ip', 'ipi', 'im', 'imi', 'ipq', 'imq', 'ipr', 'iq', 'ib',
+    'ili', 'iot', 'io', 'iex', 'ie', 'periph',
+})
+
+# Paragraph markers that start a new line of body text; an open verse continues
+BODY_MARKERS = frozenset({
+    'p', 'm', 'po', 'pr', 'cls', 'pmo', 'pm', 'pmc', 'pmr', 'pi', 'mi', 'nb', 'pc', 'ph',
+    'q', 'qr', 'qc', 'qa', 'qm', 'qd', 'lh', 'li', 'lf', 'lim', 'b', 'pb',
+    'tr', 'th', 'thr', 'tc', 'tcr',
+})
+
+# Note markers: footnotes are kept, cross references are dropped
+FOOTNOTE_MARKERS = frozenset({'f', 'fe', 'ef'})
+CROSS_REF_MARKERS = frozenset({'x', 'ex'})
+
+# Character markers whose content is never verse text
+SKIPPED_CHAR_MARKERS = frozenset({'va', 'vp', 'ca', 'fig', 'rq'})
+
+
+class Footnote(NamedTuple):
+    ref: str
+    text: str
+
+
+class VerseRecord(NamedTuple):
+    book_code: str
+    book: str
+    chapter: int
+    verse: int
+    text: str                       # verse text keeping word attributes (word|strong="H1254")
+    clean_text: str                 # plain verse text
+    footnotes: Tuple[Footnote, ...]
+
+
+def _normalize(pieces):
+    return ' '.join(''.join(pieces).split())
+
+
+def parse_usfm(source: Union[str, Iterable[str]], fallback_book: Optional[str] = None) -> Iterator[VerseRecord]:
+    """
+    Parse one USFM book and yield a VerseRecord per verse, in file order.
+
+    `source` is the book text or any iterable of lines (an open file works,
+    so a book never has to be read into memory at once).
+    """
+    if isinstance(source, str):
+        source = source.splitlines(keepends=True)
+
+    book_code = ''
+    book = fallback_book or ''
+    chapter = 0
+    verse = None
+    text_parts, footnotes = [], []
+
+    pending = None        # marker waiting for its argument: 'id', 'c' or 'v'
+    in_header = False     # inside a title/heading paragraph
+    header_marker = None
+    header_parts = []
+    char_stack = []       # open character markers, innermost last
+    note = None           # None, 'footnote' or 'crossref'
+    note_field = None
+    note_ref, note_parts = [], []
+
+    def finish_verse():
+        if verse is not None and chapter > 0:
+            text = _normalize(text_parts)
+            if text:
+                return VerseRecord(book_code, book, chapter, verse, text,
+                                   _normalize(ATTRIBUTES_RE.split(text)), tuple(footnotes))
+        return None
+
+    def finish_header():
+        nonlocal book
+        if header_marker == 'h' and book == (fallback_book or ''):
+            book = _normalize(header_parts) or book
+
+    for line in source:
+        for match in TOKEN_RE.finditer(line):
+            run, nested, marker, closing = match.groups()
+
+            # ---- text runs ----
+            if run is not None:
+                if pending is not None:
+                    arg, run = ARGUMENT_RE.match(run).groups()
+                    if pending == 'id':
+                        book_code = arg.upper()
+                        in_header, header_marker, header_parts = True, 'id', []
+                    elif pending == 'c':
+                        chapter = int(NUMBER_RE.match(arg).group() or 0)
+                    else:
+                        verse = int(NUMBER_RE.match(arg).group() or 0)
+                    pending = None
+                    if not run:
+                        continue
+
+                if '\\' in run:
+                    run = (run.replace('\\w ', '').replace('\\w*', '')
+                           .replace('\\+w ', '').replace('\\+w*', ''))
+
+                if note is not None:
+                    if note == 'footnote':
+                        if note_field is None:
+                            # The caller ("+", "-", "a") precedes the first note marker
+                            continue
+                        (note_ref if note_field == 'fr' else note_parts).append(run)
+                elif in_header:
+                    header_parts.append(run)
+                elif verse is not None and not (char_stack and char_stack[-1] in SKIPPED_CHAR_MARKERS):
+                    text_parts.append(run)
+                continue
+
+            if marker is None:
+                continue  # stray backslash
+
+            base = marker.rstrip('0123456789')
+
+            # ---- closing markers ----
+            if closing:
+                if note is not None and (base in FOOTNOTE_MARKERS or base in CROSS_REF_MARKERS):
+                    if note == 'footnote' and verse is not None:
+                        footnotes.append(Footnote(_normalize(note_ref),
+                                                  _normalize(ATTRIBUTES_RE.split(''.join(note_parts)))))
+                    note = None
+                elif note is not None and base.startswith(('f', 'x')):
+                    note_field = 'ft'
+                elif base in char_stack:
+                    del char_stack[len(char_stack) - 1 - char_stack[::-1].index(base):]
+                continue
+
+            # ---- notes ----
+            if note is not None:
+                if base in FOOTNOTE_MARKERS or base in CROSS_REF_MARKERS:
+                    continue
+                note_field = 'fr' if base in ('fr', 'xo') else 'ft'
+                continue
+            if base in FOOTNOTE_MARKERS or base in CROSS_REF_MARKERS:
+                note = 'footnote' if base in FOOTNOTE_MARKERS else 'crossref'
+                note_field = None
+                note_ref, note_parts = [], []
+                continue
+
+            # ---- chapter / verse / book ----
+            if base in ('c', 'v', 'id'):
+                if base != 'id':
+                    record = finish_verse()
+                    if record is not None:
+                        yield record
+                    verse = None
+                    text_parts, footnotes = [], []
+                if in_header:
+                    finish_header()
+                in_header = False
+                char_stack = []
+                pending = base
+                continue
+
+            # ---- paragraph markers ----
+            if base in HEADER_MARKERS:
+                if in_header:
+                    finish_header()
+                in_header, header_marker, header_parts = True, base, []
+                char_stack = []
+                continue
+            if base in BODY_MARKERS:
+                if in_header:
+                    finish_header()
+                in_header = False
+                char_stack = []
+                if verse is not None:
+                    text_parts.append(' ')
+                continue
+
+            # ---- character markers (\w, \+w, \wj, \nd, \add, \qs ...) ----
+            if not nested:
+                char_stack = []
+            char_stack.append(base)
+
+    if in_header:
+        finish_header()
+    record = finish_verse()
+    if record is not None:
+        yield record
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Verse Markup Parser
+Splits annotated verse text into clean text, Strong's tokens and footnotes.
+
+Verse text in the legacy databases keeps the USFM word annotations and
+flattened footnotes:
+
+    In|strong="H8064" the|strong="H1254" beginning|strong="H7225", God|strong="H8064"
+    + 1:1 The Hebrew word rendered “God” is “\\+wh אֱלֹהִ֑ים\\+wh*” (Elohim).
+    created|strong="H1254" the|strong="H1254" heavens|strong="H8064" ...
+
+One compiled regex walks the string once, left to right; each match is a
+marker, an attribute, whitespace, a stray +/* or a run of text. A
+footnote (`+ 1:1 ...` or an explicit `\\f ... \\f*`) has no end marker in
+the flattened form, so it ends at the last sentence terminator before the
+next Strong's-tagged word (or at that word when there is none, or at the
+end of the verse). Finding that boundary looks ahead once per footnote,
+so the whole parse stays linear in the length of the verse.
+
+Usage:
+    from verse_markup import parse_verse_markup
+
+    parsed = parse_verse_markup(text)
+    parsed.text        # 'In the beginning, God created the heavens and the earth.'
+    parsed.tokens      # [('In', 'H8064', 0), ('the', 'H1254', 3), ...]
+    parsed.footnotes   # [Footnote(reference='1:1', text='The Hebrew word ...', offset=21)]
+"""
+
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+# Bump whenever the output for the same input changes
+MARKUP_PARSER_VERSION = '1'
+
+TOKEN_RE = re.compile(
+    r'(?P<marker>\\\+?[A-Za-z]+[0-9]*(?:\*|\s?)|\+w\*|\+w\s?)'
+    r'|\|strong="(?P<strong>[HG]\d+)"'
+    r'|(?P<attribute>\|[^\s"|]+="[^"]*")'
+    r'|(?P<space>\s+)'
+    r'|(?P<stray>[+*])'
+    r'|(?P<text>[^\s\\|+*]+|[\\|])'
+)
+# Fast path for the bulk of the text: word|strong="H1234", trailing punctuation, spaces
+WORD_RE = re.compile(r'([^\s\\|+*]+)(?:\|strong="([HG]\d+)")?([^\s\\|+*]*)(\s*)')
+# Flattened footnote: "+ 1:1 " (the \f and \fr markers already removed)
+FOOTNOTE_START_RE = re.compile(r'\+\s*(\d+:\d+)\s+')
+# Explicit USFM footnote: \f + \fr 1:1 \ft text\f*
+USFM_FOOTNOTE_RE = re.compile(r'\\f\s+\+?\s*(?:\\fr\s+(\S+)\s*)?(.*?)\\f\*', re.DOTALL)
+TERMINATOR_RE = re.compile(r'[.!?][”’"\')\]]*(?=\s)')
+# The word inside a chunk: first to last word character (quotes and punctuation dropped)
+WORD_SPAN_RE = re.compile(r'\w(?:.*\w)?', re.DOTALL)
+
+
+class Footnote(NamedTuple):
+    reference: Optional[str]
+    text: str
+    offset: int
+
+
+class ParsedVerse(NamedTuple):
+    text: str
+    # (word, strong_id or None, offset into text); plain tuples, there are ~600k per Bible
+    tokens: List[Tuple[str, Optional[str], int]]
+    footnotes: List[Footnote]
+
+
+class _Writer:
+    """Accumulate clean text with single spaces, tracking word tokens and offsets"""
+
+    def __init__(self):
+        self.pieces = []
+        self.length = 0
+        self.pending_space = False
+        self.tokens = []
+        self.word_start = None
+        self.word_pieces = []
+
+    def space(self):
+        if self.length:
+            self.pending_space = True
+        self.end_word()
+
+    def text(self, value):
+        if self.pending_space:
+            self.pieces.append(' ')
+            self.length += 1
+            self.pending_space = False
+        if self.word_start is None:
+            self.word_start = self.length
+        self.word_pieces.append(value)
+        self.pieces.append(value)
+        self.length += len(value)
+
+    def word(self, value, strong_id, tail):
+        """Fast path: a whole word, its optional tag and trailing punctuation, then a space"""
+        if self.word_pieces:
+            # Continues a word split by a marker
+            self.text(value)
+            if strong_id:
+                self.strong(strong_id)
+            if tail:
+                self.text(tail)
+            self.space()
+            return
+        if self.pending_space:
+            self.pieces.append(' ')
+            self.length += 1
+            self.pending_space = False
+        span = WORD_SPAN_RE.search(value)
+        if span:
+            self.tokens.append((span.group(), strong_id, self.length + span.start()))
+        self.pieces.append(value)
+        self.length += len(value)
+        if tail:
+            # Untagged punctuation after the tag, e.g. the comma in beginning|strong="H7225",
+            span = WORD_SPAN_RE.search(tail)
+            if span:
+                self.tokens.append((span.group(), None, self.length + span.start()))
+            self.pieces.append(tail)
+            self.length += len(tail)
+        self.pending_space = True
+
+    def strong(self, strong_id):
+        """Tag the word just written; a second tag on the same word is ignored"""
+        if self.word_start is not None and self.word_pieces:
+            self._emit(strong_id)
+            # Punctuation after the tag ("beginning|strong=..,") is not part of the word
+            self.word_start = None
+            self.word_pieces = []
+
+    def end_word(self):
+        if self.word_start is not None and self.word_pieces:
+            self._emit(None)
+        self.word_start = None
+        self.word_pieces = []
+
+    def _emit(self, strong_id):
+        # Quotes and punctuation around the word are not part of it
+        span = WORD_SPAN_RE.search(''.join(self.word_pieces))
+        if span:
+            self.tokens.append((span.group(), strong_id, self.word_start + span.start()))
+
+    def finish(self):
+        self.end_word()
+        return ''.join(self.pieces)
+
+
+def _clean_fragment(text):
+    """Clean text of a footnote body: markers and attributes dropped, spaces collapsed"""
+    writer = _Writer()
+    for match in TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == 'text':
+            writer.text(match.group())
+        elif kind == 'space':
+            writer.space()
+    return writer.finish()
+
+
+def _footnote_end(text, body_start):
+    """Index where a flattened footnote starting at body_start ends"""
+    tag = text.find('|strong="', body_start)
+    if tag == -1:
+        return len(text)
+    # Back up to the start of the tagged word
+    word_start = tag
+    while word_start > body_start and not text[word_start - 1].isspace():
+        word_start -= 1
+    end = word_start
+    for match in TERMINATOR_RE.finditer(text, body_start, word_start):
+        end = match.end()
+    return end
+
+
+def parse_verse_markup(text):
+    """Parse annotated verse text into a ParsedVerse"""
+    if not text:
+        return ParsedVerse('', [], [])
+
+    writer = _Writer()
+    footnotes = []
+    position = 0
+    length = len(text)
+    while position < length:
+        word = WORD_RE.match(text, position)
+        if word:
+            value, strong_id, tail, space = word.groups()
+            if space:
+                writer.word(value, strong_id, tail)
+            else:
+                writer.text(value)
+                if strong_id:
+                    writer.strong(strong_id)
+                if tail:
+                    writer.text(tail)
+            position = word.end()
+            continue
+
+        match = TOKEN_RE.match(text, position)
+        kind = match.lastgroup
+        if kind == 'stray' and match.group() == '+':
+            footnote = FOOTNOTE_START_RE.match(text, position)
+            if footnote:
+                writer.end_word()
+                end = _footnote_end(text, footnote.end())
+                footnotes.append(Footnote(footnote.group(1), _clean_fragment(text[footnote.end():end]),
+                                          writer.length))
+                writer.space()
+                position = end
+                continue
+        elif kind == 'marker' and match.group().rstrip() == '\\f':
+            footnote = USFM_FOOTNOTE_RE.match(text, position)
+            if footnote:
+                writer.end_word()
+                footnotes.append(Footnote(footnote.group(1), _clean_fragment(footnote.group(2)), writer.length))
+                position = footnote.end()
+                continue
+
+        if kind == 'text':
+            writer.text(match.group())
+        elif kind == 'strong':
+            writer.strong(match.group('strong'))
+        elif kind == 'space':
+            writer.space()
+        position = match.end()
+
+    clean = writer.finish()
+    return ParsedVerse(clean, writer.tokens, footnotes)
+
+
+def clean_text(text):
+    """Clean verse text only"""
+    return parse_verse_markup(text).text